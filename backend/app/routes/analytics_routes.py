@@ -1,37 +1,58 @@
-from fastapi import APIRouter, Depends
-from schemas import DashboardStats, RevenueStats
-from database import get_supabase
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from typing import List, Optional
+from schemas import (
+    DashboardStats, Granularity, RevenueStats, ServicePrice, ServicePriceUpdate, TimeSeries, TimeSeriesGroupBy
+)
+from database import get_supabase, AsyncDatabase
 from auth import require_staff_or_admin
-from supabase import Client #type: ignore
-from datetime import datetime, timedelta
+from counters import booking_counters
+from revenue import MAX_BUCKETS, bucket_count, buckets, revenue_rollup, service_catalog
+from stock_alerts import stock_alerts
+from timeseries import booking_timeseries
+from response_cache import response_cache
+from datetime import date, timedelta
+import asyncio
+import logging
 
 router = APIRouter(prefix="/analytics", tags=["Analytics"])
+logger = logging.getLogger(__name__)
+
+async def count_rows(query) -> int:
+    """Execute a ``count="exact", head=True`` query and return the count"""
+    result = await query.execute()
+    return result.count or 0
 
 @router.get("/dashboard", response_model=DashboardStats)
+@response_cache.cached("bookings", "contacts", "users", "inventory", "forms")
 async def get_dashboard_stats(
     current_user: dict = Depends(require_staff_or_admin),
-    supabase: Client = Depends(get_supabase)
+    supabase: AsyncDatabase = Depends(get_supabase)
 ):
     """Get dashboard statistics"""
-    # Get all data
-    bookings = supabase.table("bookings").select("*").execute().data
-    contacts = supabase.table("contacts").select("*").execute().data
-    staff = supabase.table("users").select("*").eq("role", "staff").execute().data
-    inventory = supabase.table("inventory").select("*").in_("status", ["low", "critical"]).execute().data
-    forms = supabase.table("forms").select("*").eq("status", "overdue").execute().data
-    
-    # Calculate stats
-    total_bookings = len(bookings)
-    pending_bookings = len([b for b in bookings if b["status"] == "pending"])
-    completed_bookings = len([b for b in bookings if b["status"] == "completed"])
+    # Counts are computed by the database (head requests return no rows)
+    # and the queries run concurrently on the database pool; low stock is
+    # the size of the in-memory alert set
+    (
+        total_bookings,
+        pending_bookings,
+        completed_bookings,
+        total_contacts,
+        active_staff,
+        overdue_forms,
+        _,
+    ) = await asyncio.gather(
+        count_rows(supabase.table("bookings").select("id", count="exact", head=True)),
+        count_rows(supabase.table("bookings").select("id", count="exact", head=True).eq("status", "pending")),
+        count_rows(supabase.table("bookings").select("id", count="exact", head=True).eq("status", "completed")),
+        count_rows(supabase.table("contacts").select("id", count="exact", head=True)),
+        count_rows(supabase.table("users").select("id", count="exact", head=True).eq("role", "staff").eq("status", "active")),
+        count_rows(supabase.table("forms").select("id", count="exact", head=True).eq("status", "overdue")),
+        stock_alerts.ensure_loaded(supabase),
+    )
     
-    # Mock revenue calculation (120 per completed booking)
-    total_revenue = completed_bookings * 120.0
+    await revenue_rollup.ensure_loaded(supabase)
+    _, total_revenue = revenue_rollup.totals()
     
-    total_contacts = len(contacts)
-    active_staff = len([s for s in staff if s.get("status") == "active"])
-    low_stock_items = len(inventory)
-    overdue_forms = len(forms)
     results=DashboardStats(
         total_bookings=total_bookings,
         pending_bookings=pending_bookings,
@@ -39,67 +60,185 @@ async def get_dashboard_stats(
         total_revenue=total_revenue,
         total_contacts=total_contacts,
         active_staff=active_staff,
-        low_stock_items=low_stock_items,
+        low_stock_items=stock_alerts.count(),
         overdue_forms=overdue_forms
     )
-    print(results)
+    logger.debug("Dashboard stats: %s", results)
     return results
 
+# Series span when only some of from/to/granularity are given
+DEFAULT_SERIES_SPAN = {
+    Granularity.DAY: timedelta(days=29),
+    Granularity.WEEK: timedelta(weeks=11),
+    Granularity.MONTH: timedelta(days=334),
+}
+
+def series_range(date_from: Optional[date], date_to: Optional[date], granularity: Granularity) -> tuple:
+    """``(start, end)`` of a series, defaulting either end to ``DEFAULT_SERIES_SPAN``"""
+    end = date_to or (date_from + DEFAULT_SERIES_SPAN[granularity] if date_from else date.today())
+    start = date_from or end - DEFAULT_SERIES_SPAN[granularity]
+    if start > end:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="'from' must not be after 'to'")
+    if bucket_count(start, end, granularity.value) > MAX_BUCKETS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Range spans more than {MAX_BUCKETS} {granularity.value} buckets"
+        )
+    return start, end
+
 @router.get("/revenue", response_model=RevenueStats)
+@response_cache.cached("bookings")
 async def get_revenue_stats(
+    date_from: Optional[date] = Query(None, alias="from"),
+    date_to: Optional[date] = Query(None, alias="to"),
+    granularity: Optional[Granularity] = None,
     current_user: dict = Depends(require_staff_or_admin),
-    supabase: Client = Depends(get_supabase)
+    supabase: AsyncDatabase = Depends(get_supabase)
 ):
-    """Get revenue statistics"""
-    now = datetime.now()
-    this_month_start = now.replace(day=1)
-    last_month_start = (this_month_start - timedelta(days=1)).replace(day=1)
-    
-    # Get bookings
-    bookings = supabase.table("bookings").select("*").eq("status", "completed").execute().data
+    """Get revenue statistics.
     
-    # Calculate revenue (mock: 120 per booking)
-    total = len(bookings) * 120.0
+    Revenue is counted on the booking date from the daily rollup. With
+    ``from``, ``to`` or ``granularity`` the response also has a series of
+    per-day, week or month totals (monthly over the last year by default).
+    """
+    await revenue_rollup.ensure_loaded(supabase)
+    today = date.today()
+    this_month_start = today.replace(day=1)
+    last_month_start = (this_month_start - timedelta(days=1)).replace(day=1)
     
-    this_month = len([b for b in bookings if b.get("created_at", "")[:7] == this_month_start.strftime("%Y-%m")]) * 120.0
-    last_month = len([b for b in bookings if b.get("created_at", "")[:7] == last_month_start.strftime("%Y-%m")]) * 120.0
+    _, total = revenue_rollup.totals()
+    _, this_month = revenue_rollup.totals(this_month_start, None)
+    _, last_month = revenue_rollup.totals(last_month_start, this_month_start - timedelta(days=1))
     
     # Calculate growth
     growth_percentage = ((this_month - last_month) / last_month * 100) if last_month > 0 else 0
     
+    series = None
+    if date_from or date_to or granularity:
+        granularity = granularity or Granularity.MONTH
+        start, end = series_range(date_from, date_to, granularity)
+        series = revenue_rollup.series(start, end, granularity.value)
+    
     return RevenueStats(
         total=total,
         this_month=this_month,
         last_month=last_month,
-        growth_percentage=growth_percentage
+        growth_percentage=growth_percentage,
+        granularity=granularity,
+        series=series
     )
 
+@router.get("/timeseries", response_model=TimeSeries)
+@response_cache.cached("bookings", "users")
+async def get_booking_timeseries(
+    date_from: Optional[date] = Query(None, alias="from"),
+    date_to: Optional[date] = Query(None, alias="to"),
+    granularity: Granularity = Granularity.DAY,
+    group_by: Optional[TimeSeriesGroupBy] = None,
+    current_user: dict = Depends(require_staff_or_admin),
+    supabase: AsyncDatabase = Depends(get_supabase)
+):
+    """Get booking counts per status and cancellation rate per day, week or month.
+    
+    With ``group_by`` there is one series per staff member, location or
+    service, largest first. Only the date, status and grouping columns are
+    read, and they are aggregated with NumPy.
+    """
+    start, end = series_range(date_from, date_to, granularity)
+    try:
+        builder = await booking_timeseries(
+            supabase, start, end, granularity.value, group_by.value if group_by else None
+        )
+        series = builder.result()["series"]
+        
+        labels = {}
+        staff_ids = [s["group"] for s in series if s["group"]]
+        if group_by == TimeSeriesGroupBy.STAFF and staff_ids:
+            result = await supabase.table("users").select("id,username").in_("id", staff_ids).execute()
+            labels = {user["id"]: user["username"] for user in result.data}
+        for s in series:
+            s["label"] = labels.get(s["group"], s["group"])
+        
+        return TimeSeries(
+            granularity=granularity,
+            group_by=group_by,
+            start=start,
+            end=end,
+            buckets=[first for first, _ in buckets(start, end, granularity.value)],
+            series=series
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to fetch booking time series: {str(e)}"
+        )
+
+@router.get("/prices", response_model=List[ServicePrice])
+@response_cache.cached("services")
+async def get_service_prices(
+    current_user: dict = Depends(require_staff_or_admin),
+    supabase: AsyncDatabase = Depends(get_supabase)
+):
+    """Get the service price catalog"""
+    await service_catalog.ensure_loaded(supabase)
+    return [ServicePrice(name=name, price=price) for name, price in sorted(service_catalog.prices.items())]
+
+@router.put("/prices/{service}", response_model=ServicePrice)
+async def set_service_price(
+    service: str,
+    update: ServicePriceUpdate,
+    current_user: dict = Depends(require_staff_or_admin),
+    supabase: AsyncDatabase = Depends(get_supabase)
+):
+    """Set a service's price; bookings completed from now on are charged it"""
+    try:
+        result = await supabase.table("services").upsert(
+            {"name": service, "price": update.price}, on_conflict="name"
+        ).execute()
+        service_catalog.set_price(service, update.price)
+        await response_cache.invalidate("services")
+        row = result.data[0] if result.data else {"name": service, "price": update.price}
+        return ServicePrice(name=row["name"], price=float(row["price"]))
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to set price: {str(e)}"
+        )
+
 @router.get("/bookings/by-status")
+@response_cache.cached("bookings")
 async def get_bookings_by_status(
     current_user: dict = Depends(require_staff_or_admin),
-    supabase: Client = Depends(get_supabase)
+    supabase: AsyncDatabase = Depends(get_supabase)
 ):
     """Get booking counts by status"""
-    bookings = supabase.table("bookings").select("status").execute().data
-    
-    status_counts = {}
-    for booking in bookings:
-        status = booking["status"]
-        status_counts[status] = status_counts.get(status, 0) + 1
-    
-    return status_counts
+    await booking_counters.ensure_loaded(supabase)
+    return dict(booking_counters.by_status)
 
 @router.get("/bookings/by-service")
+@response_cache.cached("bookings")
 async def get_bookings_by_service(
     current_user: dict = Depends(require_staff_or_admin),
-    supabase: Client = Depends(get_supabase)
+    supabase: AsyncDatabase = Depends(get_supabase)
 ):
     """Get booking counts by service"""
-    bookings = supabase.table("bookings").select("service").execute().data
-    
-    service_counts = {}
-    for booking in bookings:
-        service = booking["service"]
-        service_counts[service] = service_counts.get(service, 0) + 1
-    
-    return service_counts
+    await booking_counters.ensure_loaded(supabase)
+    return dict(booking_counters.by_service)
+
+@router.get("/bookings/by-day")
+@response_cache.cached("bookings")
+async def get_bookings_by_day(
+    date_from: Optional[str] = Query(None, alias="from"),
+    date_to: Optional[str] = Query(None, alias="to"),
+    current_user: dict = Depends(require_staff_or_admin),
+    supabase: AsyncDatabase = Depends(get_supabase)
+):
+    """Get booking counts by day (YYYY-MM-DD)"""
+    await booking_counters.ensure_loaded(supabase)
+    return {
+        day: count
+        for day, count in sorted(booking_counters.by_day.items())
+        if (not date_from or day >= date_from) and (not date_to or day <= date_to)
+    }
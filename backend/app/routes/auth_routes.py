@@ -1,8 +1,8 @@
 from fastapi import APIRouter, HTTPException, status, Depends
 from  schemas import UserCreate, UserLogin, Token, UserResponse
-from  database import get_supabase, get_supabase_admin
+from database import get_supabase, get_supabase_admin, AsyncDatabase
 from  auth import get_password_hash, verify_password, create_access_token, get_current_user
-from supabase import Client #type: ignore
+from response_cache import response_cache
 import uuid
 
 router = APIRouter(prefix="/auth", tags=["Authentication"])
@@ -10,12 +10,12 @@ router = APIRouter(prefix="/auth", tags=["Authentication"])
 @router.post("/register", response_model=Token, status_code=status.HTTP_201_CREATED)
 async def register(
     user: UserCreate,
-    supabase: Client = Depends(get_supabase_admin)
+    supabase: AsyncDatabase = Depends(get_supabase_admin)
 ):
     """Register a new user"""
     try:
         # Check if user already exists
-        existing = supabase.table("users").select("*").eq("email", user.email).execute()
+        existing = await supabase.table("users").select("*").eq("email", user.email).execute()
         if existing.data:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -24,7 +24,7 @@ async def register(
         
         # Create user
         user_id = str(uuid.uuid4())
-        hashed_password = get_password_hash(user.password)
+        hashed_password = await get_password_hash(user.password)
         
         user_data = {
             "id": user_id,
@@ -35,7 +35,7 @@ async def register(
             "role": user.role.value,
         }
         
-        result = supabase.table("users").insert(user_data).execute()
+        result = await supabase.table("users").insert(user_data).execute()
         
         if not result.data:
             raise HTTPException(
@@ -44,6 +44,7 @@ async def register(
             )
         
         created_user = result.data[0]
+        await response_cache.invalidate("users")
         
         # Create access token
         access_token = create_access_token(
@@ -73,12 +74,12 @@ async def register(
 @router.post("/login", response_model=Token)
 async def login(
     credentials: UserLogin,
-    supabase: Client = Depends(get_supabase)
+    supabase: AsyncDatabase = Depends(get_supabase)
 ):
     """Login user and return access token"""
     try:
         # Get user by email
-        result = supabase.table("users").select("*").eq("email", credentials.email).execute()
+        result = await supabase.table("users").select("*").eq("email", credentials.email).execute()
         
         if not result.data:
             raise HTTPException(
@@ -89,14 +90,14 @@ async def login(
         user = result.data[0]
         
         # Verify password
-        if not verify_password(credentials.password, user["password_hash"]):
+        if not await verify_password(credentials.password, user["password_hash"]):
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Incorrect email or password"
             )
         
         # Update last login
-        supabase.table("users").update({
+        await supabase.table("users").update({
             "last_login": "now()"
         }).eq("id", user["id"]).execute()
         
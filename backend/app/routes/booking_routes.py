@@ -1,45 +1,133 @@
-from fastapi import APIRouter, HTTPException, status, Depends, Query
+from fastapi import APIRouter, HTTPException, status, Depends, Query, Request, Response
 from typing import List, Optional
-from schemas import BookingCreate, BookingUpdate, BookingResponse, BookingStatus
-from database import get_supabase
+from schemas import (
+    BookingCreate, BookingUpdate, BookingResponse, BookingStatus, Page, BulkResult, BulkRowResult,
+    BookingSeriesCreate, BookingSeriesResponse,
+)
+from database import get_supabase, AsyncDatabase
 from auth import get_current_user, require_staff_or_admin
-from supabase import Client #type: ignore
+from counters import booking_counters
+from availability import availability_index, parse_duration, parse_time, DEFAULT_DURATION_MINUTES
+from pagination import PageParams, iter_keyset
+from export import ExportFormat, export_response
+from bulk import csv_rows, iter_chunks, validate_row
+from recurrence import series_index, occurrence_id, parse_occurrence_id, rule_dates
+from revenue import completion_price, refresh_revenue, service_catalog
+from stock import held_items, refresh_items
+from response_cache import response_cache
+from etag import row_etag, not_modified, if_match_version, missing_or_modified
+from config import settings
 import uuid
-from datetime import datetime
+from datetime import datetime, date, timedelta
 
 router = APIRouter(prefix="/bookings", tags=["Bookings"])
 
+BOOKING_ORDER = [("date", True), ("time", True)]
+ASSIGNED_STAFF_EMBED = {"assigned_staff_name": "assigned_staff:users!bookings_assigned_staff_id_fkey(username)"}
+OCCURRENCE_FIELDS = ("series_id", "occurrence_date")
+SERIES_ORDER = [("created_at", True)]
+# Fields the availability index and counters depend on
+SCHEDULE_FIELDS = {"service", "date", "time", "duration", "location", "assigned_staff_id", "status"}
+# Statuses that free the stock a booking holds (completing consumes it)
+RELEASING_STATUSES = {BookingStatus.CANCELLED.value, BookingStatus.NO_SHOW.value}
+
+def format_booking(booking: dict) -> dict:
+    """Flatten the embedded assigned staff into ``assigned_staff_name``"""
+    staff_data = booking.get("assigned_staff", {})
+    
+    formatted = {
+        **booking,
+        "assigned_staff_name": staff_data.get("username") if staff_data else None
+    }
+    
+    formatted.pop("assigned_staff", None)
+    return formatted
+
+def booking_etag(booking: dict) -> str:
+    """ETag of a formatted booking; the staff name comes from ``users``"""
+    return row_etag(booking, booking.get("assigned_staff_name"))
+
+async def attach_staff_names(supabase: AsyncDatabase, occurrences: List[dict]):
+    """Fill ``assigned_staff_name`` on series occurrences with one lookup"""
+    staff_ids = {o["assigned_staff_id"] for o in occurrences if o.get("assigned_staff_id")}
+    names = {}
+    if staff_ids:
+        result = await supabase.table("users").select("id,username").in_("id", list(staff_ids)).execute()
+        names = {user["id"]: user["username"] for user in result.data}
+    for occurrence in occurrences:
+        occurrence["assigned_staff_name"] = names.get(occurrence.get("assigned_staff_id"))
+
+def series_window(date_from: Optional[str], date_to: Optional[str]) -> tuple:
+    """Dates to expand series over; an open end spans ``SERIES_WINDOW_DAYS``"""
+    try:
+        start = date.fromisoformat(date_from) if date_from else None
+        end = date.fromisoformat(date_to) if date_to else None
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid date")
+    window = timedelta(days=settings.SERIES_WINDOW_DAYS)
+    if start is None:
+        start = end - window if end else date.today()
+    return start, end or start + window
+
+def booking_cursor_key(key: list) -> list:
+    """Database form of a bookings cursor that may end on an occurrence.
+
+    An occurrence id is its series id plus ``:date``, so it sorts right
+    after the series id, and no stored booking has that id: a strict
+    comparison against the series id selects the same bookings as one
+    against the occurrence id, in either direction, and is a valid uuid.
+    """
+    occurrence = parse_occurrence_id(str(key[-1]))
+    return key[:-1] + [occurrence[0]] if occurrence else key
+
+def new_booking_row(booking: BookingCreate, created_by: str) -> dict:
+    """Build the row inserted for a new pending booking"""
+    return {
+        "id": str(uuid.uuid4()),
+        "customer_name": booking.customer_name,
+        "customer_email": booking.customer_email,
+        "customer_phone": booking.customer_phone,
+        "service": booking.service,
+        "date": str(booking.date),
+        "time": booking.time,
+        "duration": booking.duration,
+        "location": booking.location,
+        "status": BookingStatus.PENDING.value,
+        "notes": booking.notes,
+        "created_by": created_by,
+    }
+
 @router.post("", response_model=BookingResponse, status_code=status.HTTP_201_CREATED)
 async def create_booking(
     booking: BookingCreate,
     current_user: dict = Depends(get_current_user),
-    supabase: Client = Depends(get_supabase)
+    supabase: AsyncDatabase = Depends(get_supabase)
 ):
     """Create a new booking"""
     try:
-        booking_data = {
-            "id": str(uuid.uuid4()),
-            "customer_name": booking.customer_name,
-            "customer_email": booking.customer_email,
-            "customer_phone": booking.customer_phone,
-            "service": booking.service,
-            "date": str(booking.date),
-            "time": booking.time,
-            "duration": booking.duration,
-            "location": booking.location,
-            "status": BookingStatus.PENDING.value,
-            "notes": booking.notes,
-            "created_by": current_user["id"],
-        }
+        booking_data = new_booking_row(booking, current_user["id"])
         
-        result = supabase.table("bookings").insert(booking_data).execute()
+        # Claim the slot before writing so concurrent requests can't double-book
+        await availability_index.ensure_loaded(supabase)
+        conflict = availability_index.reserve(booking_data)
+        if conflict:
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=conflict)
+        
+        try:
+            result = await supabase.table("bookings").insert(booking_data).execute()
+        except Exception:
+            availability_index.remove(booking_data)
+            raise
         
         if not result.data:
+            availability_index.remove(booking_data)
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail="Failed to create booking"
             )
         
+        booking_counters.add(result.data[0])
+        await response_cache.invalidate("bookings")
         return result.data[0]
         
     except HTTPException:
@@ -50,20 +138,120 @@ async def create_booking(
             detail=f"Failed to create booking: {str(e)}"
         )
 
-@router.get("", response_model=List[BookingResponse])
+async def insert_booking_chunk(supabase: AsyncDatabase, pending: List[tuple]) -> List[BulkRowResult]:
+    """Insert validated ``(index, row)`` pairs in one statement.
+    
+    The rows' slots are already reserved; they are released again for any
+    row that was not written.
+    """
+    try:
+        inserted = (await supabase.table("bookings").insert([row for _, row in pending]).execute()).data
+        error = "Insert failed"
+    except Exception as e:
+        inserted, error = [], f"Insert failed: {str(e)}"
+    
+    created = {booking["id"] for booking in inserted}
+    for booking in inserted:
+        booking_counters.add(booking)
+    if inserted:
+        await response_cache.invalidate("bookings")
+    
+    results = []
+    for index, row in pending:
+        if row["id"] in created:
+            results.append(BulkRowResult(index=index, status="created", id=row["id"]))
+        else:
+            availability_index.remove(row)
+            results.append(BulkRowResult(index=index, status="error", errors=[error]))
+    return results
+
+@router.post("/bulk", response_model=BulkResult)
+async def bulk_create_bookings(
+    request: Request,
+    current_user: dict = Depends(require_staff_or_admin),
+    supabase: AsyncDatabase = Depends(get_supabase)
+):
+    """Create many bookings from a JSON array or a CSV upload.
+    
+    Rows are validated and inserted in chunks of ``BULK_INSERT_CHUNK_SIZE``.
+    Invalid or double-booked rows are reported without stopping the import.
+    """
+    if request.headers.get("content-type", "").startswith("text/csv"):
+        rows = csv_rows(request.stream())
+    else:
+        try:
+            rows = await request.json()
+        except ValueError:
+            rows = None
+        if not isinstance(rows, list):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Expected a JSON array of bookings or a text/csv body"
+            )
+        if len(rows) > settings.BULK_IMPORT_MAX_ROWS:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"At most {settings.BULK_IMPORT_MAX_ROWS} bookings per import"
+            )
+    
+    try:
+        await availability_index.ensure_loaded(supabase)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to import bookings: {str(e)}"
+        )
+    
+    results = []
+    index = 0
+    async for chunk in iter_chunks(rows, settings.BULK_INSERT_CHUNK_SIZE):
+        # A streamed CSV can't be measured up front; stop reading at the limit
+        truncated = index + len(chunk) > settings.BULK_IMPORT_MAX_ROWS
+        chunk = chunk[:settings.BULK_IMPORT_MAX_ROWS - index]
+        
+        pending = []  # (index, row) pairs that passed validation
+        for row in chunk:
+            booking, errors = validate_row(BookingCreate, row)
+            if booking is not None:
+                booking_data = new_booking_row(booking, current_user["id"])
+                conflict = availability_index.reserve(booking_data)
+                if conflict:
+                    errors = [conflict]
+                else:
+                    pending.append((index, booking_data))
+            if errors:
+                results.append(BulkRowResult(index=index, status="error", errors=errors))
+            index += 1
+        
+        if pending:
+            results += await insert_booking_chunk(supabase, pending)
+        
+        if truncated:
+            results.append(BulkRowResult(
+                index=index,
+                status="error",
+                errors=[f"Import stopped after {settings.BULK_IMPORT_MAX_ROWS} rows"]
+            ))
+            break
+    
+    results.sort(key=lambda r: r.index)
+    created_count = sum(1 for r in results if r.status == "created")
+    return BulkResult(created=created_count, failed=len(results) - created_count, results=results)
+
+@router.get("", response_model=Page[BookingResponse])
 async def get_bookings(
     status_filter: Optional[BookingStatus] = Query(None, alias="status"),
     date_from: Optional[str] = Query(None, alias="from"),
     date_to: Optional[str] = Query(None, alias="to"),
+    page: PageParams = Depends(),
     current_user: dict = Depends(get_current_user),
-    supabase: Client = Depends(get_supabase)
+    supabase: AsyncDatabase = Depends(get_supabase)
 ):
-    """Get all bookings with optional filters"""
+    """Get a page of bookings with optional filters"""
     try:
-        query = supabase.table("bookings").select("""
-            *,
-            assigned_staff:users!bookings_assigned_staff_id_fkey(username)
-        """)
+        query = supabase.table("bookings").select(
+            page.select(BookingResponse, BOOKING_ORDER, computed=ASSIGNED_STAFF_EMBED, virtual=OCCURRENCE_FIELDS)
+        )
         
         # Apply filters
         if status_filter:
@@ -75,41 +263,329 @@ async def get_bookings(
         if date_to:
             query = query.lte("date", date_to)
         
-        # Order by date
-        query = query.order("date", desc=True).order("time", desc=True)
+        # Order by date, newest first
+        result = await page.apply(query, BOOKING_ORDER, db_key=booking_cursor_key).execute()
         
-        result = query.execute()
+        bookings = [format_booking(booking) for booking in result.data]
         
-        # Format response
-        bookings = []
-        for booking in result.data:
-            staff_data = booking.get("assigned_staff", {})
-            
-            formatted = {
-                **booking,
-                "assigned_staff_name": staff_data.get("username") if staff_data else None
-            }
-            
-            formatted.pop("assigned_staff", None)
-            bookings.append(formatted)
+        # Recurring series are expanded only when a date range is asked
+        # for; open listings would otherwise fill with future occurrences
+        occurrences = []
+        if date_from or date_to:
+            await series_index.ensure_loaded(supabase)
+            occurrences = [
+                o for o in series_index.occurrences(*series_window(date_from, date_to))
+                if not status_filter or o["status"] == status_filter.value
+            ]
+        if occurrences:
+            await attach_staff_names(supabase, occurrences)
+            bookings = page.merge(bookings, occurrences, BOOKING_ORDER)
         
-        return bookings
+        return page.respond(bookings, BOOKING_ORDER)
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to fetch bookings: {str(e)}"
         )
 
+@router.get("/export")
+async def export_bookings(
+    format: ExportFormat = ExportFormat.NDJSON,
+    status_filter: Optional[BookingStatus] = Query(None, alias="status"),
+    date_from: Optional[str] = Query(None, alias="from"),
+    date_to: Optional[str] = Query(None, alias="to"),
+    current_user: dict = Depends(require_staff_or_admin),
+    supabase: AsyncDatabase = Depends(get_supabase)
+):
+    """Stream bookings as NDJSON or CSV"""
+    def make_query():
+        query = supabase.table("bookings").select(
+            ",".join(["*", *ASSIGNED_STAFF_EMBED.values()])
+        )
+        if status_filter:
+            query = query.eq("status", status_filter.value)
+        if date_from:
+            query = query.gte("date", date_from)
+        if date_to:
+            query = query.lte("date", date_to)
+        return query
+    
+    async def rows():
+        async for booking in iter_keyset(make_query, BOOKING_ORDER, settings.EXPORT_PAGE_SIZE):
+            yield format_booking(booking)
+    
+    return export_response(rows(), format, list(BookingResponse.model_fields), "bookings")
+
+@router.get("/availability")
+async def get_availability(
+    day: date = Query(..., alias="date"),
+    service: Optional[str] = None,
+    duration: Optional[str] = None,
+    location: Optional[str] = None,
+    current_user: dict = Depends(get_current_user),
+    supabase: AsyncDatabase = Depends(get_supabase)
+):
+    """Get free slots for a day and the staff available at each.
+    
+    The slot length is ``duration`` if given, otherwise the last seen
+    duration for ``service``.
+    """
+    if duration:
+        minutes = parse_duration(duration)
+        if not minutes:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid duration")
+    
+    try:
+        await availability_index.ensure_loaded(supabase)
+        staff = (await supabase.table("users").select("id,username")
+                 .eq("role", "staff").eq("status", "active").execute()).data
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to fetch availability: {str(e)}"
+        )
+    
+    if not duration:
+        minutes = availability_index.service_durations.get(service, DEFAULT_DURATION_MINUTES)
+    
+    names = {member["id"]: member["username"] for member in staff}
+    slots = availability_index.free_slots(
+        str(day),
+        minutes,
+        list(names),
+        parse_time(settings.BUSINESS_HOURS_START),
+        parse_time(settings.BUSINESS_HOURS_END),
+        settings.SLOT_INTERVAL_MINUTES,
+        location=location,
+    )
+    
+    return {
+        "date": str(day),
+        "service": service,
+        "duration_minutes": minutes,
+        "slots": [
+            {
+                "time": slot["time"],
+                "staff": [{"id": s, "username": names[s]} for s in slot["staff_ids"]],
+            }
+            for slot in slots
+        ],
+    }
+
+@router.post("/series", response_model=BookingSeriesResponse, status_code=status.HTTP_201_CREATED)
+async def create_booking_series(
+    series: BookingSeriesCreate,
+    current_user: dict = Depends(get_current_user),
+    supabase: AsyncDatabase = Depends(get_supabase)
+):
+    """Create a recurring booking series"""
+    try:
+        series_data = {
+            "id": str(uuid.uuid4()),
+            "customer_name": series.customer_name,
+            "customer_email": series.customer_email,
+            "customer_phone": series.customer_phone,
+            "service": series.service,
+            "starts_on": str(series.date),
+            "time": series.time,
+            "duration": series.duration,
+            "location": series.location,
+            "status": BookingStatus.PENDING.value,
+            "assigned_staff_id": series.assigned_staff_id,
+            "notes": series.notes,
+            "rule": series.recurrence.model_dump(mode="json", exclude_none=True),
+            "created_by": current_user["id"],
+        }
+        
+        # Check the first SERIES_WINDOW_DAYS of occurrences for double-booking
+        await availability_index.ensure_loaded(supabase)
+        horizon = series.date + timedelta(days=settings.SERIES_WINDOW_DAYS)
+        for day in rule_dates(series_data["rule"], series.date, series.date, horizon):
+            occurrence = {**series_data, "id": occurrence_id(series_data["id"], day), "date": day.isoformat()}
+            conflict = availability_index.conflict(occurrence)
+            if conflict:
+                raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=f"{day}: {conflict}")
+        
+        series_index.add_series(series_data)
+        try:
+            result = await supabase.table("booking_series").insert(series_data).execute()
+        except Exception:
+            series_index.remove_series(series_data["id"])
+            raise
+        
+        if not result.data:
+            series_index.remove_series(series_data["id"])
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Failed to create booking series"
+            )
+        
+        series_index.add_series(result.data[0])
+        await response_cache.invalidate("bookings")
+        return result.data[0]
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to create booking series: {str(e)}"
+        )
+
+@router.get("/series", response_model=Page[BookingSeriesResponse])
+async def get_booking_series(
+    page: PageParams = Depends(),
+    current_user: dict = Depends(get_current_user),
+    supabase: AsyncDatabase = Depends(get_supabase)
+):
+    """Get a page of recurring booking series"""
+    try:
+        query = supabase.table("booking_series").select(page.select(BookingSeriesResponse, SERIES_ORDER))
+        result = await page.apply(query, SERIES_ORDER).execute()
+        return page.respond(result.data, SERIES_ORDER)
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to fetch booking series: {str(e)}"
+        )
+
+@router.delete("/series/{series_id}")
+async def delete_booking_series(
+    series_id: str,
+    current_user: dict = Depends(require_staff_or_admin),
+    supabase: AsyncDatabase = Depends(get_supabase)
+):
+    """Delete a recurring booking series and all its occurrences"""
+    try:
+        # Completed occurrences take their revenue with them
+        completed = []
+        for day in series_index.exceptions.get(series_id, {}):
+            occurrence = series_index.occurrence(series_id, day)
+            if occurrence and occurrence.get("status") == BookingStatus.COMPLETED.value:
+                completed.append(occurrence)
+        
+        result = await supabase.table("booking_series").delete().eq("id", series_id).execute()
+        
+        if not result.data:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Booking series not found"
+            )
+        
+        series_index.remove_series(series_id)
+        await refresh_revenue(supabase, *completed)
+        await response_cache.invalidate("bookings")
+        return {"message": "Booking series deleted successfully"}
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to delete booking series: {str(e)}"
+        )
+
+async def find_occurrence(supabase: AsyncDatabase, series_id: str, day: date) -> dict:
+    await availability_index.ensure_loaded(supabase)
+    occurrence = series_index.occurrence(series_id, day)
+    if occurrence is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Booking not found"
+        )
+    return occurrence
+
+async def save_occurrence_exception(supabase: AsyncDatabase, series_id: str, day: date, cancelled: bool, overrides: dict):
+    """Store a changed or cancelled occurrence.
+    
+    The exception is applied in memory before the write, like a slot
+    reservation, and rolled back if the write fails.
+    """
+    previous = series_index.exceptions.get(series_id, {}).get(day)
+    exception = {
+        "series_id": series_id,
+        "occurrence_date": day.isoformat(),
+        "cancelled": cancelled,
+        "overrides": overrides,
+        "updated_at": datetime.utcnow().isoformat(),
+    }
+    series_index.set_exception(exception)
+    try:
+        result = await supabase.table("booking_series_exceptions").upsert(
+            exception, on_conflict="series_id,occurrence_date"
+        ).execute()
+    except Exception:
+        if previous:
+            series_index.set_exception(previous)
+        else:
+            series_index.remove_exception(series_id, day)
+        raise
+    if result.data:
+        series_index.set_exception(result.data[0])
+    await response_cache.invalidate("bookings")
+
+async def update_occurrence(
+    supabase: AsyncDatabase, series_id: str, day: date, update_data: BookingUpdate, expected: Optional[str] = None
+) -> dict:
+    existing = await find_occurrence(supabase, series_id, day)
+    if expected and existing.get("updated_at") != expected:
+        raise HTTPException(
+            status_code=status.HTTP_412_PRECONDITION_FAILED,
+            detail="Resource has been modified"
+        )
+    
+    update_dict = update_data.model_dump(exclude_unset=True)
+    if "date" in update_dict and update_dict["date"]:
+        update_dict["date"] = str(update_dict["date"])
+    if "status" in update_dict and update_dict["status"]:
+        update_dict["status"] = update_dict["status"].value
+    
+    merged = {**existing, **update_dict}
+    conflict = availability_index.conflict(merged, ignore_id=existing["id"])
+    if conflict:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=conflict)
+    await service_catalog.ensure_loaded(supabase)
+    update_dict.update(completion_price(existing, merged))
+    
+    previous = series_index.exceptions.get(series_id, {}).get(day) or {}
+    overrides = {**(previous.get("overrides") or {}), **update_dict}
+    await save_occurrence_exception(supabase, series_id, day, False, overrides)
+    
+    occurrence = series_index.occurrence(series_id, day)
+    await refresh_revenue(supabase, existing, occurrence)
+    if occurrence["status"] == BookingStatus.COMPLETED.value and existing["status"] != occurrence["status"]:
+        await refresh_items(supabase, [], occurrence["service"])
+    await attach_staff_names(supabase, [occurrence])
+    return occurrence
+
 @router.get("/{booking_id}", response_model=BookingResponse)
 async def get_booking(
     booking_id: str,
+    request: Request,
+    response: Response,
     current_user: dict = Depends(get_current_user),
-    supabase: Client = Depends(get_supabase)
+    supabase: AsyncDatabase = Depends(get_supabase)
 ):
     """Get a specific booking"""
     try:
-        result = supabase.table("bookings").select("""
+        occurrence = parse_occurrence_id(booking_id)
+        if occurrence:
+            booking = await find_occurrence(supabase, *occurrence)
+            await attach_staff_names(supabase, [booking])
+            etag = booking_etag(booking)
+            cached = not_modified(request, etag)
+            if cached:
+                return cached
+            response.headers["ETag"] = etag
+            return booking
+        
+        result = await supabase.table("bookings").select("""
             *,
             assigned_staff:users!bookings_assigned_staff_id_fkey(username)
         """).eq("id", booking_id).execute()
@@ -120,17 +596,13 @@ async def get_booking(
                 detail="Booking not found"
             )
         
-        booking = result.data[0]
-        staff_data = booking.get("assigned_staff", {})
-        
-        formatted = {
-            **booking,
-            "assigned_staff_name": staff_data.get("username") if staff_data else None
-        }
-        
-        formatted.pop("assigned_staff", None)
-        
-        return formatted
+        booking = format_booking(result.data[0])
+        etag = booking_etag(booking)
+        cached = not_modified(request, etag)
+        if cached:
+            return cached
+        response.headers["ETag"] = etag
+        return booking
         
     except HTTPException:
         raise
@@ -144,19 +616,25 @@ async def get_booking(
 async def update_booking(
     booking_id: str,
     update_data: BookingUpdate,
+    request: Request,
+    response: Response,
     current_user: dict = Depends(require_staff_or_admin),
-    supabase: Client = Depends(get_supabase)
+    supabase: AsyncDatabase = Depends(get_supabase)
 ):
-    """Update a booking"""
+    """Update a booking.
+    
+    With ``If-Match`` the write only applies if the booking is unchanged
+    since that ETag was issued (412 otherwise).
+    """
     try:
-        # Get existing booking
-        existing = supabase.table("bookings").select("*").eq("id", booking_id).execute()
+        expected = if_match_version(request.headers.get("if-match"), booking_id)
         
-        if not existing.data:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Booking not found"
-            )
+        # Changes to one occurrence of a series are stored as an exception
+        occurrence = parse_occurrence_id(booking_id)
+        if occurrence:
+            updated = await update_occurrence(supabase, *occurrence, update_data, expected)
+            response.headers["ETag"] = booking_etag(updated)
+            return updated
         
         # Prepare update data
         update_dict = update_data.model_dump(exclude_unset=True)
@@ -170,16 +648,81 @@ async def update_booking(
             update_dict["status"] = update_dict["status"].value
         
         update_dict["updated_at"] = datetime.utcnow().isoformat()
+        update_dict["updated_by"] = current_user["id"]
+        
+        # Edits that leave the schedule and counters alone don't need the
+        # current row: If-Match becomes a single conditional UPDATE
+        if expected and not SCHEDULE_FIELDS & update_dict.keys():
+            result = await (
+                supabase.table("bookings").update(update_dict)
+                .eq("id", booking_id).eq("updated_at", expected).execute()
+            )
+            if not result.data:
+                raise await missing_or_modified(supabase, "bookings", booking_id, "Booking not found")
+            await response_cache.invalidate("bookings")
+            response.headers["ETag"] = booking_etag(result.data[0])
+            return result.data[0]
+        
+        # Get existing booking
+        existing = await supabase.table("bookings").select("*").eq("id", booking_id).execute()
+        
+        if not existing.data:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Booking not found"
+            )
         
-        # Update booking
-        result = supabase.table("bookings").update(update_dict).eq("id", booking_id).execute()
+        if expected and existing.data[0].get("updated_at") != expected:
+            raise HTTPException(
+                status_code=status.HTTP_412_PRECONDITION_FAILED,
+                detail="Resource has been modified"
+            )
+        
+        # Reject staff or location double-booking
+        merged = {**existing.data[0], **update_dict}
+        # Completing a booking fixes its price from the catalog
+        await service_catalog.ensure_loaded(supabase)
+        update_dict.update(completion_price(existing.data[0], merged))
+        await availability_index.ensure_loaded(supabase)
+        conflict = availability_index.reserve(merged, ignore_id=booking_id)
+        if conflict:
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=conflict)
+        
+        # Status changes consume or free stock in the database; note what the
+        # booking held so the alerts can be refreshed afterwards
+        new_status = update_dict.get("status")
+        moves_stock = new_status != existing.data[0]["status"] and (
+            new_status == BookingStatus.COMPLETED.value or new_status in RELEASING_STATUSES
+        )
+        held = await held_items(supabase, booking_id) if moves_stock else []
+        
+        # Update booking, still guarded by the version read above
+        query = supabase.table("bookings").update(update_dict).eq("id", booking_id)
+        if expected:
+            query = query.eq("updated_at", expected)
+        try:
+            result = await query.execute()
+        except Exception:
+            availability_index.remove(merged)
+            raise
         
         if not result.data:
+            availability_index.remove(merged)
+            if expected:
+                raise await missing_or_modified(supabase, "bookings", booking_id, "Booking not found")
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail="Failed to update booking"
             )
         
+        availability_index.remove(existing.data[0])
+        booking_counters.replace(existing.data[0], result.data[0])
+        await refresh_revenue(supabase, existing.data[0], result.data[0])
+        if moves_stock:
+            completed = new_status == BookingStatus.COMPLETED.value
+            await refresh_items(supabase, held, result.data[0]["service"] if completed else None)
+        await response_cache.invalidate("bookings")
+        response.headers["ETag"] = booking_etag(result.data[0])
         return result.data[0]
         
     except HTTPException:
@@ -194,11 +737,20 @@ async def update_booking(
 async def delete_booking(
     booking_id: str,
     current_user: dict = Depends(require_staff_or_admin),
-    supabase: Client = Depends(get_supabase)
+    supabase: AsyncDatabase = Depends(get_supabase)
 ):
     """Delete a booking"""
     try:
-        result = supabase.table("bookings").delete().eq("id", booking_id).execute()
+        occurrence = parse_occurrence_id(booking_id)
+        if occurrence:
+            existing = await find_occurrence(supabase, *occurrence)
+            await save_occurrence_exception(supabase, *occurrence, True, {})
+            await refresh_revenue(supabase, existing)
+            return {"message": "Booking deleted successfully"}
+        
+        # The delete trigger frees any stock the booking holds
+        held = await held_items(supabase, booking_id)
+        result = await supabase.table("bookings").delete().eq("id", booking_id).execute()
         
         if not result.data:
             raise HTTPException(
@@ -206,6 +758,13 @@ async def delete_booking(
                 detail="Booking not found"
             )
         
+        for booking in result.data:
+            booking_counters.remove(booking)
+            availability_index.remove(booking)
+            await refresh_revenue(supabase, booking)
+        await refresh_items(supabase, held)
+        await response_cache.invalidate("bookings")
+        
         return {"message": "Booking deleted successfully"}
         
     except HTTPException:
@@ -219,27 +778,19 @@ async def delete_booking(
 @router.get("/stats/summary")
 async def get_booking_stats(
     current_user: dict = Depends(require_staff_or_admin),
-    supabase: Client = Depends(get_supabase)
+    supabase: AsyncDatabase = Depends(get_supabase)
 ):
     """Get booking statistics"""
     try:
-        # Get all bookings
-        result = supabase.table("bookings").select("*").execute()
-        bookings = result.data
-        
-        # Calculate stats
-        total = len(bookings)
-        pending = len([b for b in bookings if b["status"] == "pending"])
-        confirmed = len([b for b in bookings if b["status"] == "confirmed"])
-        completed = len([b for b in bookings if b["status"] == "completed"])
-        cancelled = len([b for b in bookings if b["status"] == "cancelled"])
+        await booking_counters.ensure_loaded(supabase)
+        by_status = booking_counters.by_status
         
         return {
-            "total": total,
-            "pending": pending,
-            "confirmed": confirmed,
-            "completed": completed,
-            "cancelled": cancelled
+            "total": booking_counters.total,
+            "pending": by_status["pending"],
+            "confirmed": by_status["confirmed"],
+            "completed": by_status["completed"],
+            "cancelled": by_status["cancelled"]
         }
         
     except Exception as e:
@@ -1,19 +1,26 @@
-from fastapi import APIRouter, HTTPException, status, Depends, Query
+from fastapi import APIRouter, HTTPException, status, Depends, Query, Request, Response
 from typing import List, Optional
-from  schemas import ContactCreate, ContactUpdate, ContactResponse, ContactStatus
-from database import get_supabase
+from  schemas import ContactCreate, ContactUpdate, ContactResponse, ContactSearchResult, ContactStatus, Page
+from database import get_supabase, AsyncDatabase
 from  auth import get_current_user, require_staff_or_admin
-from supabase import Client #type: ignore
+from pagination import PageParams, iter_keyset
+from export import ExportFormat, export_response
+from response_cache import response_cache
+from etag import row_etag, not_modified, if_match_version, missing_or_modified
+from config import settings
+from contact_search import contact_search
 import uuid
 from datetime import datetime
 
 router = APIRouter(prefix="/contacts", tags=["Contacts"])
 
+CONTACT_ORDER = [("created_at", True)]
+
 @router.post("", response_model=ContactResponse, status_code=status.HTTP_201_CREATED)
 async def create_contact(
     contact: ContactCreate,
     current_user: dict = Depends(require_staff_or_admin),
-    supabase: Client = Depends(get_supabase)
+    supabase: AsyncDatabase = Depends(get_supabase)
 ):
     """Create a new contact"""
     try:
@@ -25,42 +32,91 @@ async def create_contact(
             "total_revenue": 0.0,
         }
         
-        result = supabase.table("contacts").insert(contact_data).execute()
+        result = await supabase.table("contacts").insert(contact_data).execute()
+        await response_cache.invalidate("contacts")
+        if result.data:
+            contact_search.add(result.data[0])
         return result.data[0] if result.data else None
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.get("", response_model=List[ContactResponse])
+@router.get("", response_model=Page[ContactResponse])
+@response_cache.cached("contacts")
 async def get_contacts(
     status_filter: Optional[ContactStatus] = None,
+    page: PageParams = Depends(),
     current_user: dict = Depends(require_staff_or_admin),
-    supabase: Client = Depends(get_supabase)
+    supabase: AsyncDatabase = Depends(get_supabase)
 ):
-    """Get all contacts"""
-    query = supabase.table("contacts").select("*")
+    """Get a page of contacts"""
+    query = supabase.table("contacts").select(page.select(ContactResponse, CONTACT_ORDER))
     if status_filter:
         query = query.eq("status", status_filter.value)
-    return query.order("created_at", desc=True).execute().data
+    result = await page.apply(query, CONTACT_ORDER).execute()
+    return page.respond(result.data, CONTACT_ORDER)
+
+@router.get("/export")
+async def export_contacts(
+    format: ExportFormat = ExportFormat.NDJSON,
+    status_filter: Optional[ContactStatus] = None,
+    current_user: dict = Depends(require_staff_or_admin),
+    supabase: AsyncDatabase = Depends(get_supabase)
+):
+    """Stream contacts as NDJSON or CSV"""
+    def make_query():
+        query = supabase.table("contacts").select("*")
+        if status_filter:
+            query = query.eq("status", status_filter.value)
+        return query
+    
+    rows = iter_keyset(make_query, CONTACT_ORDER, settings.EXPORT_PAGE_SIZE)
+    return export_response(rows, format, list(ContactResponse.model_fields), "contacts")
+
+@router.get("/search", response_model=List[ContactSearchResult])
+async def search_contacts(
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(10, ge=1, le=50),
+    current_user: dict = Depends(require_staff_or_admin),
+    supabase: AsyncDatabase = Depends(get_supabase)
+):
+    """Best matches for a name, email or phone fragment"""
+    await contact_search.ensure_loaded(supabase)
+    matches = contact_search.search(q, limit)
+    if not matches:
+        return []
+    result = await supabase.table("contacts").select("*").in_("id", [match["id"] for match in matches]).execute()
+    rows = {row["id"]: row for row in result.data or []}
+    # Contacts deleted by another worker since the index was built are skipped
+    return [{**rows[match["id"]], "score": match["score"]} for match in matches if match["id"] in rows]
 
 @router.get("/{contact_id}", response_model=ContactResponse)
 async def get_contact(
     contact_id: str,
+    request: Request,
+    response: Response,
     current_user: dict = Depends(require_staff_or_admin),
-    supabase: Client = Depends(get_supabase)
+    supabase: AsyncDatabase = Depends(get_supabase)
 ):
     """Get a specific contact"""
-    result = supabase.table("contacts").select("*").eq("id", contact_id).execute()
+    result = await supabase.table("contacts").select("*").eq("id", contact_id).execute()
     if not result.data:
         raise HTTPException(status_code=404, detail="Contact not found")
+    etag = row_etag(result.data[0])
+    cached = not_modified(request, etag)
+    if cached:
+        return cached
+    response.headers["ETag"] = etag
     return result.data[0]
 
 @router.patch("/{contact_id}", response_model=ContactResponse)
 async def update_contact(
     contact_id: str,
     update_data: ContactUpdate,
+    request: Request,
+    response: Response,
     current_user: dict = Depends(require_staff_or_admin),
-    supabase: Client = Depends(get_supabase)
+    supabase: AsyncDatabase = Depends(get_supabase)
 ):
     """Update a contact"""
     update_dict = update_data.model_dump(exclude_unset=True)
@@ -68,19 +124,30 @@ async def update_contact(
         update_dict["status"] = update_dict["status"].value
     update_dict["updated_at"] = datetime.utcnow().isoformat()
     
-    result = supabase.table("contacts").update(update_dict).eq("id", contact_id).execute()
+    query = supabase.table("contacts").update(update_dict).eq("id", contact_id)
+    expected = if_match_version(request.headers.get("if-match"), contact_id)
+    if expected:
+        query = query.eq("updated_at", expected)
+    result = await query.execute()
     if not result.data:
+        if expected:
+            raise await missing_or_modified(supabase, "contacts", contact_id, "Contact not found")
         raise HTTPException(status_code=404, detail="Contact not found")
+    await response_cache.invalidate("contacts")
+    contact_search.add(result.data[0])
+    response.headers["ETag"] = row_etag(result.data[0])
     return result.data[0]
 
 @router.delete("/{contact_id}")
 async def delete_contact(
     contact_id: str,
     current_user: dict = Depends(require_staff_or_admin),
-    supabase: Client = Depends(get_supabase)
+    supabase: AsyncDatabase = Depends(get_supabase)
 ):
     """Delete a contact"""
-    result = supabase.table("contacts").delete().eq("id", contact_id).execute()
+    result = await supabase.table("contacts").delete().eq("id", contact_id).execute()
     if not result.data:
         raise HTTPException(status_code=404, detail="Contact not found")
+    await response_cache.invalidate("contacts")
+    contact_search.remove(contact_id)
     return {"message": "Contact deleted successfully"}
@@ -1,19 +1,22 @@
 from fastapi import APIRouter, HTTPException, Depends
-from typing import List, Optional
-from schemas import FormCreate, FormUpdate, FormResponse, FormStatus
-from database import get_supabase
+from typing import Optional
+from schemas import FormCreate, FormUpdate, FormResponse, FormStatus, Page
+from database import get_supabase, AsyncDatabase
 from auth import get_current_user, require_staff_or_admin
-from supabase import Client #type: ignore
+from pagination import PageParams
+from response_cache import response_cache
 import uuid
 from datetime import datetime
 
 router = APIRouter(prefix="/forms", tags=["Forms"])
 
+FORM_ORDER = [("created_at", True)]
+
 @router.post("", response_model=FormResponse, status_code=201)
 async def create_form(
     form: FormCreate,
     current_user: dict = Depends(require_staff_or_admin),
-    supabase: Client = Depends(get_supabase)
+    supabase: AsyncDatabase = Depends(get_supabase)
 ):
     form_data = {
         "id": str(uuid.uuid4()),
@@ -27,28 +30,32 @@ async def create_form(
         "created_by": current_user["id"],
     }
 
-    result = supabase.table("forms").insert(form_data).execute()
+    result = await supabase.table("forms").insert(form_data).execute()
+    await response_cache.invalidate("forms")
 
     return result.data[0]
 
-@router.get("", response_model=List[FormResponse])
+@router.get("", response_model=Page[FormResponse])
+@response_cache.cached("forms")
 async def get_forms(
     status_filter: Optional[FormStatus] = None,
+    page: PageParams = Depends(),
     current_user: dict = Depends(require_staff_or_admin),
-    supabase: Client = Depends(get_supabase)
+    supabase: AsyncDatabase = Depends(get_supabase)
 ):
-    """Get all forms"""
-    query = supabase.table("forms").select("*")
+    """Get a page of forms"""
+    query = supabase.table("forms").select(page.select(FormResponse, FORM_ORDER))
     if status_filter:
         query = query.eq("status", status_filter.value)
-    return query.order("created_at", desc=True).execute().data
+    result = await page.apply(query, FORM_ORDER).execute()
+    return page.respond(result.data, FORM_ORDER)
 
 @router.patch("/{form_id}", response_model=FormResponse)
 async def update_form(
     form_id: str,
     update_data: FormUpdate,
     current_user: dict = Depends(get_current_user),
-    supabase: Client = Depends(get_supabase)
+    supabase: AsyncDatabase = Depends(get_supabase)
 ):
     """Update a form"""
     update_dict = update_data.model_dump(exclude_unset=True)
@@ -58,26 +65,28 @@ async def update_form(
     
     # Calculate progress if completed_fields updated
     if "completed_fields" in update_dict:
-        existing = supabase.table("forms").select("fields").eq("id", form_id).execute()
+        existing = await supabase.table("forms").select("fields").eq("id", form_id).execute()
         if existing.data:
             total_fields = existing.data[0]["fields"]
             update_dict["progress"] = int((update_dict["completed_fields"] / total_fields) * 100)
     
     update_dict["updated_at"] = datetime.utcnow().isoformat()
     
-    result = supabase.table("forms").update(update_dict).eq("id", form_id).execute()
+    result = await supabase.table("forms").update(update_dict).eq("id", form_id).execute()
     if not result.data:
         raise HTTPException(status_code=404, detail="Form not found")
+    await response_cache.invalidate("forms")
     return result.data[0]
 
 @router.delete("/{form_id}")
 async def delete_form(
     form_id: str,
     current_user: dict = Depends(require_staff_or_admin),
-    supabase: Client = Depends(get_supabase)
+    supabase: AsyncDatabase = Depends(get_supabase)
 ):
     """Delete a form"""
-    result = supabase.table("forms").delete().eq("id", form_id).execute()
+    result = await supabase.table("forms").delete().eq("id", form_id).execute()
     if not result.data:
         raise HTTPException(status_code=404, detail="Form not found")
+    await response_cache.invalidate("forms")
     return {"message": "Form deleted successfully"}
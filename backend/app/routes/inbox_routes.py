@@ -1,19 +1,33 @@
-from fastapi import APIRouter, HTTPException, status, Depends
-from typing import List
-from supabase import Client #type: ignore
-from datetime import datetime
+from fastapi import APIRouter, HTTPException, status, Depends, Query, Request, Response
+from fastapi.responses import JSONResponse
+from typing import List, Optional
 import uuid
 
-from database import get_supabase
+from database import get_supabase, AsyncDatabase
 from  auth import require_staff_or_admin
+from pagination import PageParams, with_tiebreak, encode_cursor, decode_cursor, keyset_filter
+from etag import make_etag, etag_matches
+from pubsub import pubsub, sse_response
+from config import settings
 from  schemas import (
     ConversationResponse,
     MessageResponse,
     MessageCreate,
+    MessageWindow,
+    Page,
 )
 
 router = APIRouter(prefix="/inbox", tags=["Inbox"])
 
+CONVERSATION_ORDER = [("updated_at", True)]
+# seq is drawn by send_messages in commit order within a conversation
+MESSAGE_ORDER = [("seq", False)]
+
+INBOX_TOPIC = "inbox"
+
+def conversation_topic(conversation_id: str) -> str:
+    return f"inbox:{conversation_id}"
+
 
 # ---------------------------------------------------------
 # GET CONVERSATIONS
@@ -21,24 +35,25 @@ router = APIRouter(prefix="/inbox", tags=["Inbox"])
 
 @router.get(
     "/conversations",
-    response_model=List[ConversationResponse],
+    response_model=Page[ConversationResponse],
 )
 async def get_conversations(
+    page: PageParams = Depends(),
     current_user: dict = Depends(require_staff_or_admin),
-    supabase: Client = Depends(get_supabase),
+    supabase: AsyncDatabase = Depends(get_supabase),
 ):
-    """Get all conversations"""
+    """Get a page of conversations, most recently active first"""
 
     try:
-        result = (
-            supabase.table("conversations")
-            .select("*")
-            .order("updated_at", desc=True)
-            .execute()
+        query = supabase.table("conversations").select(
+            page.select(ConversationResponse, CONVERSATION_ORDER)
         )
+        result = await page.apply(query, CONVERSATION_ORDER).execute()
 
-        return result.data
+        return page.respond(result.data, CONVERSATION_ORDER)
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=500,
@@ -50,28 +65,97 @@ async def get_conversations(
 # GET MESSAGES
 # ---------------------------------------------------------
 
+async def conversation_version(supabase: AsyncDatabase, conversation_id: str):
+    """The conversation's ``updated_at``, bumped by every message send"""
+    result = await (
+        supabase.table("conversations")
+        .select("updated_at")
+        .eq("id", conversation_id)
+        .execute()
+    )
+    return result.data[0]["updated_at"] if result.data else None
+
+
 @router.get(
     "/messages/{conversation_id}",
-    response_model=List[MessageResponse],
+    response_model=MessageWindow,
 )
 async def get_messages(
     conversation_id: str,
+    request: Request,
+    response: Response,
+    page: PageParams = Depends(),
+    since: Optional[str] = Query(None, description="sync_cursor from a previous response; returns only newer messages"),
+    before: Optional[str] = Query(None, description="prev_cursor from a previous response; returns the window of older messages"),
+    tail: bool = Query(False, description="Return the latest messages first (initial load)"),
     current_user: dict = Depends(require_staff_or_admin),
-    supabase: Client = Depends(get_supabase),
+    supabase: AsyncDatabase = Depends(get_supabase),
 ):
-    """Get messages for a conversation"""
+    """Get messages for a conversation, oldest first.
+
+    Forward paging (``cursor``/``since``) walks towards newer messages;
+    ``tail`` and ``before`` return the window ending at the newest message
+    or at ``before``. Responses carry an ETag tied to the conversation's
+    last update, so an unchanged thread answers 304.
+    """
 
     try:
-        result = (
+        order = with_tiebreak(MESSAGE_ORDER)
+        if_none_match = request.headers.get("if-none-match")
+
+        # The version is read before the messages, so the ETag is never
+        # newer than the list it labels: a send in between makes the next
+        # revalidation miss instead of answering 304 over a stale list
+        version = await conversation_version(supabase, conversation_id)
+        etag = make_etag(conversation_id, version, request.url.query)
+        if if_none_match and etag_matches(if_none_match, etag):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+
+        query = (
             supabase.table("messages")
-            .select("*")
+            .select(page.select(MessageResponse, MESSAGE_ORDER))
             .eq("conversation_id", conversation_id)
-            .order("created_at", desc=False)
-            .execute()
         )
 
-        return result.data
+        prev_cursor = next_cursor = None
+        if tail or before:
+            # Newest-first from the window's end, then flip to oldest-first
+            backwards = [(column, not desc) for column, desc in order]
+            for column, desc in backwards:
+                query = query.order(column, desc=desc)
+            if before:
+                query = query.or_(keyset_filter(backwards, decode_cursor(before, order)))
+            result = await query.limit(page.limit + 1).execute()
+            rows = result.data[:page.limit][::-1]
+            if len(result.data) > page.limit:
+                prev_cursor = encode_cursor(rows[0], order)
+        else:
+            if since and not page.cursor:
+                page.cursor = since
+            result = await page.apply(query, MESSAGE_ORDER).execute()
+            rows = result.data[:page.limit]
+            if len(result.data) > page.limit:
+                next_cursor = encode_cursor(rows[-1], order)
 
+        if rows:
+            sync_cursor = encode_cursor(rows[-1], order)
+        else:
+            sync_cursor = since
+
+        window = {
+            "items": rows,
+            "next_cursor": next_cursor,
+            "prev_cursor": prev_cursor,
+            "sync_cursor": sync_cursor,
+        }
+        headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+        if page.fields is not None:
+            return JSONResponse(content=window, headers=headers)
+        response.headers.update(headers)
+        return window
+
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=500,
@@ -83,6 +167,37 @@ async def get_messages(
 # SEND MESSAGE
 # ---------------------------------------------------------
 
+async def insert_messages(supabase: AsyncDatabase, bodies: List[MessageCreate]) -> list:
+    """Insert messages and bump their conversations in one round-trip.
+
+    The ``send_messages`` database function does both writes in a single
+    transaction, so a conversation's last message never disagrees with its
+    messages. It also stamps ``created_at`` and ``seq``, in the order of
+    ``bodies``.
+    """
+    message_data = [
+        {
+            "id": str(uuid.uuid4()),
+            "conversation_id": body.conversation_id,
+            "text": body.text,
+            "is_me": True,
+        }
+        for body in bodies
+    ]
+
+    result = await supabase.rpc(
+        "send_messages", {"p_messages": message_data}
+    ).execute()
+
+    for message in result.data:
+        pubsub.publish(
+            [INBOX_TOPIC, conversation_topic(message["conversation_id"])],
+            message,
+        )
+
+    return result.data
+
+
 @router.post(
     "/messages",
     response_model=MessageResponse,
@@ -91,40 +206,70 @@ async def get_messages(
 async def send_message(
     body: MessageCreate,
     current_user: dict = Depends(require_staff_or_admin),
-    supabase: Client = Depends(get_supabase),
+    supabase: AsyncDatabase = Depends(get_supabase),
 ):
     """Send a message"""
 
     try:
-        message_data = {
-            "id": str(uuid.uuid4()),
-            "conversation_id": body.conversation_id,
-            "text": body.text,
-            "is_me": True,
-            "created_at": datetime.utcnow().isoformat(),
-        }
+        messages = await insert_messages(supabase, [body])
 
-        result = (
-            supabase.table("messages")
-            .insert(message_data)
-            .execute()
+        return messages[0]
+
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=str(e),
         )
 
-        # Update conversation last message
-        supabase.table("conversations").update(
-            {
-                "last_message": body.text,
-                "updated_at": datetime.utcnow().isoformat(),
-            }
-        ).eq(
-            "id",
-            body.conversation_id,
-        ).execute()
 
-        return result.data[0]
+@router.post(
+    "/messages/batch",
+    response_model=List[MessageResponse],
+    status_code=status.HTTP_201_CREATED,
+)
+async def send_messages(
+    bodies: List[MessageCreate],
+    current_user: dict = Depends(require_staff_or_admin),
+    supabase: AsyncDatabase = Depends(get_supabase),
+):
+    """Send several messages in one request"""
+
+    if not bodies:
+        return []
+
+    if len(bodies) > settings.MESSAGE_BATCH_LIMIT:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {settings.MESSAGE_BATCH_LIMIT} messages per batch",
+        )
+
+    try:
+        return await insert_messages(supabase, bodies)
 
     except Exception as e:
         raise HTTPException(
             status_code=500,
             detail=str(e),
         )
+
+
+# ---------------------------------------------------------
+# STREAM NEW MESSAGES
+# ---------------------------------------------------------
+
+@router.get("/stream")
+async def stream_messages(
+    request: Request,
+    conversation_id: Optional[List[str]] = Query(None),
+    current_user: dict = Depends(require_staff_or_admin),
+):
+    """Push new messages as Server-Sent Events.
+
+    Subscribe to specific conversations with repeated ``conversation_id``
+    parameters, or to the whole inbox by omitting them.
+    """
+    topics = [conversation_topic(c) for c in conversation_id] if conversation_id else [INBOX_TOPIC]
+    subscription = pubsub.subscribe(topics, maxsize=settings.STREAM_QUEUE_SIZE)
+    return sse_response(
+        request, pubsub, subscription, "message", settings.STREAM_KEEPALIVE_SECONDS
+    )
@@ -1,91 +1,299 @@
-from fastapi import APIRouter, HTTPException, Depends
-from typing import List
-from  schemas import InventoryItemCreate, InventoryItemUpdate, InventoryItemResponse, InventoryStatus
-from  database import get_supabase
+from fastapi import APIRouter, HTTPException, Depends, Query, Request
+from typing import List, Optional
+from  schemas import (
+    InventoryItemCreate, InventoryItemUpdate, InventoryItemResponse, Page,
+    MovementReason, StockAdjustment, StockAdjustmentBatch, StockMovementResponse, StockReservation,
+    ServiceMaterial, InventoryForecastResponse,
+)
+from database import get_supabase, AsyncDatabase
 from auth import require_staff_or_admin
-from supabase import Client #type: ignore
+from config import settings
+from forecast import inventory_forecast
+from pagination import PageParams
+from pubsub import pubsub, sse_response
+from response_cache import response_cache
+from stock import apply_movements, reserve
+from stock_alerts import ALERT_TOPIC, calculate_status, stock_alerts
 import uuid
 from datetime import datetime
 
 router = APIRouter(prefix="/inventory", tags=["Inventory"])
 
-def calculate_status(available: int, threshold: int) -> str:
-    """Calculate inventory status"""
-    if available == 0:
-        return InventoryStatus.CRITICAL.value
-    elif available <= threshold:
-        return InventoryStatus.LOW.value
-    return InventoryStatus.NORMAL.value
+ITEM_ORDER = [("name", False)]
+MOVEMENT_ORDER = [("created_at", True)]
+FORECAST_ORDER = [("days_left", False)]
+FORECAST_EMBED = {"item_name": "item:inventory!inventory_forecast_item_id_fkey(name)"}
 
 @router.post("", response_model=InventoryItemResponse, status_code=201)
 async def create_item(
     item: InventoryItemCreate,
     current_user: dict = Depends(require_staff_or_admin),
-    supabase: Client = Depends(get_supabase)
+    supabase: AsyncDatabase = Depends(get_supabase)
 ):
-    """Create inventory item"""
+    """Create inventory item.
+    
+    The opening balance is added to the ledger by an insert trigger.
+    """
     status_val = calculate_status(item.available, item.threshold)
     item_data = {
         "id": str(uuid.uuid4()),
         **item.model_dump(),
         "status": status_val,
+        "created_by": current_user["id"],
     }
-    result = supabase.table("inventory").insert(item_data).execute()
+    result = await supabase.table("inventory").insert(item_data).execute()
+    stock_alerts.observe(result.data)
+    await response_cache.invalidate("inventory")
     return result.data[0]
 
-@router.get("", response_model=List[InventoryItemResponse])
+@router.get("", response_model=Page[InventoryItemResponse])
+@response_cache.cached("inventory")
 async def get_items(
     low_stock_only: bool = False,
+    page: PageParams = Depends(),
     current_user: dict = Depends(require_staff_or_admin),
-    supabase: Client = Depends(get_supabase)
+    supabase: AsyncDatabase = Depends(get_supabase)
 ):
-    """Get all inventory items"""
-    query = supabase.table("inventory").select("*")
+    """Get a page of inventory items"""
+    query = supabase.table("inventory").select(page.select(InventoryItemResponse, ITEM_ORDER))
     if low_stock_only:
         query = query.in_("status", ["low", "critical"])
-    return query.order("name").execute().data
+    result = await page.apply(query, ITEM_ORDER).execute()
+    return page.respond(result.data, ITEM_ORDER)
 
 @router.get("/alerts")
 async def get_alerts(
     current_user: dict = Depends(require_staff_or_admin),
-    supabase: Client = Depends(get_supabase)
+    supabase: AsyncDatabase = Depends(get_supabase)
+):
+    """Get low stock alerts, answered from the in-memory alert set"""
+    await stock_alerts.ensure_loaded(supabase)
+    items = stock_alerts.items()
+    return {"count": len(items), "items": items}
+
+@router.get("/alerts/stream")
+async def stream_alerts(
+    request: Request,
+    current_user: dict = Depends(require_staff_or_admin)
+):
+    """Push low stock alerts as Server-Sent Events.
+    
+    One ``alert`` event per status change of an item, including the change
+    back to normal. Read ``/inventory/alerts`` once when connecting and
+    again after a ``resync`` event.
+    """
+    subscription = pubsub.subscribe([ALERT_TOPIC], maxsize=settings.STREAM_QUEUE_SIZE)
+    return sse_response(request, pubsub, subscription, "alert", settings.STREAM_KEEPALIVE_SECONDS)
+
+def format_forecast(row: dict) -> dict:
+    """Flatten the embedded item into ``item_name``"""
+    item = row.pop("item", None)
+    return {**row, "item_name": item.get("name") if item else None}
+
+@router.get("/forecast", response_model=Page[InventoryForecastResponse])
+@response_cache.cached("inventory")
+async def get_forecast(
+    within_days: Optional[int] = Query(None, ge=0, description="Only items running out within this many days"),
+    page: PageParams = Depends(),
+    current_user: dict = Depends(require_staff_or_admin),
+    supabase: AsyncDatabase = Depends(get_supabase)
+):
+    """Get a page of stock forecasts, soonest to run out first.
+    
+    Served from ``inventory_forecast``, which the forecast job refreshes
+    every ``FORECAST_REFRESH_SECONDS``.
+    """
+    query = supabase.table("inventory_forecast").select(
+        page.select(InventoryForecastResponse, FORECAST_ORDER, computed=FORECAST_EMBED)
+    )
+    if within_days is not None:
+        query = query.lte("days_left", within_days)
+    result = await page.apply(query, FORECAST_ORDER).execute()
+    rows = [format_forecast(row) if "item" in row else row for row in result.data]
+    return page.respond(rows, FORECAST_ORDER)
+
+@router.post("/forecast/refresh")
+async def refresh_forecast(
+    current_user: dict = Depends(require_staff_or_admin),
+    supabase: AsyncDatabase = Depends(get_supabase)
 ):
-    """Get low stock alerts"""
-    result = supabase.table("inventory").select("*").in_("status", ["low", "critical"]).execute()
-    return {"count": len(result.data), "items": result.data}
+    """Recompute every item's forecast now"""
+    await inventory_forecast.rebuild(supabase)
+    return {"items": inventory_forecast.items, "computed_at": inventory_forecast.computed_at}
 
 @router.patch("/{item_id}", response_model=InventoryItemResponse)
 async def update_item(
     item_id: str,
     update_data: InventoryItemUpdate,
     current_user: dict = Depends(require_staff_or_admin),
-    supabase: Client = Depends(get_supabase)
+    supabase: AsyncDatabase = Depends(get_supabase)
 ):
-    """Update inventory item"""
+    """Update inventory item.
+    
+    A new ``available`` is recorded in the ledger as a stocktake; status is
+    recomputed by the database.
+    """
     update_dict = update_data.model_dump(exclude_unset=True)
     
-    # Recalculate status if available or threshold changed
-    if "available" in update_dict or "threshold" in update_dict:
-        existing = supabase.table("inventory").select("*").eq("id", item_id).execute()
-        if existing.data:
-            available = update_dict.get("available", existing.data[0]["available"])
-            threshold = update_dict.get("threshold", existing.data[0]["threshold"])
-            update_dict["status"] = calculate_status(available, threshold)
+    available = update_dict.pop("available", None)
+    items = []
+    if available is not None:
+        items = await apply_movements(supabase, [{
+            "item_id": item_id,
+            "count": available,
+            "reason": MovementReason.STOCKTAKE.value,
+            "created_by": current_user["id"],
+        }])
+        if not update_dict:
+            return items[0]
     
     update_dict["updated_at"] = datetime.utcnow().isoformat()
-    result = supabase.table("inventory").update(update_dict).eq("id", item_id).execute()
+    result = await supabase.table("inventory").update(update_dict).eq("id", item_id).execute()
     if not result.data:
         raise HTTPException(status_code=404, detail="Item not found")
+    stock_alerts.observe(result.data)
+    await response_cache.invalidate("inventory")
     return result.data[0]
 
+def movement_row(item_id: str, adjustment: StockAdjustment, created_by: str) -> dict:
+    """An ``apply_stock_movements`` entry for an adjustment"""
+    reason = adjustment.reason or (
+        MovementReason.STOCKTAKE if adjustment.count is not None
+        else MovementReason.RESTOCK if adjustment.delta > 0
+        else MovementReason.CONSUMPTION
+    )
+    movement = {
+        "item_id": item_id,
+        "reason": reason.value,
+        "booking_id": adjustment.booking_id,
+        "note": adjustment.note,
+        "created_by": created_by,
+    }
+    if adjustment.count is not None:
+        movement["count"] = adjustment.count
+    else:
+        movement["delta"] = adjustment.delta
+    return movement
+
+@router.post("/adjust-batch", response_model=List[InventoryItemResponse])
+async def adjust_stock_batch(
+    batch: StockAdjustmentBatch,
+    current_user: dict = Depends(require_staff_or_admin),
+    supabase: AsyncDatabase = Depends(get_supabase)
+):
+    """Apply many adjustments or counts in one write.
+    
+    All of them apply or none do: 404 if any item is unknown, 409 if any
+    would take stock below zero or into what is reserved. Adjustments to
+    the same item apply in the order given.
+    """
+    movements = [movement_row(a.item_id, a, current_user["id"]) for a in batch.adjustments]
+    return await apply_movements(supabase, movements)
+
+@router.get("/materials/{service}", response_model=List[ServiceMaterial])
+@response_cache.cached("inventory")
+async def get_service_materials(
+    service: str,
+    current_user: dict = Depends(require_staff_or_admin),
+    supabase: AsyncDatabase = Depends(get_supabase)
+):
+    """Get the stock one booking of a service uses up"""
+    result = await supabase.table("service_materials").select("item_id,quantity").eq("service", service).execute()
+    return result.data
+
+@router.put("/materials/{service}", response_model=List[ServiceMaterial])
+async def set_service_materials(
+    service: str,
+    materials: List[ServiceMaterial],
+    current_user: dict = Depends(require_staff_or_admin),
+    supabase: AsyncDatabase = Depends(get_supabase)
+):
+    """Replace a service's bill of materials (an empty list clears it).
+    
+    Completing a booking of the service consumes these quantities, except
+    for items the booking reserved, which consume the reservation instead.
+    """
+    item_ids = [m.item_id for m in materials]
+    if len(set(item_ids)) != len(item_ids):
+        raise HTTPException(status_code=400, detail="Each item may only be listed once")
+    if item_ids:
+        known = await supabase.table("inventory").select("id").in_("id", item_ids).execute()
+        unknown = set(item_ids) - {row["id"] for row in known.data}
+        if unknown:
+            raise HTTPException(status_code=404, detail=f"Not found: {', '.join(sorted(unknown))}")
+    
+    await supabase.table("service_materials").delete().eq("service", service).execute()
+    if materials:
+        await supabase.table("service_materials").insert(
+            [{"service": service, **m.model_dump()} for m in materials]
+        ).execute()
+    await response_cache.invalidate("inventory")
+    return materials
+
+@router.post("/{item_id}/adjust", response_model=InventoryItemResponse)
+async def adjust_stock(
+    item_id: str,
+    adjustment: StockAdjustment,
+    current_user: dict = Depends(require_staff_or_admin),
+    supabase: AsyncDatabase = Depends(get_supabase)
+):
+    """Add ``delta`` to an item's stock, or set it to a counted value.
+    
+    Applied atomically by the database, so concurrent adjustments never
+    overwrite each other. 409 if it would take stock below zero or into
+    what is reserved.
+    """
+    items = await apply_movements(supabase, [movement_row(item_id, adjustment, current_user["id"])])
+    return items[0]
+
+@router.get("/{item_id}/movements", response_model=Page[StockMovementResponse])
+@response_cache.cached("inventory")
+async def get_movements(
+    item_id: str,
+    page: PageParams = Depends(),
+    current_user: dict = Depends(require_staff_or_admin),
+    supabase: AsyncDatabase = Depends(get_supabase)
+):
+    """Get a page of an item's stock movements, newest first"""
+    query = supabase.table("stock_movements").select(page.select(StockMovementResponse, MOVEMENT_ORDER)).eq("item_id", item_id)
+    result = await page.apply(query, MOVEMENT_ORDER).execute()
+    return page.respond(result.data, MOVEMENT_ORDER)
+
+@router.put("/{item_id}/reservations/{booking_id}", response_model=InventoryItemResponse)
+async def reserve_stock(
+    item_id: str,
+    booking_id: str,
+    reservation: StockReservation,
+    current_user: dict = Depends(require_staff_or_admin),
+    supabase: AsyncDatabase = Depends(get_supabase)
+):
+    """Hold stock for a booking, replacing any earlier hold (0 releases it).
+    
+    Held stock is consumed when the booking is completed and freed when it
+    is cancelled, marked no-show or deleted. 409 if not enough is free.
+    """
+    return await reserve(supabase, item_id, booking_id, reservation.quantity)
+
+@router.delete("/{item_id}/reservations/{booking_id}", response_model=InventoryItemResponse)
+async def release_stock(
+    item_id: str,
+    booking_id: str,
+    current_user: dict = Depends(require_staff_or_admin),
+    supabase: AsyncDatabase = Depends(get_supabase)
+):
+    """Release the stock held for a booking"""
+    return await reserve(supabase, item_id, booking_id, 0)
+
 @router.delete("/{item_id}")
 async def delete_item(
     item_id: str,
     current_user: dict = Depends(require_staff_or_admin),
-    supabase: Client = Depends(get_supabase)
+    supabase: AsyncDatabase = Depends(get_supabase)
 ):
     """Delete inventory item"""
-    result = supabase.table("inventory").delete().eq("id", item_id).execute()
+    result = await supabase.table("inventory").delete().eq("id", item_id).execute()
     if not result.data:
         raise HTTPException(status_code=404, detail="Item not found")
+    stock_alerts.discard(item_id)
+    await response_cache.invalidate("inventory")
     return {"message": "Item deleted successfully"}
@@ -1,22 +1,27 @@
-from fastapi import APIRouter, HTTPException, Depends
-from typing import List
-from  schemas import StaffCreate, StaffUpdate, StaffResponse, UserRole, StaffStatus
-from  database import get_supabase_admin
-from  auth import require_staff_or_admin, get_password_hash
-from supabase import Client #type: ignore
+from fastapi import APIRouter, HTTPException, Depends, Request, Response
+from  schemas import StaffCreate, StaffUpdate, StaffResponse, UserRole, StaffStatus, Page
+from database import get_supabase_admin, AsyncDatabase
+from  auth import require_staff_or_admin, get_password_hash, invalidate_principal
+from pagination import PageParams
+from response_cache import response_cache
+from etag import row_etag, not_modified, if_match_version, missing_or_modified
+import logging
 import uuid
 
 router = APIRouter(prefix="/staff", tags=["Staff"])
+logger = logging.getLogger(__name__)
+
+STAFF_ORDER = [("username", False)]
 
 @router.post("", response_model=StaffResponse, status_code=201)
 async def create_staff(
     staff: StaffCreate,
     current_user: dict = Depends(require_staff_or_admin),
-    supabase: Client = Depends(get_supabase_admin)
+    supabase: AsyncDatabase = Depends(get_supabase_admin)
 ):
     """Create a new staff member"""
     # Check if email exists
-    existing = supabase.table("users").select("*").eq("email", staff.email).execute()
+    existing = await supabase.table("users").select("*").eq("email", staff.email).execute()
     if existing.data:
         raise HTTPException(status_code=400, detail="Email already exists")
     
@@ -24,7 +29,7 @@ async def create_staff(
         "id": str(uuid.uuid4()),
         "email": staff.email,
         "username": staff.username,
-        "password_hash": get_password_hash(staff.password),
+        "password_hash": await get_password_hash(staff.password),
         "phone_number": staff.phone_number,
         "role": UserRole.STAFF.value,
         "role_title": staff.role_title,
@@ -33,60 +38,83 @@ async def create_staff(
         "joined_date": "now()",
     }
     
-    result = supabase.table("users").insert(staff_data).execute()
-    print(result)
+    result = await supabase.table("users").insert(staff_data).execute()
+    logger.debug("Created staff member %s", result.data[0]["id"] if result.data else None)
+    await response_cache.invalidate("users")
     return result.data[0]
 
-@router.get("", response_model=List[StaffResponse])
+@router.get("", response_model=Page[StaffResponse])
+@response_cache.cached("users")
 async def get_staff(
     active_only: bool = True,
+    page: PageParams = Depends(),
     current_user: dict = Depends(require_staff_or_admin),
-    supabase: Client = Depends(get_supabase_admin)
+    supabase: AsyncDatabase = Depends(get_supabase_admin)
 ):
-    """Get all staff members"""
-    query = supabase.table("users").select("*").eq("role", UserRole.STAFF.value)
+    """Get a page of staff members"""
+    query = supabase.table("users").select(page.select(StaffResponse, STAFF_ORDER)).eq("role", UserRole.STAFF.value)
     if active_only:
         query = query.eq("status", StaffStatus.ACTIVE.value)
-        print(query)
-    return query.order("username").execute().data
+    result = await page.apply(query, STAFF_ORDER).execute()
+    return page.respond(result.data, STAFF_ORDER)
 
 @router.get("/{staff_id}", response_model=StaffResponse)
 async def get_staff_member(
     staff_id: str,
+    request: Request,
+    response: Response,
     current_user: dict = Depends(require_staff_or_admin),
-    supabase: Client = Depends(get_supabase_admin)
+    supabase: AsyncDatabase = Depends(get_supabase_admin)
 ):
     """Get staff member by ID"""
-    result = supabase.table("users").select("*").eq("id", staff_id).execute()
+    result = await supabase.table("users").select("*").eq("id", staff_id).execute()
     if not result.data:
         raise HTTPException(status_code=404, detail="Staff member not found")
+    etag = row_etag(result.data[0])
+    cached = not_modified(request, etag)
+    if cached:
+        return cached
+    response.headers["ETag"] = etag
     return result.data[0]
 
 @router.patch("/{staff_id}", response_model=StaffResponse)
 async def update_staff(
     staff_id: str,
     update_data: StaffUpdate,
+    request: Request,
+    response: Response,
     current_user: dict = Depends(require_staff_or_admin),
-    supabase: Client = Depends(get_supabase_admin)
+    supabase: AsyncDatabase = Depends(get_supabase_admin)
 ):
     """Update staff member"""
     update_dict = update_data.model_dump(exclude_unset=True)
     if "status" in update_dict:
         update_dict["status"] = update_dict["status"].value
     
-    result = supabase.table("users").update(update_dict).eq("id", staff_id).execute()
+    query = supabase.table("users").update(update_dict).eq("id", staff_id)
+    expected = if_match_version(request.headers.get("if-match"), staff_id)
+    if expected:
+        query = query.eq("updated_at", expected)
+    result = await query.execute()
     if not result.data:
+        if expected:
+            raise await missing_or_modified(supabase, "users", staff_id, "Staff member not found")
         raise HTTPException(status_code=404, detail="Staff member not found")
+    invalidate_principal(staff_id)
+    await response_cache.invalidate("users")
+    response.headers["ETag"] = row_etag(result.data[0])
     return result.data[0]
 
 @router.delete("/{staff_id}")
 async def delete_staff(
     staff_id: str,
     current_user: dict = Depends(require_staff_or_admin),
-    supabase: Client = Depends(get_supabase_admin)
+    supabase: AsyncDatabase = Depends(get_supabase_admin)
 ):
     """Deactivate staff member"""
-    result = supabase.table("users").update({"status": StaffStatus.INACTIVE.value}).eq("id", staff_id).execute()
+    result = await supabase.table("users").update({"status": StaffStatus.INACTIVE.value}).eq("id", staff_id).execute()
     if not result.data:
         raise HTTPException(status_code=404, detail="Staff member not found")
+    invalidate_principal(staff_id)
+    await response_cache.invalidate("users")
     return {"message": "Staff member deactivated successfully"}
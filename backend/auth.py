@@ -1,3 +1,5 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from typing import Optional
 from jose import JWTError, jwt
@@ -5,24 +7,74 @@ from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from  config import settings
-from database import get_supabase
+from database import get_supabase, AsyncDatabase
 from schemas import TokenData, UserRole
-from supabase import Client
+from cache import TTLCache
+from metrics import Gauge, registry
 
 # Password hashing
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+
+class HashWorkerPool:
+    """Bounded pool running bcrypt off the event loop.
+
+    bcrypt releases the GIL while hashing, so worker threads spread a login
+    burst across cores. ``workers`` caps concurrent hashes; anything beyond
+    that waits in the executor queue and is reported as ``queue_depth``.
+    """
+
+    def __init__(self, workers: int):
+        self.workers = workers
+        self.in_flight = 0
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bcrypt")
+
+    @property
+    def queue_depth(self) -> int:
+        return max(0, self.in_flight - self.workers)
+
+    async def run(self, fn, *args):
+        loop = asyncio.get_running_loop()
+        self.in_flight += 1
+        try:
+            return await loop.run_in_executor(self._executor, fn, *args)
+        finally:
+            self.in_flight -= 1
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "in_flight": self.in_flight,
+            "queue_depth": self.queue_depth,
+        }
+
+
+hash_pool = HashWorkerPool(settings.PASSWORD_HASH_WORKERS)
+registry.register(Gauge(
+    "password_hash_in_flight", "Password hashes running or queued", lambda: hash_pool.in_flight
+))
+registry.register(Gauge(
+    "password_hash_queue_depth", "Password hashes waiting for a worker", lambda: hash_pool.queue_depth
+))
+
 # OAuth2 scheme
 security = HTTPBearer()
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
+# Verified principals keyed by user id; TTL bounds how long a role/status
+# change made elsewhere can go unnoticed
+principal_cache = TTLCache(
+    maxsize=settings.PRINCIPAL_CACHE_SIZE,
+    ttl=settings.PRINCIPAL_CACHE_TTL_SECONDS,
+)
+
+async def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a password against a hash"""
-    return pwd_context.verify(plain_password[:72], hashed_password)
+    return await hash_pool.run(pwd_context.verify, plain_password[:72], hashed_password)
 
 
-def get_password_hash(password: str) -> str:
+async def get_password_hash(password: str) -> str:
     """Generate password hash"""
-    return pwd_context.hash(password[:72])
+    return await hash_pool.run(pwd_context.hash, password[:72])
 
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
@@ -37,9 +89,13 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
 
+def invalidate_principal(user_id: str):
+    """Drop a cached principal so the next request re-reads the user"""
+    principal_cache.invalidate(user_id)
+
 async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
-    supabase: Client = Depends(get_supabase)
+    supabase: AsyncDatabase = Depends(get_supabase)
 ):
     """Get current authenticated user"""
     credentials_exception = HTTPException(
@@ -61,12 +117,17 @@ async def get_current_user(
     except JWTError:
         raise credentials_exception
     
+    cached = principal_cache.get(token_data.user_id)
+    if cached is not None:
+        return dict(cached)
+    
     # Get user from database
     try:
-        result = supabase.table("users").select("*").eq("id", token_data.user_id).execute()
+        result = await supabase.table("users").select("*").eq("id", token_data.user_id).execute()
         if not result.data:
             raise credentials_exception
-        return result.data[0]
+        principal_cache.set(token_data.user_id, result.data[0])
+        return dict(result.data[0])
     except Exception as e:
         raise credentials_exception
 
@@ -0,0 +1,219 @@
+"""Staff and location availability index.
+
+Keeps the booked intervals of every staff member and location per day,
+sorted by start time. An interval can only overlap a slot if it starts
+before the slot ends and no earlier than the slot's start minus the longest
+booked duration, so overlap checks scan the range between two binary
+searches, and free-slot queries never touch the database. Only bookings from today onwards are
+indexed; cancelled and no-show bookings don't block time. Occurrences of
+recurring series are expanded from ``recurrence.series_index`` for the day
+being checked rather than stored here.
+"""
+import re
+from bisect import bisect_left, insort
+from collections import defaultdict
+from datetime import date as date_type
+from typing import Dict, List, Optional, Tuple
+
+from pagination import iter_keyset
+from projection import Projection
+from recurrence import series_index
+from repository import AsyncDatabase
+
+NON_BLOCKING_STATUSES = {"cancelled", "no-show"}
+DEFAULT_DURATION_MINUTES = 60
+
+_TIME_RE = re.compile(r"^\s*(\d{1,2})(?::(\d{2}))?\s*([AaPp][Mm])?\s*$")
+_DURATION_RE = re.compile(r"^\s*(\d+(?:\.\d+)?)\s*(h|hr|hrs|hour|hours|m|min|mins|minute|minutes)?\s*$", re.I)
+
+Interval = Tuple[int, int, str]  # (start minute, end minute, booking id)
+
+
+def parse_time(value: Optional[str]) -> Optional[int]:
+    """Minutes since midnight for times like '10:00 AM', '2:30 pm' or '14:30'"""
+    match = _TIME_RE.match(value or "")
+    if not match:
+        return None
+    hour, minute, meridiem = int(match.group(1)), int(match.group(2) or 0), match.group(3)
+    if meridiem:
+        if not 1 <= hour <= 12:
+            return None
+        hour = hour % 12 + (12 if meridiem.lower() == "pm" else 0)
+    if hour > 23 or minute > 59:
+        return None
+    return hour * 60 + minute
+
+
+def parse_duration(value: Optional[str]) -> Optional[int]:
+    """Minutes for durations like '60 min', '1.5 hours' or a bare number"""
+    match = _DURATION_RE.match(value or "")
+    if not match:
+        return None
+    amount, unit = float(match.group(1)), (match.group(2) or "min").lower()
+    return int(amount * 60) if unit.startswith("h") else int(amount)
+
+
+def format_time(minutes: int) -> str:
+    """Render minutes since midnight the way bookings store times ('2:00 PM')"""
+    hour, minute = divmod(minutes, 60)
+    return f"{hour % 12 or 12}:{minute:02d} {'AM' if hour < 12 else 'PM'}"
+
+
+def booking_interval(booking: dict) -> Optional[Interval]:
+    if booking.get("status") in NON_BLOCKING_STATUSES:
+        return None
+    start = parse_time(booking.get("time"))
+    if start is None:
+        return None
+    duration = parse_duration(booking.get("duration")) or DEFAULT_DURATION_MINUTES
+    return (start, start + duration, booking.get("id"))
+
+
+def _overlap(
+    intervals: List[Interval], start: int, end: int, ignore_id: Optional[str], longest: int
+) -> Optional[Interval]:
+    # Intervals are sorted by start; only ones starting before ``end`` and
+    # at most ``longest`` minutes before ``start`` can overlap
+    lo = bisect_left(intervals, (start - longest,))
+    for interval in intervals[lo:bisect_left(intervals, (end,), lo)]:
+        if interval[1] > start and interval[2] != ignore_id:
+            return interval
+    return None
+
+
+def _intervals(index: Dict[str, Dict[str, List[Interval]]], key: str, day: str) -> List[Interval]:
+    # Lookups must not create empty entries in the defaultdicts
+    return index.get(key, {}).get(day, [])
+
+
+class AvailabilityIndex(Projection):
+    def __init__(self):
+        super().__init__()
+        self.by_staff: Dict[str, Dict[str, List[Interval]]] = defaultdict(lambda: defaultdict(list))
+        self.by_location: Dict[str, Dict[str, List[Interval]]] = defaultdict(lambda: defaultdict(list))
+        self.service_durations: Dict[str, int] = {}
+        # Upper bound on any indexed duration; removals leave it as is
+        self.longest = 0
+
+    def _keys(self, booking: dict):
+        day = str(booking.get("date"))
+        if booking.get("assigned_staff_id"):
+            yield self.by_staff[booking["assigned_staff_id"]][day]
+        if booking.get("location"):
+            yield self.by_location[booking["location"]][day]
+
+    def add(self, booking: dict):
+        interval = booking_interval(booking)
+        if interval is None:
+            return
+        if booking.get("service"):
+            self.service_durations[booking["service"]] = interval[1] - interval[0]
+        self.longest = max(self.longest, interval[1] - interval[0])
+        for intervals in self._keys(booking):
+            insort(intervals, interval)
+
+    def remove(self, booking: dict):
+        interval = booking_interval(booking)
+        if interval is None:
+            return
+        for intervals in self._keys(booking):
+            i = bisect_left(intervals, interval)
+            if i < len(intervals) and intervals[i] == interval:
+                del intervals[i]
+
+    def _booked(self, field: str, key: str, day: str, occurrences: List[dict]) -> List[Interval]:
+        # Stored intervals plus those of series occurrences on the same day
+        index = self.by_staff if field == "assigned_staff_id" else self.by_location
+        intervals = _intervals(index, key, day)
+        extra = [booking_interval(o) for o in occurrences if o.get(field) == key]
+        extra = [interval for interval in extra if interval is not None]
+        if not extra:
+            return intervals
+        self.longest = max(self.longest, *(e - s for s, e, _ in extra))
+        return sorted(intervals + extra)
+
+    def _overlaps(
+        self,
+        field: str,
+        key: str,
+        day: str,
+        occurrences: List[dict],
+        start: int,
+        end: int,
+        ignore_id: Optional[str],
+    ) -> bool:
+        intervals = self._booked(field, key, day, occurrences)
+        return _overlap(intervals, start, end, ignore_id, self.longest) is not None
+
+    def conflict(self, booking: dict, ignore_id: Optional[str] = None) -> Optional[str]:
+        """Describe the first overlap ``booking`` would create, if any"""
+        interval = booking_interval(booking)
+        if interval is None:
+            return None
+        start, end, _ = interval
+        day = str(booking.get("date"))
+        occurrences = series_index.occurrences_on(day)
+        staff_id = booking.get("assigned_staff_id")
+        if staff_id and self._overlaps("assigned_staff_id", staff_id, day, occurrences, start, end, ignore_id):
+            return "Assigned staff member is already booked at this time"
+        location = booking.get("location")
+        if location and self._overlaps("location", location, day, occurrences, start, end, ignore_id):
+            return "Location is already booked at this time"
+        return None
+
+    def reserve(self, booking: dict, ignore_id: Optional[str] = None) -> Optional[str]:
+        """Check for conflicts and claim the slot in one step.
+
+        There is no await between the check and the claim, so concurrent
+        requests in this process cannot both take the same slot. Callers
+        must ``remove`` the booking again if the database write fails.
+        """
+        conflict = self.conflict(booking, ignore_id)
+        if conflict is None:
+            self.add(booking)
+        return conflict
+
+    def free_slots(
+        self,
+        day: str,
+        duration: int,
+        staff_ids: List[str],
+        open_minute: int,
+        close_minute: int,
+        step: int,
+        location: Optional[str] = None,
+    ) -> List[dict]:
+        """Start times on ``day`` at which at least one staff member is free"""
+        slots = []
+        occurrences = series_index.occurrences_on(day)
+        location_intervals = self._booked("location", location, day, occurrences) if location else []
+        staff_intervals = {s: self._booked("assigned_staff_id", s, day, occurrences) for s in staff_ids}
+        for start in range(open_minute, close_minute - duration + 1, step):
+            end = start + duration
+            if location and _overlap(location_intervals, start, end, None, self.longest):
+                continue
+            free = [s for s in staff_ids if not _overlap(staff_intervals[s], start, end, None, self.longest)]
+            if free:
+                slots.append({"time": format_time(start), "staff_ids": free})
+        return slots
+
+    async def load(self, supabase: AsyncDatabase):
+        await series_index.ensure_loaded(supabase)
+        fresh = AvailabilityIndex()
+        today = date_type.today().isoformat()
+        rows = iter_keyset(
+            lambda: supabase.table("bookings")
+            .select("id,date,time,duration,location,assigned_staff_id,status,service")
+            .gte("date", today),
+            [("id", False)],
+            page_size=1000,
+        )
+        async for booking in rows:
+            fresh.add(booking)
+        self.by_staff = fresh.by_staff
+        self.by_location = fresh.by_location
+        self.service_durations = fresh.service_durations
+        self.longest = fresh.longest
+
+
+availability_index = AvailabilityIndex()
@@ -0,0 +1,115 @@
+"""Contact search benchmark.
+
+Builds ``ContactSearchIndex`` over generated contacts with realistic names,
+emails and phone numbers, then times a mix of queries: name prefixes,
+full names, typos, email fragments and phone numbers as they are written.
+Reports the build time and per-query p50/p99, and exits with status 1 if
+the p99 is over ``--budget`` milliseconds.
+
+Usage:
+    python benchmarks/bench_contact_search.py --size 1m --budget 50
+"""
+import argparse
+import os
+import random
+import sys
+import time
+import uuid
+from typing import List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+os.environ.setdefault("DATABASE_BACKEND", "memory")
+os.environ.setdefault("SECRET_KEY", "benchmark-secret-key")
+
+import datasets  # noqa: E402
+from contact_search import ContactSearchIndex  # noqa: E402
+
+FIRST_NAMES = [
+    "James", "Mary", "John", "Patricia", "Robert", "Jennifer", "Michael", "Linda", "William", "Elizabeth",
+    "David", "Barbara", "Richard", "Susan", "Joseph", "Jessica", "Thomas", "Sarah", "Charles", "Karen",
+    "Christopher", "Nancy", "Daniel", "Lisa", "Matthew", "Betty", "Anthony", "Margaret", "Mark", "Sandra",
+    "José", "María", "Priya", "Rahul", "Aisha", "Mohammed", "Wei", "Yuki", "Olga", "Chloé",
+]
+LAST_NAMES = [
+    "Smith", "Johnson", "Williams", "Brown", "Jones", "Garcia", "Miller", "Davis", "Rodriguez", "Martinez",
+    "Hernandez", "Lopez", "Gonzalez", "Wilson", "Anderson", "Thomas", "Taylor", "Moore", "Jackson", "Martin",
+    "Lee", "Perez", "Thompson", "White", "Harris", "Sanchez", "Clark", "Ramirez", "Lewis", "Robinson",
+    "Kaushal", "Sharma", "Patel", "Nguyen", "Kim", "Müller", "Schmidt", "Rossi", "Dubois", "Kowalski",
+]
+DOMAINS = ["gmail.com", "yahoo.com", "outlook.com", "example.com", "careops.dev"]
+
+
+def contacts(count: int, seed: int = 42) -> List[dict]:
+    rng = random.Random(seed)
+    rows = []
+    for i in range(count):
+        first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        rows.append({
+            "id": str(uuid.UUID(int=rng.getrandbits(128), version=4)),
+            "name": f"{first} {last}",
+            "email": f"{first.lower()}.{last.lower()}{i}@{rng.choice(DOMAINS)}",
+            "phone": f"+1 ({rng.randrange(200, 999)}) {rng.randrange(200, 999)}-{rng.randrange(10000):04d}",
+            "status": "active",
+        })
+    return rows
+
+
+def queries(rows: List[dict], count: int, seed: int = 7) -> List[str]:
+    rng = random.Random(seed)
+    picks = rng.sample(rows, min(count, len(rows)))
+    found = []
+    for i, contact in enumerate(picks):
+        first, last = contact["name"].split(" ", 1)
+        digits = "".join(ch for ch in contact["phone"] if ch.isdigit())
+        found.append([
+            first[:2],                                   # short prefix
+            f"{first} {last[:3]}",                       # name as it is typed
+            contact["name"],                             # full name
+            last[:2] + last[3:] if len(last) > 4 else last,  # typo: a letter dropped
+            contact["email"].split("@")[0],              # email local part
+            digits[-4:],                                 # last digits of the phone
+            f"{digits[-7:-4]}-{digits[-4:]}",            # local number as it is written
+            f"({digits[-10:-7]}) {digits[-7:-4]}-{digits[-4]}",  # number being typed
+            f"{first} {digits[-7:-4]}-{digits[-4:]}",    # name and number
+        ][i % 9])
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", default="1m", help="contacts: 1k, 100k, 1m or a count")
+    parser.add_argument("--queries", type=int, default=2000, help="queries to time")
+    parser.add_argument("--limit", type=int, default=10, help="results per query")
+    parser.add_argument("--budget", type=float, default=50.0, help="p99 milliseconds allowed per query")
+    args = parser.parse_args()
+
+    count = datasets.parse_size(args.size)
+    print(f"Generating {count:,} contacts...")
+    rows = contacts(count)
+
+    started = time.perf_counter()
+    index = ContactSearchIndex()
+    index.build(rows)
+    size = sum(a.nbytes for a in (index.terms, index.offsets, index.postings, index.ids, index.names, index.alive))
+    print(f"build: {time.perf_counter() - started:.1f}s, {len(index.terms):,} terms, arrays {size / 2**20:.0f} MiB")
+
+    timings = []
+    empty = 0
+    for query in queries(rows, args.queries):
+        started = time.perf_counter()
+        results = index.search(query, args.limit)
+        timings.append((time.perf_counter() - started) * 1000)
+        empty += not results
+    timings.sort()
+    p50, p99 = timings[len(timings) // 2], timings[int(len(timings) * 0.99)]
+    print(f"{len(timings)} queries: p50 {p50:.2f}ms, p99 {p99:.2f}ms, max {timings[-1]:.2f}ms, {empty} without results")
+
+    if p99 > args.budget:
+        print(f"Over the {args.budget}ms budget")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
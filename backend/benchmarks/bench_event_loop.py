@@ -0,0 +1,90 @@
+"""Event-loop blocking benchmark for the async data access layer.
+
+Simulates a burst of concurrent requests where each handler performs one
+PostgREST round-trip, alongside a stream of cheap "probe" requests (think
+``/health`` or a cached login). Compares calling the blocking client
+directly inside ``async def`` handlers (the old behaviour) with awaiting
+``AsyncQuery.execute()`` on the bounded pool.
+
+Usage:
+    python benchmarks/bench_event_loop.py --requests 200 --latency-ms 300 --pool-size 16
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from repository import AsyncQuery, create_executor  # noqa: E402
+
+
+class BlockingBuilder:
+    """Stand-in for a postgrest builder whose execute() blocks on I/O"""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+
+    def execute(self):
+        time.sleep(self.latency)
+        return []
+
+
+async def run(mode: str, requests: int, latency: float, pool_size: int) -> dict:
+    executor = create_executor(pool_size)
+    probe_latencies = []
+    done = asyncio.Event()
+
+    async def handler():
+        builder = BlockingBuilder(latency)
+        if mode == "sync":
+            builder.execute()
+        else:
+            await AsyncQuery(builder, executor).execute()
+
+    async def probe():
+        while not done.is_set():
+            start = time.perf_counter()
+            await asyncio.sleep(0)
+            probe_latencies.append(time.perf_counter() - start)
+            await asyncio.sleep(0.01)
+
+    probe_task = asyncio.create_task(probe())
+    start = time.perf_counter()
+    await asyncio.gather(*(handler() for _ in range(requests)))
+    elapsed = time.perf_counter() - start
+    done.set()
+    await probe_task
+    executor.shutdown(wait=True)
+
+    probe_latencies.sort()
+    return {
+        "mode": mode,
+        "elapsed_s": elapsed,
+        "throughput_rps": requests / elapsed,
+        "probe_p50_ms": statistics.median(probe_latencies) * 1000,
+        "probe_max_ms": probe_latencies[-1] * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--latency-ms", type=float, default=100.0)
+    parser.add_argument("--pool-size", type=int, default=16)
+    args = parser.parse_args()
+
+    latency = args.latency_ms / 1000
+    for mode in ("sync", "async"):
+        r = asyncio.run(run(mode, args.requests, latency, args.pool_size))
+        print(
+            f"{r['mode']:>5}: {args.requests} requests in {r['elapsed_s']:.2f}s "
+            f"({r['throughput_rps']:.1f} req/s), "
+            f"probe p50 {r['probe_p50_ms']:.1f} ms, max {r['probe_max_ms']:.1f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
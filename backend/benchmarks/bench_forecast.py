@@ -0,0 +1,124 @@
+"""Inventory forecast benchmark.
+
+Times ``ForecastBuilder`` forecasting many items from daily consumption
+history, bills of materials and upcoming bookings, in the shape the job
+reads them from the database. With ``--through-store`` it also times the
+whole refresh (reads, forecast and table write) on the in-memory backend.
+Exits with status 1 if the forecast takes longer than ``--budget``
+seconds.
+
+Usage:
+    python benchmarks/bench_forecast.py --items 50000 --budget 10
+    python benchmarks/bench_forecast.py --items 10000 --through-store
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+import uuid
+from datetime import date, timedelta
+from typing import Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+os.environ.setdefault("DATABASE_BACKEND", "memory")
+os.environ.setdefault("SECRET_KEY", "benchmark-secret-key")
+
+import datasets  # noqa: E402
+from config import settings  # noqa: E402
+from forecast import ForecastBuilder  # noqa: E402
+
+
+def forecast_inputs(items: int, today: date, seed: int = 42) -> Dict[str, List[dict]]:
+    """Items, per-day consumption of a third of them and a bill of materials per service"""
+    rng = random.Random(seed)
+    ids = [str(uuid.UUID(int=rng.getrandbits(128), version=4)) for _ in range(items)]
+    history = [(today - timedelta(days=offset)).isoformat() for offset in range(1, settings.FORECAST_HISTORY_DAYS + 1)]
+    horizon = [(today + timedelta(days=offset)).isoformat() for offset in range(settings.FORECAST_HORIZON_DAYS)]
+    return {
+        "items": [{"id": item_id, "available": rng.randint(0, 500)} for item_id in ids],
+        "usage": [
+            {"item_id": item_id, "date": day, "used": rng.randint(1, 10)}
+            for item_id in ids[::3]
+            for day in history
+            if rng.random() < 0.5
+        ],
+        "materials": [
+            {"service": service, "item_id": item_id, "quantity": rng.randint(1, 3)}
+            for service in datasets.SERVICES
+            for item_id in rng.sample(ids, min(20, items))
+        ],
+        "bookings": [
+            {"date": day, "status": status, "group": service, "bookings": rng.randint(0, 40)}
+            for day in horizon
+            for service in datasets.SERVICES
+            for status in ("pending", "confirmed")
+        ],
+    }
+
+
+def forecast(inputs: Dict[str, List[dict]], today: date) -> float:
+    started = time.perf_counter()
+    builder = ForecastBuilder(
+        today,
+        settings.FORECAST_HISTORY_DAYS,
+        settings.FORECAST_HORIZON_DAYS,
+        settings.FORECAST_LEAD_TIME_DAYS,
+        settings.FORECAST_SAFETY_FACTOR,
+    )
+    builder.add_items(inputs["items"])
+    builder.add_usage(inputs["usage"])
+    builder.add_materials(inputs["materials"])
+    builder.add_bookings([{**row, "service": row["group"]} for row in inputs["bookings"]], weight_key="bookings")
+    rows = builder.compute()
+    elapsed = time.perf_counter() - started
+    assert len(rows) == len(inputs["items"])
+    return elapsed
+
+
+async def through_store() -> float:
+    from database import db
+    from forecast import inventory_forecast
+
+    started = time.perf_counter()
+    await inventory_forecast.rebuild(db)
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, default=50_000, help="inventory items")
+    parser.add_argument("--repeat", type=int, default=3, help="runs; the best is reported")
+    parser.add_argument("--budget", type=float, default=10.0, help="seconds allowed for the forecast")
+    parser.add_argument("--through-store", action="store_true", help="also time a full refresh on the in-memory backend")
+    args = parser.parse_args()
+
+    today = date.today()
+    print(f"Generating {args.items:,} items...")
+    inputs = forecast_inputs(args.items, today)
+    print(f"{len(inputs['usage']):,} usage rows, {len(inputs['materials']):,} material lines")
+
+    best = min(forecast(inputs, today) for _ in range(args.repeat))
+    print(f"forecast: {best * 1000:.0f}ms ({args.items / best:,.0f} items/s)")
+
+    if args.through_store:
+        from database import fake_store
+
+        fake_store.seed("inventory", [
+            {**item, "name": f"Item {i}", "category": "Consumables", "threshold": 10, "reserved": 0}
+            for i, item in enumerate(inputs["items"])
+        ])
+        fake_store.seed("service_materials", [{"id": str(uuid.uuid4()), **line} for line in inputs["materials"]])
+        elapsed = asyncio.run(through_store())
+        print(f"through store: {elapsed * 1000:.0f}ms")
+
+    if best > args.budget:
+        print(f"Over the {args.budget}s budget")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""Booking time-series benchmark.
+
+Times ``TimeSeriesBuilder`` aggregating a year of bookings, one row per
+booking holding only the columns it reads, for every granularity and
+grouping. This is the worst case for the NumPy side: the endpoint gets
+per-day counts from the ``booking_counts`` database function instead.
+With ``--through-store`` it also times ``booking_timeseries`` end to end
+on the in-memory backend, whose Python ``booking_counts`` stands in for
+the SQL one. Exits with status 1 if any aggregation takes longer than
+``--budget`` seconds.
+
+Usage:
+    python benchmarks/bench_timeseries.py --size 1m --budget 1.0
+    python benchmarks/bench_timeseries.py --size 100k --through-store
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+import uuid
+from datetime import date, timedelta
+from typing import List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+os.environ.setdefault("DATABASE_BACKEND", "memory")
+os.environ.setdefault("SECRET_KEY", "benchmark-secret-key")
+
+import datasets  # noqa: E402
+from timeseries import GROUP_COLUMNS, TimeSeriesBuilder, booking_timeseries  # noqa: E402
+
+
+def booking_columns(count: int, today: date, seed: int = 42) -> List[dict]:
+    """Bookings reduced to the columns the endpoint reads, spread like ``datasets.generate``"""
+    rng = random.Random(seed)
+    staff_ids = [str(uuid.UUID(int=rng.getrandbits(128), version=4)) for _ in range(max(5, count // 5000))]
+    days = [(today + timedelta(days=offset)).isoformat() for offset in range(-182, 183)]
+    statuses = rng.choices(datasets.BOOKING_STATUSES, datasets.BOOKING_WEIGHTS, k=count)
+    return [
+        {
+            "id": str(uuid.UUID(int=rng.getrandbits(128), version=4)),
+            "date": rng.choice(days),
+            "status": statuses[i],
+            "assigned_staff_id": rng.choice(staff_ids) if rng.random() < 0.8 else None,
+            "location": rng.choice(datasets.LOCATIONS),
+            "service": rng.choice(datasets.SERVICES),
+        }
+        for i in range(count)
+    ]
+
+
+def aggregate(rows: List[dict], start: date, end: date, granularity: str, group_by: str) -> float:
+    started = time.perf_counter()
+    builder = TimeSeriesBuilder(start, end, granularity, group_by)
+    builder.add(rows)
+    result = builder.result()
+    elapsed = time.perf_counter() - started
+    assert sum(sum(series["total"]) for series in result["series"]) == len(rows)
+    return elapsed
+
+
+async def through_store(start: date, end: date, group_by: str) -> float:
+    from database import db
+
+    started = time.perf_counter()
+    builder = await booking_timeseries(db, start, end, "week", group_by)
+    builder.result()
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", default="1m", help="bookings: 1k, 100k, 1m or a count")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per case; the best is reported")
+    parser.add_argument("--budget", type=float, default=1.0, help="seconds allowed per aggregation")
+    parser.add_argument("--through-store", action="store_true", help="also time the endpoint's query on the in-memory backend")
+    args = parser.parse_args()
+
+    count = datasets.parse_size(args.size)
+    today = date.today()
+    start, end = today - timedelta(days=182), today + timedelta(days=182)
+    print(f"Generating {count:,} bookings...")
+    rows = booking_columns(count, today)
+
+    over_budget = []
+    print(f"{'granularity':<12}{'group by':<10}{'best':>10}{'rows/s':>16}")
+    for granularity in ("day", "week", "month"):
+        for group_by in (None, *GROUP_COLUMNS):
+            best = min(aggregate(rows, start, end, granularity, group_by) for _ in range(args.repeat))
+            print(f"{granularity:<12}{group_by or '-':<10}{best * 1000:>8.0f}ms{count / best:>16,.0f}")
+            if best > args.budget:
+                over_budget.append(f"{granularity}/{group_by or '-'}")
+
+    if args.through_store:
+        from database import fake_store
+
+        fake_store.seed("bookings", rows)
+        for group_by in (None, *GROUP_COLUMNS):
+            elapsed = asyncio.run(through_store(start, end, group_by))
+            print(f"through store, week/{group_by or '-'}: {elapsed * 1000:.0f}ms")
+
+    if over_budget:
+        print(f"Over the {args.budget}s budget: {', '.join(over_budget)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
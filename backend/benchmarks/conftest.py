@@ -0,0 +1,33 @@
+"""pytest-benchmark setup: the app runs on the in-memory backend, seeded
+with a deterministic dataset (``--dataset-size``, default 1k bookings)."""
+import os
+import sys
+
+os.environ.setdefault("DATABASE_BACKEND", "memory")
+os.environ.setdefault("SECRET_KEY", "benchmark-secret-key")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import pytest  # noqa: E402
+
+import datasets  # noqa: E402
+
+
+def pytest_addoption(parser):
+    parser.addoption("--dataset-size", default="1k", help="bookings to seed: 1k, 100k, 1m or a count")
+
+
+@pytest.fixture(scope="session")
+def dataset(request):
+    return datasets.generate(datasets.parse_size(request.config.getoption("--dataset-size")))
+
+
+@pytest.fixture(scope="session")
+def store(dataset):
+    from database import fake_store
+
+    if fake_store.rows("bookings"):
+        return fake_store
+    datasets.seed_store(fake_store, dataset)
+    return fake_store
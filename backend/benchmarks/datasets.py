@@ -0,0 +1,203 @@
+"""Deterministic seed datasets for benchmarks and load tests.
+
+``generate(bookings)`` builds every table the API reads, scaled from the
+number of bookings, from a fixed random seed so that runs against the same
+size are comparable. The datasets can be loaded straight into the
+in-memory backend (``seed_store``) or written out as JSON lines, one file
+per table, for loading into a real database.
+
+Usage:
+    python benchmarks/datasets.py --size 100k --out /tmp/careops-100k
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+import uuid
+from datetime import date, datetime, timedelta
+from typing import Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+SIZES = {"1k": 1_000, "100k": 100_000, "1m": 1_000_000}
+
+# Login used by the load-test scenarios
+ADMIN_EMAIL = "bench-admin@careops.dev"
+ADMIN_PASSWORD = "benchmark-password"
+
+SERVICES = ["Consultation", "Follow-up", "Therapy Session", "Assessment", "Home Visit", "Group Class"]
+LOCATIONS = ["Main Clinic", "North Branch", "South Branch", "Online"]
+DURATIONS = ["30 min", "45 min", "60 min", "90 min"]
+BOOKING_STATUSES = ["pending", "confirmed", "completed", "cancelled", "no-show"]
+BOOKING_WEIGHTS = [25, 30, 35, 7, 3]
+CATEGORIES = ["Consumables", "Equipment", "Medication", "Office"]
+
+
+def parse_size(value: str) -> int:
+    """``1k``/``100k``/``1m`` or a plain row count"""
+    return SIZES.get(value.lower()) or int(value)
+
+
+def _timestamp(day: date, rng: random.Random) -> str:
+    return datetime(day.year, day.month, day.day, rng.randrange(24), rng.randrange(60)).isoformat()
+
+
+def _admin_hash() -> str:
+    # Same scheme as auth.pwd_context, without importing the app
+    from passlib.context import CryptContext
+    return CryptContext(schemes=["bcrypt"]).hash(ADMIN_PASSWORD)
+
+
+def generate(bookings: int, seed: int = 42, today: date = None) -> Dict[str, List[dict]]:
+    """Rows for every table, with ``bookings`` bookings spread over a year
+    centred on ``today``"""
+    rng = random.Random(seed)
+    today = today or date.today()
+
+    def new_id() -> str:
+        return str(uuid.UUID(int=rng.getrandbits(128), version=4))
+
+    def day_offset(days: int) -> date:
+        return today + timedelta(days=rng.randrange(-days, days + 1))
+
+    created = _timestamp(today - timedelta(days=400), rng)
+    admin = {
+        "id": new_id(), "email": ADMIN_EMAIL, "password_hash": _admin_hash(), "username": "bench-admin",
+        "phone_number": None, "role": "admin", "role_title": "Administrator", "permissions": [],
+        "status": "active", "joined_date": created, "last_active": None, "last_login": None,
+        "created_at": created, "updated_at": created,
+    }
+    staff = [
+        {
+            **admin, "id": new_id(), "email": f"staff{i}@careops.dev", "username": f"staff{i}",
+            "role": "staff", "role_title": "Staff Member", "permissions": [],
+            "status": "active" if i % 10 else "inactive",
+        }
+        for i in range(max(5, bookings // 5000))
+    ]
+    users = [admin, *staff]
+    staff_ids = [member["id"] for member in staff]
+
+    booking_rows = []
+    times = [f"{h % 12 or 12}:{m:02d} {'AM' if h < 12 else 'PM'}" for h in range(8, 18) for m in (0, 30)]
+    for i in range(bookings):
+        day = day_offset(182)
+        stamp = _timestamp(day - timedelta(days=rng.randrange(1, 30)), rng)
+        booking_rows.append({
+            "id": new_id(),
+            "customer_name": f"Customer {i}",
+            "customer_email": f"customer{i}@example.com",
+            "customer_phone": f"555-{i % 10000:04d}",
+            "service": rng.choice(SERVICES),
+            "date": day.isoformat(),
+            "time": rng.choice(times),
+            "duration": rng.choice(DURATIONS),
+            "location": rng.choice(LOCATIONS),
+            "status": rng.choices(BOOKING_STATUSES, BOOKING_WEIGHTS)[0],
+            "assigned_staff_id": rng.choice(staff_ids) if rng.random() < 0.8 else None,
+            "notes": None,
+            "created_by": admin["id"],
+            "created_at": stamp,
+            "updated_at": stamp,
+        })
+
+    contacts = []
+    for i in range(max(10, bookings // 10)):
+        stamp = _timestamp(day_offset(365), rng)
+        contacts.append({
+            "id": new_id(), "name": f"Customer {i}", "email": f"customer{i}@example.com",
+            "phone": f"555-{i % 10000:04d}", "status": "active" if rng.random() < 0.9 else "inactive",
+            "tags": rng.sample(["vip", "new", "referral", "follow-up"], rng.randrange(3)),
+            "bookings_count": rng.randrange(20), "total_revenue": round(rng.uniform(0, 5000), 2),
+            "last_interaction": stamp, "notes": None, "created_at": stamp, "updated_at": stamp,
+        })
+
+    inventory = []
+    for i in range(200):
+        available, threshold = rng.randrange(0, 200), rng.randrange(5, 40)
+        status = "critical" if available == 0 else "low" if available <= threshold else "normal"
+        inventory.append({
+            "id": new_id(), "name": f"Item {i:03d}", "category": rng.choice(CATEGORIES),
+            "available": available, "reserved": 0, "threshold": threshold, "status": status,
+            "usage_per_booking": rng.choice([0.5, 1.0, 2.0]), "supplier": f"Supplier {i % 12}",
+            "unit_price": round(rng.uniform(1, 250), 2), "last_restocked": created,
+            "created_at": created, "updated_at": created,
+        })
+
+    forms = []
+    for i in range(max(10, bookings // 20)):
+        booking = rng.choice(booking_rows)
+        fields = rng.randrange(3, 20)
+        completed = rng.randrange(fields + 1)
+        forms.append({
+            "id": new_id(), "name": "Intake Form", "customer_name": booking["customer_name"],
+            "booking_id": booking["id"], "status": rng.choice(["pending", "completed", "overdue"]),
+            "progress": completed * 100 // fields, "fields": fields, "completed_fields": completed,
+            "submitted_at": None, "template_data": {}, "form_data": {}, "created_by": admin["id"],
+            "created_at": booking["created_at"], "updated_at": booking["created_at"],
+        })
+
+    conversations, messages = [], []
+    for i in range(50):
+        conversation_id = new_id()
+        sent = []
+        for j in range(20):
+            sent.append({
+                "id": new_id(), "conversation_id": conversation_id, "sender_id": admin["id"],
+                "sender_name": admin["username"], "text": f"Message {j} in conversation {i}",
+                "is_read": rng.random() < 0.7, "is_me": rng.random() < 0.5,
+                "created_at": _timestamp(day_offset(30), rng),
+            })
+        sent.sort(key=lambda message: message["created_at"])
+        for message in sent:
+            message["seq"] = len(messages) + 1
+            messages.append(message)
+        conversations.append({
+            "id": conversation_id, "name": f"Conversation {i}", "participants": [admin["id"]],
+            "last_message": sent[-1]["text"], "last_message_time": sent[-1]["created_at"],
+            "status": "active", "created_at": created, "updated_at": sent[-1]["created_at"],
+        })
+
+    return {
+        "users": users,
+        "bookings": booking_rows,
+        "contacts": contacts,
+        "inventory": inventory,
+        "forms": forms,
+        "conversations": conversations,
+        "messages": messages,
+    }
+
+
+def seed_store(store, data: Dict[str, List[dict]]):
+    """Load a dataset into a ``fake_supabase.FakeStore``"""
+    for table, rows in data.items():
+        store.seed(table, rows)
+
+
+def write_jsonl(data: Dict[str, List[dict]], directory: str):
+    os.makedirs(directory, exist_ok=True)
+    for table, rows in data.items():
+        with open(os.path.join(directory, f"{table}.jsonl"), "w") as f:
+            for row in rows:
+                f.write(json.dumps(row) + "\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", default="1k", help="1k, 100k, 1m or a booking count")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--out", required=True, help="directory for <table>.jsonl files")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    data = generate(parse_size(args.size), args.seed)
+    write_jsonl(data, args.out)
+    counts = ", ".join(f"{table} {len(rows)}" for table, rows in data.items())
+    print(f"Wrote {counts} to {args.out} in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
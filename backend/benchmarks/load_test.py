@@ -0,0 +1,235 @@
+"""End-to-end load test: concurrent virtual users running API scenarios.
+
+Scenarios:
+    flow     login -> list bookings (two pages) -> dashboard
+    routers  one read from every router with an existing token
+
+By default the app runs in-process on the in-memory backend, seeded with
+the ``--size`` dataset from ``datasets.py`` and ``--latency-ms`` of
+simulated database round-trip. ``--base-url`` points the same scenarios at
+a running server instead (seed its database from ``datasets.py --out``).
+Results are written as JSON for ``report.py`` to compare across runs.
+
+Usage:
+    python benchmarks/load_test.py --size 100k --users 50 --duration 30 --out results/100k.json
+    python benchmarks/load_test.py --base-url http://localhost:8000 --users 20 --out results/staging.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from datetime import date, datetime
+from typing import Dict, List
+
+import httpx
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import datasets  # noqa: E402
+
+
+def percentile(ordered: List[float], q: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not ordered:
+        return 0.0
+    rank = max(0, min(len(ordered) - 1, round(q / 100 * len(ordered) + 0.5) - 1))
+    return ordered[rank]
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+        self.iterations = 0
+
+    async def call(self, client: httpx.AsyncClient, step: str, method: str, url: str, **kwargs) -> httpx.Response:
+        start = time.perf_counter()
+        try:
+            response = await client.request(method, url, **kwargs)
+        except httpx.HTTPError:
+            self.errors[step] += 1
+            raise
+        self.latencies[step].append(time.perf_counter() - start)
+        if response.status_code >= 400:
+            self.errors[step] += 1
+        return response
+
+    def summary(self, elapsed: float) -> dict:
+        steps = {}
+        for step, values in sorted(self.latencies.items()):
+            ordered = sorted(values)
+            steps[step] = {
+                "count": len(ordered),
+                "errors": self.errors[step],
+                "rps": len(ordered) / elapsed,
+                "mean_ms": sum(ordered) / len(ordered) * 1000,
+                "p50_ms": percentile(ordered, 50) * 1000,
+                "p95_ms": percentile(ordered, 95) * 1000,
+                "p99_ms": percentile(ordered, 99) * 1000,
+                "max_ms": ordered[-1] * 1000,
+            }
+        requests = sum(step["count"] for step in steps.values())
+        return {
+            "elapsed_s": elapsed,
+            "iterations": self.iterations,
+            "requests": requests,
+            "errors": sum(self.errors.values()),
+            "throughput_rps": requests / elapsed,
+            "steps": steps,
+        }
+
+
+async def login(client: httpx.AsyncClient, recorder: Recorder) -> dict:
+    response = await recorder.call(
+        client, "POST /auth/login", "POST", "/auth/login",
+        json={"email": datasets.ADMIN_EMAIL, "password": datasets.ADMIN_PASSWORD},
+    )
+    response.raise_for_status()
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+async def flow(client: httpx.AsyncClient, recorder: Recorder, context: dict):
+    headers = await login(client, recorder)
+    page = await recorder.call(client, "GET /bookings", "GET", "/bookings", params={"limit": 50}, headers=headers)
+    cursor = page.json().get("next_cursor") if page.status_code == 200 else None
+    if cursor:
+        await recorder.call(
+            client, "GET /bookings?cursor", "GET", "/bookings",
+            params={"limit": 50, "cursor": cursor}, headers=headers,
+        )
+    await recorder.call(client, "GET /analytics/dashboard", "GET", "/analytics/dashboard", headers=headers)
+
+
+ROUTER_READS = [
+    ("/auth/me", {}),
+    ("/bookings", {"limit": 50}),
+    ("/bookings/availability", {"date": date.today().isoformat()}),
+    ("/bookings/series", {}),
+    ("/contacts", {"limit": 50}),
+    ("/contacts/search", {"q": "customer 12"}),
+    ("/inventory", {}),
+    ("/inventory/alerts", {}),
+    ("/inventory/forecast", {}),
+    ("/staff", {}),
+    ("/forms", {}),
+    ("/analytics/dashboard", {}),
+    ("/analytics/revenue", {}),
+    ("/analytics/timeseries", {"granularity": "week", "group_by": "staff"}),
+    ("/analytics/bookings/by-status", {}),
+    ("/inbox/conversations", {}),
+]
+
+
+async def routers(client: httpx.AsyncClient, recorder: Recorder, context: dict):
+    for path, params in ROUTER_READS:
+        await recorder.call(client, f"GET {path}", "GET", path, params=params, headers=context["headers"])
+
+
+SCENARIOS = {"flow": flow, "routers": routers}
+
+
+@asynccontextmanager
+async def in_process_client(size: int, latency_ms: float):
+    """An httpx client wired straight to the app on a seeded memory backend"""
+    os.environ["DATABASE_BACKEND"] = "memory"
+    os.environ["FAKE_DB_LATENCY_MS"] = str(latency_ms)
+    os.environ.setdefault("SECRET_KEY", "benchmark-secret-key")
+    import main
+    from database import fake_store
+
+    datasets.seed_store(fake_store, datasets.generate(size))
+    async with main.app.router.lifespan_context(main.app):
+        # Measure steady state, not the startup rebuild of the projections
+        while not all(p.loaded for p in (main.booking_counters, main.availability_index, main.series_index, main.contact_search)):
+            await asyncio.sleep(0.1)
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://careops.test", timeout=60) as client:
+            yield client
+
+
+async def run(client: httpx.AsyncClient, scenario: str, users: int, duration: float) -> dict:
+    recorder = Recorder()
+    context = {"headers": await login(client, Recorder())}
+    # One unrecorded pass fills the response and principal caches
+    await SCENARIOS[scenario](client, Recorder(), context)
+    deadline = time.perf_counter() + duration
+
+    async def virtual_user():
+        while time.perf_counter() < deadline:
+            try:
+                await SCENARIOS[scenario](client, recorder, context)
+                recorder.iterations += 1
+            except httpx.HTTPError:
+                pass
+
+    start = time.perf_counter()
+    await asyncio.gather(*(virtual_user() for _ in range(users)))
+    return recorder.summary(time.perf_counter() - start)
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scenario", choices=[*SCENARIOS, "all"], default="all")
+    parser.add_argument("--base-url", help="test a running server instead of the in-process app")
+    parser.add_argument("--size", default="1k", help="bookings to seed in-process: 1k, 100k, 1m or a count")
+    parser.add_argument("--latency-ms", type=float, default=2.0, help="simulated database round-trip in-process")
+    parser.add_argument("--users", type=int, default=20, help="concurrent virtual users")
+    parser.add_argument("--duration", type=float, default=20.0, help="seconds per scenario")
+    parser.add_argument("--label", help="name for this run in reports (default: git revision)")
+    parser.add_argument("--out", help="write results as JSON to this file")
+    args = parser.parse_args()
+
+    if args.base_url:
+        client_context = httpx.AsyncClient(base_url=args.base_url, timeout=60)
+    else:
+        print(f"Seeding {args.size} bookings into the in-memory backend...")
+        client_context = in_process_client(datasets.parse_size(args.size), args.latency_ms)
+
+    scenarios = list(SCENARIOS) if args.scenario == "all" else [args.scenario]
+    results = {
+        "label": args.label or git_revision(),
+        "revision": git_revision(),
+        "started_at": datetime.now().isoformat(),
+        "target": args.base_url or "in-process",
+        "size": args.size,
+        "latency_ms": None if args.base_url else args.latency_ms,
+        "users": args.users,
+        "python": platform.python_version(),
+        "scenarios": {},
+    }
+    async with client_context as client:
+        for scenario in scenarios:
+            summary = await run(client, scenario, args.users, args.duration)
+            results["scenarios"][scenario] = summary
+            print(
+                f"{scenario}: {summary['iterations']} iterations, {summary['requests']} requests "
+                f"({summary['throughput_rps']:.1f} req/s), {summary['errors']} errors"
+            )
+            for step, stats in summary["steps"].items():
+                print(f"  {step:<36} p50 {stats['p50_ms']:8.1f} ms  p99 {stats['p99_ms']:8.1f} ms  {stats['rps']:7.1f} req/s")
+
+    if args.out:
+        os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+        with open(args.out, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Wrote {args.out}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,86 @@
+"""Compare load-test results across runs.
+
+The first file is the baseline; every other run is shown with its change
+against it per scenario step. With ``--fail-above`` the exit status is 1
+when any step's p99 latency grew (or throughput dropped) by more than that
+percentage, so a deploy pipeline can stop on a regression.
+
+Usage:
+    python benchmarks/report.py results/main.json results/branch.json --fail-above 15
+"""
+import argparse
+import json
+import sys
+from typing import List, Optional
+
+
+def _change(base: float, value: float) -> Optional[float]:
+    return (value - base) / base * 100 if base else None
+
+
+def _fmt_change(change: Optional[float]) -> str:
+    return "" if change is None else f"({change:+.0f}%)"
+
+
+def compare(runs: List[dict], fail_above: Optional[float]) -> List[str]:
+    """Print a comparison table and return the regressions found"""
+    baseline, regressions = runs[0], []
+    print("Runs: " + ", ".join(
+        f"{run['label']} [{run['target']}, size {run['size']}, {run['users']} users]" for run in runs
+    ))
+    for scenario, base in baseline["scenarios"].items():
+        print(f"\n{scenario}")
+        header = f"  {'step':<36}" + "".join(f"{run['label'][:30]:>44}" for run in runs)
+        print(header)
+        print(f"  {'':<36}" + f"{'p50 ms':>12}{'p99 ms':>18}{'req/s':>14}" * len(runs))
+        rows = [("throughput", base)] + list(base["steps"].items())
+        for step, base_stats in rows:
+            line = f"  {step:<36}"
+            for run in runs:
+                current = run["scenarios"].get(scenario)
+                stats = current if step == "throughput" else (current or {}).get("steps", {}).get(step)
+                if stats is None:
+                    line += f"{'-':>44}"
+                    continue
+                if step == "throughput":
+                    rps_change = _change(base_stats["throughput_rps"], stats["throughput_rps"])
+                    line += f"{'':>30}{stats['throughput_rps']:>8.1f}{_fmt_change(rps_change):>6}"
+                    p99_change = None
+                else:
+                    p99_change = _change(base_stats["p99_ms"], stats["p99_ms"])
+                    rps_change = _change(base_stats["rps"], stats["rps"])
+                    line += (
+                        f"{stats['p50_ms']:>12.1f}"
+                        f"{stats['p99_ms']:>10.1f}{_fmt_change(p99_change):>8}"
+                        f"{stats['rps']:>8.1f}{_fmt_change(rps_change):>6}"
+                    )
+                if fail_above is not None and run is not baseline:
+                    if p99_change is not None and p99_change > fail_above:
+                        regressions.append(f"{run['label']} {scenario} {step}: p99 {p99_change:+.0f}%")
+                    if rps_change is not None and -rps_change > fail_above:
+                        regressions.append(f"{run['label']} {scenario} {step}: throughput {rps_change:+.0f}%")
+            print(line)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("results", nargs="+", help="load_test.py JSON files, baseline first")
+    parser.add_argument("--fail-above", type=float, help="regression threshold in percent")
+    args = parser.parse_args()
+
+    runs = []
+    for path in args.results:
+        with open(path) as f:
+            runs.append(json.load(f))
+
+    regressions = compare(runs, args.fail_above)
+    if regressions:
+        print("\nRegressions:")
+        for regression in regressions:
+            print(f"  {regression}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""Micro-benchmarks for functions on every request's path.
+
+Usage:
+    pytest benchmarks/ --benchmark-autosave
+    pytest benchmarks/ --benchmark-compare --benchmark-compare-fail=mean:10%
+"""
+import asyncio
+from datetime import date
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from fastapi.security import HTTPAuthorizationCredentials  # noqa: E402
+
+import datasets  # noqa: E402
+from app.routes.booking_routes import format_booking  # noqa: E402
+from app.routes.inventory_routes import calculate_status  # noqa: E402
+from auth import create_access_token, get_current_user, principal_cache  # noqa: E402
+from contact_search import ContactSearchIndex  # noqa: E402
+from database import db  # noqa: E402
+from forecast import ForecastBuilder  # noqa: E402
+from timeseries import TimeSeriesBuilder  # noqa: E402
+
+
+@pytest.fixture(scope="module")
+def loop():
+    loop = asyncio.new_event_loop()
+    yield loop
+    loop.close()
+
+
+@pytest.fixture(scope="module")
+def admin_credentials(store):
+    admin = next(u for u in store.rows("users") if u["email"] == datasets.ADMIN_EMAIL)
+    token = create_access_token({"sub": admin["email"], "user_id": admin["id"]})
+    return admin, HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+
+
+def test_calculate_status(benchmark, dataset):
+    levels = [(item["available"], item["threshold"]) for item in dataset["inventory"]]
+
+    def run():
+        return [calculate_status(available, threshold) for available, threshold in levels]
+
+    statuses = benchmark(run)
+    assert len(statuses) == len(levels)
+
+
+def test_format_booking_page(benchmark, dataset):
+    # One page of list results as PostgREST returns them, with the staff embed
+    page = [
+        {**booking, "assigned_staff": {"username": "staff1"} if booking["assigned_staff_id"] else None}
+        for booking in dataset["bookings"][:50]
+    ]
+
+    formatted = benchmark(lambda: [format_booking(booking) for booking in page])
+    assert "assigned_staff" not in formatted[0]
+
+
+def test_timeseries_weekly_by_staff(benchmark, dataset):
+    bookings = dataset["bookings"]
+    start = min(booking["date"] for booking in bookings)
+    end = max(booking["date"] for booking in bookings)
+
+    def run():
+        builder = TimeSeriesBuilder(date.fromisoformat(start), date.fromisoformat(end), "week", "staff")
+        builder.add(bookings)
+        return builder.result()
+
+    result = benchmark(run)
+    assert sum(sum(series["total"]) for series in result["series"]) == len(bookings)
+
+
+def test_forecast_inventory(benchmark, dataset):
+    items = dataset["inventory"]
+    upcoming = [booking for booking in dataset["bookings"] if booking["date"] >= date.today().isoformat()]
+    materials = [{"service": service, "item_id": item["id"], "quantity": 1} for service in datasets.SERVICES for item in items[:5]]
+
+    def run():
+        builder = ForecastBuilder(date.today(), 56, 28, 7, 1.65)
+        builder.add_items(items)
+        builder.add_materials(materials)
+        builder.add_bookings(upcoming)
+        return builder.compute()
+
+    rows = benchmark(run)
+    assert len(rows) == len(items)
+
+
+def test_search_contacts(benchmark, dataset):
+    index = ContactSearchIndex()
+    index.build(dataset["contacts"])
+    contact = dataset["contacts"][-1]
+
+    results = benchmark(lambda: index.search(contact["name"], 10))
+    assert results[0]["id"] == contact["id"]
+
+
+def test_get_current_user_cached(benchmark, loop, admin_credentials):
+    admin, credentials = admin_credentials
+    loop.run_until_complete(get_current_user(credentials, db))
+
+    user = benchmark(lambda: loop.run_until_complete(get_current_user(credentials, db)))
+    assert user["id"] == admin["id"]
+
+
+def test_get_current_user_uncached(benchmark, loop, admin_credentials):
+    # Token decode plus the users lookup, as after a principal cache expiry
+    admin, credentials = admin_credentials
+
+    def run():
+        principal_cache.invalidate(admin["id"])
+        return loop.run_until_complete(get_current_user(credentials, db))
+
+    user = benchmark(run)
+    assert user["id"] == admin["id"]
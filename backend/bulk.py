@@ -0,0 +1,79 @@
+"""Bulk import helpers.
+
+Request bodies are parsed incrementally and handed to the caller in
+fixed-size chunks, so an import is validated and inserted one chunk at a
+time and a large CSV upload never has to be held in memory as a whole.
+"""
+import codecs
+import csv
+from typing import AsyncIterator, List
+
+from pydantic import ValidationError
+
+
+async def _csv_records(body: AsyncIterator[bytes]):
+    # Yield complete CSV records, keeping quoted newlines inside one record
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    pending = ""
+    record: List[str] = []
+    async for chunk in body:
+        pending += decoder.decode(chunk)
+        *lines, pending = pending.split("\n")
+        for line in lines:
+            record.append(line)
+            text = "\n".join(record)
+            if text.count('"') % 2 == 0:
+                record = []
+                yield text
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        record.append(pending)
+    if record:
+        yield "\n".join(record)
+
+
+async def csv_rows(body: AsyncIterator[bytes]) -> AsyncIterator[dict]:
+    """Parse a streamed CSV body into dicts keyed by the header row.
+
+    Empty cells are left out so the model's defaults apply.
+    """
+    header = None
+    async for text in _csv_records(body):
+        if not text.strip():
+            continue
+        values = next(csv.reader([text]))
+        if header is None:
+            header = [column.strip() for column in values]
+            continue
+        yield {column: value for column, value in zip(header, values) if value != ""}
+
+
+async def iter_chunks(rows, size: int):
+    """Group a sync or async iterable of rows into lists of up to ``size``"""
+    chunk = []
+    if hasattr(rows, "__aiter__"):
+        async for row in rows:
+            chunk.append(row)
+            if len(chunk) == size:
+                yield chunk
+                chunk = []
+    else:
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) == size:
+                yield chunk
+                chunk = []
+    if chunk:
+        yield chunk
+
+
+def validate_row(model: type, row) -> tuple:
+    """Validate one input row, returning ``(instance, None)`` or ``(None, errors)``"""
+    try:
+        return model.model_validate(row), None
+    except ValidationError as e:
+        return None, [
+            f"{'.'.join(str(part) for part in error['loc']) or 'row'}: {error['msg']}"
+            for error in e.errors()
+        ]
+
@@ -3,14 +3,17 @@ from typing import List
 
 class Settings(BaseSettings):
     # Supabase
-    SUPABASE_URL: str
-    SUPABASE_KEY: str
-    SUPABASE_SERVICE_KEY: str
+    SUPABASE_URL: str = ""
+    SUPABASE_KEY: str = ""
+    SUPABASE_SERVICE_KEY: str = ""
     
     # JWT
     SECRET_KEY: str
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 10080  # 7 days
+    PRINCIPAL_CACHE_SIZE: int = 10000
+    PRINCIPAL_CACHE_TTL_SECONDS: int = 60
+    PASSWORD_HASH_WORKERS: int = 4  # concurrent bcrypt operations
     
     # CORS
     ALLOWED_ORIGINS: str = "https://careops-01.netlify.app/"
@@ -19,7 +22,54 @@ class Settings(BaseSettings):
     APP_NAME: str = "CareOps API"
     APP_VERSION: str = "1.0.0"
     DEBUG: bool = True
-    
+
+    # Database
+    DATABASE_BACKEND: str = "supabase"  # "supabase" or "memory" (fake_supabase, for local runs and benchmarks)
+    FAKE_DB_LATENCY_MS: float = 0.0  # simulated round-trip time for the memory backend
+    FAKE_DB_JITTER_MS: float = 0.0
+    DB_POOL_SIZE: int = 16  # max concurrent PostgREST round-trips per process
+    DEFAULT_PAGE_SIZE: int = 50
+    MAX_PAGE_SIZE: int = 500
+    EXPORT_PAGE_SIZE: int = 1000
+    MESSAGE_BATCH_LIMIT: int = 100
+    BULK_INSERT_CHUNK_SIZE: int = 500  # rows per insert in bulk imports
+    BULK_IMPORT_MAX_ROWS: int = 50000
+
+    # Response cache
+    RESPONSE_CACHE_BACKEND: str = "memory"  # "memory" or "redis"
+    RESPONSE_CACHE_REDIS_URL: str = "redis://localhost:6379/0"
+    RESPONSE_CACHE_SIZE: int = 1000
+    RESPONSE_CACHE_TTL_SECONDS: int = 30
+
+    # Streaming (SSE)
+    STREAM_QUEUE_SIZE: int = 100  # events buffered per slow subscriber
+    STREAM_KEEPALIVE_SECONDS: int = 15
+
+    # Background jobs
+    BOOKING_COUNTERS_RECONCILE_SECONDS: int = 300
+    AVAILABILITY_RECONCILE_SECONDS: int = 300
+    SERIES_RECONCILE_SECONDS: int = 300
+    REVENUE_RECONCILE_SECONDS: int = 300
+    STOCK_ALERTS_RECONCILE_SECONDS: int = 60
+    FORECAST_REFRESH_SECONDS: int = 3600
+    CONTACT_SEARCH_RECONCILE_SECONDS: int = 300
+
+    # Inventory forecast
+    FORECAST_HISTORY_DAYS: int = 56  # consumption history read
+    FORECAST_HORIZON_DAYS: int = 28  # upcoming bookings read
+    FORECAST_LEAD_TIME_DAYS: int = 7  # restocking lead time thresholds cover
+    FORECAST_SAFETY_FACTOR: float = 1.65  # deviations of safety stock (~95% service level)
+
+    # Low-stock alerts (logged when no webhook URL is set)
+    STOCK_ALERT_WEBHOOK_URL: str = ""
+    STOCK_ALERT_WEBHOOK_TIMEOUT_SECONDS: float = 5.0
+
+    # Scheduling
+    BUSINESS_HOURS_START: str = "08:00"
+    BUSINESS_HOURS_END: str = "18:00"
+    SLOT_INTERVAL_MINUTES: int = 30
+    SERIES_WINDOW_DAYS: int = 90  # series expansion when a date range is open-ended
+
     @property
     def cors_origins(self) -> List[str]:
         return [origin.strip() for origin in self.ALLOWED_ORIGINS.split(",")]
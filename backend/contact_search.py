@@ -0,0 +1,384 @@
+"""In-process search index over contacts' names, emails and phone numbers.
+
+Text is folded to lowercase ASCII and split into terms, runs of letters or
+of digits: the words of the name and email address, plus the phone number's
+digits in full and their last 10, 7 and 4, so a number can be found from
+its start, its local number or its last digits. A query is split the same
+way, except that digit runs separated only by spaces, dots, dashes or
+parentheses are joined, so '555-0070' and '(555) 007-0' are one phone term.
+Each query term matches
+
+- the same term (scores 1),
+- every term it is a prefix of (scores up to 1, closer in length scoring
+  higher), or
+- failing those, words sharing most of its trigrams, for typos (scores at
+  most 0.5; digits aren't matched fuzzily).
+
+A contact must match every query term and scores the sum of its best match
+per term; ties are broken by name.
+
+The index ``load`` builds is a few NumPy arrays rather than a Python object
+per posting: the sorted distinct terms, and for each term the slots of the
+contacts containing it, as offsets into one array. Prefixes are binary
+searches on the terms, and a query term's matches become a dense array of
+scores over every slot. Contacts written since live in a small overlay of
+Python dicts, with their old slots masked out until the next rebuild.
+"""
+import asyncio
+import heapq
+import re
+import unicodedata
+from bisect import bisect_left, insort
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, List, Optional, Set, Tuple, Union
+
+import numpy as np
+
+from pagination import iter_keyset
+from projection import Projection
+from repository import AsyncDatabase
+
+_WORD_RE = re.compile(r"[a-z]+|[0-9]+")
+_NON_DIGIT_RE = re.compile(r"\D")
+# Punctuation inside a phone number as it is typed
+_PHONE_GAP_RE = re.compile(r"(?<=\d)[\s().-]+(?=\d)")
+
+# Longer terms are cut to this length, in the index and in queries
+MAX_TERM_LENGTH = 24
+# Longer names are cut to this length for ordering ties
+NAME_KEY_LENGTH = 32
+# Minimum trigram (Dice) similarity of a fuzzy match
+FUZZY_SIMILARITY = 0.4
+# Contacts per NumPy chunk while building
+BUILD_CHUNK_SIZE = 50_000
+
+# One score, or one per slot
+Score = Union[float, np.ndarray]
+# A query term's matches: base slots with their scores, and overlay terms
+# with theirs
+Expansion = Tuple[List[Tuple[np.ndarray, Score]], Dict[str, float]]
+# (score, name key, contact id)
+Match = Tuple[float, str, str]
+
+
+def fold(text: Optional[str]) -> str:
+    """Lowercase ASCII: accents dropped, so 'José' matches 'jose'"""
+    if not text or text.isascii():
+        return (text or "").lower()
+    decomposed = unicodedata.normalize("NFKD", text)
+    return decomposed.encode("ascii", "ignore").decode().lower()
+
+
+def query_terms(text: str) -> List[str]:
+    joined = _PHONE_GAP_RE.sub("", fold(text))
+    return list(dict.fromkeys(term[:MAX_TERM_LENGTH] for term in _WORD_RE.findall(joined)))
+
+
+def contact_terms(contact: dict) -> List[str]:
+    terms = _WORD_RE.findall(fold(f"{contact.get('name') or ''} {contact.get('email') or ''}"))
+    digits = _NON_DIGIT_RE.sub("", contact.get("phone") or "")
+    if digits:
+        terms += [digits, digits[-10:], digits[-7:], digits[-4:]]
+    return list(dict.fromkeys(terms))
+
+
+def name_key(contact: dict) -> str:
+    return fold(contact.get("name"))[:NAME_KEY_LENGTH]
+
+
+def trigrams(term: str) -> List[str]:
+    padded = f"${term}$"
+    return list({padded[i:i + 3] for i in range(len(padded) - 2)})
+
+
+def prefix_score(query_length: int, term_length: int) -> float:
+    """Score of a term matched by a query term of ``query_length`` letters"""
+    return 1.0 if term_length == query_length else 0.5 + 0.5 * query_length / term_length
+
+
+class IndexBuilder:
+    """Tokenizes contacts into NumPy chunks for ``ContactSearchIndex``"""
+
+    def __init__(self):
+        self.chunks: List[Tuple[np.ndarray, ...]] = []
+        self.count = 0
+        self._terms: List[str] = []
+        self._slots: List[int] = []
+        self._ids: List[str] = []
+        self._names: List[str] = []
+
+    def add(self, contact: dict):
+        # The fixed-width array truncates terms to MAX_TERM_LENGTH
+        terms = contact_terms(contact)
+        self._terms.extend(terms)
+        self._slots.extend([self.count] * len(terms))
+        self._ids.append(contact["id"])
+        self._names.append(name_key(contact))
+        self.count += 1
+
+    @property
+    def full(self) -> bool:
+        return len(self._ids) >= BUILD_CHUNK_SIZE
+
+    def flush(self):
+        """Convert the contacts added since to a chunk; CPU-bound, so
+        ``load`` runs it in a thread"""
+        # The chunk's distinct terms, and per posting the index of its term
+        terms, codes = np.unique(np.array(self._terms, dtype=f"S{MAX_TERM_LENGTH}"), return_inverse=True)
+        self.chunks.append((
+            terms,
+            codes.astype(np.int32),
+            np.array(self._slots, dtype=np.int32),
+            np.array(self._ids, dtype="S36"),
+            np.array([name.encode() for name in self._names], dtype=f"S{NAME_KEY_LENGTH}"),
+        ))
+        self._terms, self._slots, self._ids, self._names = [], [], [], []
+
+    def compile(self) -> Dict[str, object]:
+        """The index's arrays; CPU-bound like ``flush``"""
+        self.flush()
+        chunks, self.chunks = self.chunks, []
+        unique = np.unique(np.concatenate([chunk[0] for chunk in chunks]))
+        inverse = np.concatenate([
+            np.searchsorted(unique, terms).astype(np.int32)[codes] for terms, codes, *_ in chunks
+        ])
+        slots, ids, names = (np.concatenate(parts) for parts in list(zip(*chunks))[2:])
+        del chunks
+        grams: Dict[str, Set[str]] = defaultdict(set)
+        # Terms are all letters or all digits, and letters sort after digits
+        for term in unique[np.searchsorted(unique, b"a"):]:
+            word = term.decode()
+            for gram in trigrams(word):
+                grams[gram].add(word)
+        name_ranks = np.empty(len(names), dtype=np.int32)
+        name_ranks[np.argsort(names)] = np.arange(len(names), dtype=np.int32)
+        return {
+            "terms": unique,
+            "term_lengths": np.char.str_len(unique),
+            "offsets": np.concatenate(([0], np.cumsum(np.bincount(inverse, minlength=len(unique))))),
+            "postings": slots[np.argsort(inverse, kind="stable")],
+            "ids": ids,
+            "id_order": np.argsort(ids),
+            "names": names,
+            "name_ranks": name_ranks,
+            "grams": grams,
+        }
+
+
+class ContactSearchIndex(Projection):
+    """Inverted index from terms to contacts"""
+
+    def __init__(self):
+        super().__init__()
+        # Writes made while a rebuild reads the table, replayed on top of it
+        self._pending: Optional[List[Tuple[str, dict]]] = None
+        self._install(IndexBuilder().compile())
+
+    def _install(self, compiled: Dict[str, object]):
+        # Built from the database; a contact's slot is its position in ids
+        self.terms = compiled["terms"]
+        self.term_lengths = compiled["term_lengths"]
+        self.offsets = compiled["offsets"]
+        self.postings = compiled["postings"]
+        self.ids = compiled["ids"]
+        self.names = compiled["names"]
+        self.name_ranks = compiled["name_ranks"]
+        self.alive = np.ones(len(self.ids), dtype=bool)
+        self._id_order = compiled["id_order"]
+        # Trigram -> words, for fuzzy matches
+        self.grams = compiled["grams"]
+        # Contacts written since: (id, name key) per overlay slot
+        self.recent: List[Optional[Tuple[str, str]]] = []
+        self.recent_slots: Dict[str, int] = {}
+        self.recent_postings: Dict[str, List[int]] = {}
+        self.recent_terms: List[str] = []
+
+    def build(self, contacts: Iterable[dict]):
+        """Index ``contacts`` from scratch, dropping the overlay"""
+        builder = IndexBuilder()
+        for contact in contacts:
+            builder.add(contact)
+            if builder.full:
+                builder.flush()
+        self._install(builder.compile())
+
+    def count(self) -> int:
+        return int(self.alive.sum()) + len(self.recent_slots)
+
+    def _base_slot(self, contact_id: str) -> Optional[int]:
+        key = contact_id.encode()
+        position = int(np.searchsorted(self.ids, key, sorter=self._id_order))
+        if position < len(self.ids) and self.ids[self._id_order[position]] == key:
+            return int(self._id_order[position])
+        return None
+
+    def _drop(self, contact_id: str):
+        slot = self.recent_slots.pop(contact_id, None)
+        if slot is not None:
+            self.recent[slot] = None
+            return
+        slot = self._base_slot(contact_id)
+        if slot is not None:
+            self.alive[slot] = False
+
+    def _add(self, contact: dict):
+        self._drop(contact["id"])
+        slot = len(self.recent)
+        self.recent.append((contact["id"], name_key(contact)))
+        self.recent_slots[contact["id"]] = slot
+        for term in dict.fromkeys(term[:MAX_TERM_LENGTH] for term in contact_terms(contact)):
+            postings = self.recent_postings.get(term)
+            if postings is None:
+                postings = self.recent_postings[term] = []
+                insort(self.recent_terms, term)
+                if term.isalpha():
+                    for gram in trigrams(term):
+                        self.grams[gram].add(term)
+            postings.append(slot)
+
+    def add(self, contact: dict):
+        """Index a created or updated contact"""
+        if self._pending is not None:
+            self._pending.append(("add", contact))
+        if self.loaded:
+            self._add(contact)
+
+    def remove(self, contact_id: str):
+        if self._pending is not None:
+            self._pending.append(("remove", {"id": contact_id}))
+        if self.loaded:
+            self._drop(contact_id)
+
+    def _base_prefix(self, query_term: str) -> List[Tuple[np.ndarray, Score]]:
+        """Slots of every base term starting with ``query_term``, with their scores"""
+        key = query_term.encode()
+        start = int(np.searchsorted(self.terms, key))
+        end = int(np.searchsorted(self.terms, key + b"\xff"))
+        if start == end:
+            return []
+        # Postings are stored term by term, so the prefix's are one slice
+        slots = self.postings[self.offsets[start]:self.offsets[end]]
+        lengths = self.term_lengths[start:end]
+        if end - start == 1:
+            return [(slots, prefix_score(len(query_term), int(lengths[0])))]
+        scores = np.where(lengths == len(query_term), 1.0, 0.5 + 0.5 * len(query_term) / lengths)
+        return [(slots, np.repeat(scores.astype(np.float32), np.diff(self.offsets[start:end + 1])))]
+
+    def _base_index(self, term: str) -> Optional[int]:
+        key = term.encode()
+        position = int(np.searchsorted(self.terms, key))
+        if position < len(self.terms) and self.terms[position] == key:
+            return position
+        return None
+
+    def _expand(self, query_term: str) -> Expansion:
+        """Terms ``query_term`` matches, with their scores"""
+        base = self._base_prefix(query_term)
+        start = bisect_left(self.recent_terms, query_term)
+        end = bisect_left(self.recent_terms, query_term + "\x7f", start)
+        recent = {term: prefix_score(len(query_term), len(term)) for term in self.recent_terms[start:end]}
+        if base or recent or len(query_term) < 3 or not query_term.isalpha():
+            return base, recent
+
+        grams = trigrams(query_term)
+        shared = Counter(term for gram in grams for term in self.grams.get(gram, ()))
+        for term, count in shared.items():
+            similarity = 2 * count / (len(grams) + len(term))
+            if similarity < FUZZY_SIMILARITY:
+                continue
+            index = self._base_index(term)
+            if index is not None:
+                base.append((self.postings[self.offsets[index]:self.offsets[index + 1]], 0.5 * similarity))
+            if term in self.recent_postings:
+                recent[term] = 0.5 * similarity
+        return base, recent
+
+    def _base_scores(self, groups: List[Tuple[np.ndarray, Score]]) -> np.ndarray:
+        """Best score per base slot, 0 where nothing matched"""
+        scores = np.zeros(len(self.ids), dtype=np.float32)
+        for slots, score in groups:
+            np.maximum.at(scores, slots, score)
+        return scores
+
+    def _base_matches(self, expanded: List[Expansion], limit: int) -> List[Match]:
+        bases = [base for base, _ in expanded]
+        if not all(bases):
+            return []
+        # Candidates are the contacts matching the rarest query term; every
+        # match of every term is considered, so none is cut before the AND
+        rarest = min(bases, key=lambda groups: sum(len(slots) for slots, _ in groups))
+        matched = np.zeros(len(self.ids), dtype=bool)
+        for slots, _ in rarest:
+            matched[slots] = True
+        candidates = np.flatnonzero(matched & self.alive)
+        scores = np.zeros(len(candidates), dtype=np.float32)
+        for base in bases:
+            term_scores = self._base_scores(base)[candidates]
+            matched = term_scores > 0
+            candidates, scores = candidates[matched], scores[matched] + term_scores[matched]
+        if len(candidates) > limit:
+            # Those above the limit-th best score, then the first names among its ties
+            kth = -np.partition(-scores, limit - 1)[limit - 1]
+            above = np.flatnonzero(scores > kth)
+            tied = np.flatnonzero(scores == kth)
+            needed = limit - len(above)
+            if len(tied) > needed:
+                tied = tied[np.argpartition(self.name_ranks[candidates[tied]], needed - 1)[:needed]]
+            keep = np.concatenate((above, tied))
+            candidates, scores = candidates[keep], scores[keep]
+        order = np.lexsort((self.name_ranks[candidates], -scores))
+        return [
+            (float(scores[i]), self.names[candidates[i]].decode(), self.ids[candidates[i]].decode())
+            for i in order
+        ]
+
+    def _recent_matches(self, expanded: List[Expansion]) -> List[Match]:
+        totals: Optional[Dict[int, float]] = None
+        for _, recent in expanded:
+            best: Dict[int, float] = {}
+            for term, score in recent.items():
+                for slot in self.recent_postings.get(term, ()):
+                    if self.recent[slot] is not None and score > best.get(slot, 0.0):
+                        best[slot] = score
+            if totals is None:
+                totals = best
+            else:
+                totals = {slot: total + best[slot] for slot, total in totals.items() if slot in best}
+            if not totals:
+                return []
+        return [(score, self.recent[slot][1], self.recent[slot][0]) for slot, score in totals.items()]
+
+    def search(self, query: str, limit: int = 10) -> List[dict]:
+        """Top ``limit`` contacts matching every term of ``query``, best
+        first, as ``{id, score}``"""
+        terms = query_terms(query)
+        if not terms:
+            return []
+        expanded = [self._expand(term) for term in terms]
+        found = self._base_matches(expanded, limit) + self._recent_matches(expanded)
+        best = heapq.nsmallest(limit, found, key=lambda match: (-match[0], match[1]))
+        return [{"id": contact_id, "score": round(score, 3)} for score, _, contact_id in best]
+
+    async def load(self, supabase: AsyncDatabase):
+        builder = IndexBuilder()
+        self._pending = []
+        try:
+            rows = iter_keyset(
+                lambda: supabase.table("contacts").select("id,name,email,phone"), [("id", False)], page_size=1000
+            )
+            async for contact in rows:
+                builder.add(contact)
+                if builder.full:
+                    await asyncio.to_thread(builder.flush)
+            compiled = await asyncio.to_thread(builder.compile)
+            self._install(compiled)
+            for action, contact in self._pending:
+                if action == "add":
+                    self._add(contact)
+                else:
+                    self._drop(contact["id"])
+        finally:
+            self._pending = None
+
+
+contact_search = ContactSearchIndex()
@@ -0,0 +1,61 @@
+"""Incrementally maintained booking counters.
+
+Booking handlers apply deltas on every write so the stats endpoints answer
+from memory; the periodic rebuild corrects drift.
+"""
+from collections import Counter
+
+from pagination import iter_keyset
+from projection import Projection
+from repository import AsyncDatabase
+
+
+class BookingCounters(Projection):
+    """Booking counts per status, per service and per day"""
+
+    def __init__(self):
+        super().__init__()
+        self.total = 0
+        self.by_status = Counter()
+        self.by_service = Counter()
+        self.by_day = Counter()
+
+    def _apply(self, booking: dict, sign: int):
+        self.total += sign
+        for counter, key in (
+            (self.by_status, booking.get("status")),
+            (self.by_service, booking.get("service")),
+            (self.by_day, booking.get("date")),
+        ):
+            counter[key] += sign
+            if counter[key] <= 0:
+                del counter[key]
+
+    def add(self, booking: dict):
+        if self.loaded:
+            self._apply(booking, 1)
+
+    def remove(self, booking: dict):
+        if self.loaded:
+            self._apply(booking, -1)
+
+    def replace(self, old: dict, new: dict):
+        self.remove(old)
+        self.add(new)
+
+    async def load(self, supabase: AsyncDatabase):
+        fresh = BookingCounters()
+        rows = iter_keyset(
+            lambda: supabase.table("bookings").select("id,status,service,date"),
+            [("id", False)],
+            page_size=1000,
+        )
+        async for booking in rows:
+            fresh._apply(booking, 1)
+        self.total = fresh.total
+        self.by_status = fresh.by_status
+        self.by_service = fresh.by_service
+        self.by_day = fresh.by_day
+
+
+booking_counters = BookingCounters()
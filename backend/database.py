@@ -1,15 +1,28 @@
 from supabase import create_client, Client
 from config import settings
-from fastapi import Depends
+from repository import AsyncDatabase, create_executor
 
 # Initialize Supabase client
-supabase: Client = create_client(settings.SUPABASE_URL, settings.SUPABASE_KEY)
-supabase_admin: Client = create_client(settings.SUPABASE_URL, settings.SUPABASE_SERVICE_KEY)
+if settings.DATABASE_BACKEND == "memory":
+    from fake_supabase import FakeClient, FakeStore
 
-def get_supabase() -> Client:
-    """Dependency to get Supabase client"""
-    return supabase
+    # Both clients share one store, like they share one database
+    fake_store = FakeStore(settings.FAKE_DB_LATENCY_MS, settings.FAKE_DB_JITTER_MS)
+    supabase: Client = FakeClient(fake_store)
+    supabase_admin: Client = FakeClient(fake_store)
+else:
+    supabase: Client = create_client(settings.SUPABASE_URL, settings.SUPABASE_KEY)
+    supabase_admin: Client = create_client(settings.SUPABASE_URL, settings.SUPABASE_SERVICE_KEY)
 
-def get_supabase_admin() -> Client:
-    """Dependency to get Supabase admin client"""
-    return supabase_admin
+# Shared bounded pool for blocking PostgREST calls
+db_executor = create_executor(settings.DB_POOL_SIZE)
+db = AsyncDatabase(supabase, db_executor)
+db_admin = AsyncDatabase(supabase_admin, db_executor)
+
+def get_supabase() -> AsyncDatabase:
+    """Dependency to get async Supabase client"""
+    return db
+
+def get_supabase_admin() -> AsyncDatabase:
+    """Dependency to get async Supabase admin client"""
+    return db_admin
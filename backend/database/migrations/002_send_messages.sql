@@ -0,0 +1,45 @@
+-- Atomic message send
+-- Inserts messages and bumps their conversations in a single round-trip
+-- and a single transaction. Run this in Supabase SQL Editor after 001.
+
+-- Align messages with what the API writes
+ALTER TABLE messages ADD COLUMN IF NOT EXISTS is_me BOOLEAN DEFAULT TRUE;
+ALTER TABLE messages ALTER COLUMN sender_name DROP NOT NULL;
+
+CREATE INDEX IF NOT EXISTS idx_messages_conversation_created
+    ON messages(conversation_id, created_at);
+
+-- p_messages: JSON array of {id, conversation_id, text, is_me, created_at}
+CREATE OR REPLACE FUNCTION send_messages(p_messages JSONB)
+RETURNS SETOF messages
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    RETURN QUERY
+    WITH inserted AS (
+        INSERT INTO messages (id, conversation_id, text, is_me, created_at)
+        SELECT m.id, m.conversation_id, m.text, COALESCE(m.is_me, TRUE), COALESCE(m.created_at, NOW())
+        FROM jsonb_to_recordset(p_messages)
+            AS m(id UUID, conversation_id UUID, text TEXT, is_me BOOLEAN, created_at TIMESTAMP)
+        RETURNING *
+    ),
+    latest AS (
+        SELECT DISTINCT ON (i.conversation_id) i.conversation_id, i.text, i.created_at
+        FROM inserted i
+        ORDER BY i.conversation_id, i.created_at DESC
+    ),
+    bumped AS (
+        UPDATE conversations c
+        SET last_message = latest.text,
+            last_message_time = latest.created_at,
+            updated_at = NOW()
+        FROM latest
+        WHERE c.id = latest.conversation_id
+    )
+    SELECT * FROM inserted;
+END;
+$$;
+
+GRANT EXECUTE ON FUNCTION send_messages(JSONB) TO authenticated, service_role;
+
+NOTIFY pgrst, 'reload schema';
@@ -0,0 +1,41 @@
+-- Recurring booking series
+-- A series stores one booking template plus a recurrence rule; the API
+-- generates its occurrences on read. Only occurrences that were changed or
+-- cancelled get a row in booking_series_exceptions.
+
+CREATE TABLE IF NOT EXISTS booking_series (
+    id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+    customer_name VARCHAR(255) NOT NULL,
+    customer_email VARCHAR(255),
+    customer_phone VARCHAR(20),
+    service VARCHAR(255) NOT NULL,
+    starts_on DATE NOT NULL,
+    time VARCHAR(20) NOT NULL,
+    duration VARCHAR(20) DEFAULT '60 min',
+    location VARCHAR(500) NOT NULL,
+    status VARCHAR(20) DEFAULT 'pending' CHECK (status IN ('pending', 'confirmed', 'completed', 'cancelled', 'no-show')),
+    assigned_staff_id UUID REFERENCES users(id),
+    notes TEXT,
+    -- {"freq": "daily|weekly|monthly", "interval": 1, "weekdays": [0, 2], "until": "2026-12-31", "count": null}
+    rule JSONB NOT NULL,
+    created_by UUID REFERENCES users(id),
+    created_at TIMESTAMP DEFAULT NOW(),
+    updated_at TIMESTAMP DEFAULT NOW()
+);
+
+-- Keyed by the date the occurrence was originally due
+CREATE TABLE IF NOT EXISTS booking_series_exceptions (
+    id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+    series_id UUID NOT NULL REFERENCES booking_series(id) ON DELETE CASCADE,
+    occurrence_date DATE NOT NULL,
+    cancelled BOOLEAN DEFAULT FALSE,
+    -- Booking fields that differ from the series, e.g. {"date": "...", "time": "..."}
+    overrides JSONB DEFAULT '{}'::jsonb,
+    updated_at TIMESTAMP DEFAULT NOW(),
+    UNIQUE (series_id, occurrence_date)
+);
+
+CREATE INDEX IF NOT EXISTS idx_booking_series_created_at ON booking_series(created_at);
+
+CREATE TRIGGER update_booking_series_updated_at BEFORE UPDATE ON booking_series
+    FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
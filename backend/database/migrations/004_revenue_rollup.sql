@@ -0,0 +1,66 @@
+-- Revenue rollup
+-- Revenue per day and service, maintained by the API as bookings are
+-- completed (or stop being completed), priced from a service catalog.
+-- Run this in Supabase SQL Editor after 003.
+
+CREATE TABLE IF NOT EXISTS services (
+    id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+    name VARCHAR(255) UNIQUE NOT NULL,
+    price DECIMAL(10, 2) NOT NULL DEFAULT 0,
+    created_at TIMESTAMP DEFAULT NOW(),
+    updated_at TIMESTAMP DEFAULT NOW()
+);
+
+CREATE TRIGGER update_services_updated_at BEFORE UPDATE ON services
+    FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
+
+-- Existing services keep the flat 120 the API used to assume until real
+-- prices are set
+INSERT INTO services (name, price)
+SELECT DISTINCT service, 120.00 FROM bookings
+ON CONFLICT (name) DO NOTHING;
+
+-- Price charged, fixed when the booking is completed so later catalog
+-- changes don't rewrite past revenue
+ALTER TABLE bookings ADD COLUMN IF NOT EXISTS price DECIMAL(10, 2);
+
+UPDATE bookings b SET price = s.price
+FROM services s
+WHERE b.status = 'completed' AND b.price IS NULL AND s.name = b.service;
+
+CREATE TABLE IF NOT EXISTS revenue_daily (
+    id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+    day DATE NOT NULL,
+    service VARCHAR(255) NOT NULL,
+    bookings INTEGER NOT NULL DEFAULT 0,
+    revenue DECIMAL(12, 2) NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT NOW(),
+    UNIQUE (day, service)
+);
+
+INSERT INTO revenue_daily (day, service, bookings, revenue)
+SELECT date, service, COUNT(*), COALESCE(SUM(price), 0)
+FROM bookings
+WHERE status = 'completed'
+GROUP BY date, service
+ON CONFLICT (day, service) DO NOTHING;
+
+-- p_deltas: JSON array of {day, service, bookings, revenue} increments,
+-- at most one per (day, service)
+CREATE OR REPLACE FUNCTION record_revenue(p_deltas JSONB)
+RETURNS SETOF revenue_daily
+LANGUAGE sql
+AS $$
+    INSERT INTO revenue_daily AS r (day, service, bookings, revenue)
+    SELECT d.day, d.service, d.bookings, d.revenue
+    FROM jsonb_to_recordset(p_deltas) AS d(day DATE, service VARCHAR, bookings INTEGER, revenue DECIMAL)
+    ON CONFLICT (day, service) DO UPDATE
+    SET bookings = r.bookings + EXCLUDED.bookings,
+        revenue = r.revenue + EXCLUDED.revenue,
+        updated_at = NOW()
+    RETURNING *;
+$$;
+
+GRANT EXECUTE ON FUNCTION record_revenue(JSONB) TO authenticated, service_role;
+
+NOTIFY pgrst, 'reload schema';
@@ -0,0 +1,33 @@
+-- Booking counts for analytics time series
+-- Counts bookings per day and status (and optionally staff member, location
+-- or service) in the database, so a year of bookings reaches the API as a
+-- few thousand counts instead of every row.
+-- Run this in Supabase SQL Editor after 004.
+
+-- p_group: 'assigned_staff_id', 'location', 'service' or NULL (no grouping)
+CREATE OR REPLACE FUNCTION booking_counts(p_from DATE, p_to DATE, p_group TEXT DEFAULT NULL)
+RETURNS JSONB
+LANGUAGE sql
+STABLE
+AS $$
+    -- One JSON value rather than a set of rows, so PostgREST's row limit
+    -- doesn't cut the result short
+    SELECT COALESCE(jsonb_agg(c), '[]'::jsonb)
+    FROM (
+        SELECT date,
+               status,
+               CASE p_group
+                   WHEN 'assigned_staff_id' THEN assigned_staff_id::TEXT
+                   WHEN 'location' THEN location
+                   WHEN 'service' THEN service
+               END AS "group",
+               COUNT(*) AS bookings
+        FROM bookings
+        WHERE date BETWEEN p_from AND p_to
+        GROUP BY 1, 2, 3
+    ) c;
+$$;
+
+GRANT EXECUTE ON FUNCTION booking_counts(DATE, DATE, TEXT) TO authenticated, service_role;
+
+NOTIFY pgrst, 'reload schema';
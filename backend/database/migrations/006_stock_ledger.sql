@@ -0,0 +1,209 @@
+-- Stock ledger
+-- Every change to on-hand stock is a row in stock_movements, applied by
+-- apply_stock_movements under a row lock so concurrent adjustments can't
+-- lose updates. Stock held for upcoming bookings is kept in
+-- stock_reservations with its per-item total in inventory.reserved, and
+-- status is computed by a trigger from the stock that is left free.
+-- Run this in Supabase SQL Editor after 005.
+
+ALTER TABLE inventory ADD COLUMN IF NOT EXISTS reserved INTEGER NOT NULL DEFAULT 0;
+
+CREATE TABLE IF NOT EXISTS stock_movements (
+    id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+    item_id UUID NOT NULL REFERENCES inventory(id) ON DELETE CASCADE,
+    delta INTEGER NOT NULL,
+    balance INTEGER NOT NULL, -- available after the movement
+    reason VARCHAR(20) NOT NULL CHECK (reason IN ('adjustment', 'restock', 'consumption', 'stocktake')),
+    booking_id UUID REFERENCES bookings(id) ON DELETE SET NULL,
+    note TEXT,
+    created_by UUID REFERENCES users(id) ON DELETE SET NULL,
+    created_at TIMESTAMP DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_stock_movements_item ON stock_movements(item_id, created_at);
+
+-- No cascade on booking_id: held stock has to be released, not dropped,
+-- before its booking goes (migration 010 does it in a delete trigger)
+CREATE TABLE IF NOT EXISTS stock_reservations (
+    id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+    item_id UUID NOT NULL REFERENCES inventory(id) ON DELETE CASCADE,
+    booking_id UUID NOT NULL REFERENCES bookings(id),
+    quantity INTEGER NOT NULL CHECK (quantity > 0),
+    created_at TIMESTAMP DEFAULT NOW(),
+    UNIQUE (item_id, booking_id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_stock_reservations_booking ON stock_reservations(booking_id);
+
+-- Same rule as inventory_routes.calculate_status, on the unreserved stock
+CREATE OR REPLACE FUNCTION set_inventory_status()
+RETURNS TRIGGER AS $$
+BEGIN
+    NEW.status = CASE
+        WHEN NEW.available - NEW.reserved <= 0 THEN 'critical'
+        WHEN NEW.available - NEW.reserved <= NEW.threshold THEN 'low'
+        ELSE 'normal'
+    END;
+    RETURN NEW;
+END;
+$$ language 'plpgsql';
+
+CREATE TRIGGER set_inventory_status BEFORE INSERT OR UPDATE ON inventory
+    FOR EACH ROW EXECUTE FUNCTION set_inventory_status();
+
+-- Every function below returns {"items": [...], "missing": [...],
+-- "shortages": [...]}: the changed inventory rows when everything applied,
+-- otherwise the unknown item (or booking) ids and the items without enough
+-- stock, with nothing changed.
+
+-- p_movements: JSON array of {item_id, delta, reason, booking_id, note,
+-- created_by}; a "count" instead of a delta records a stocktake that sets
+-- the stock to what was counted. Removing stock can't dig into what is
+-- reserved; a stocktake can set any count from zero up.
+CREATE OR REPLACE FUNCTION apply_stock_movements(p_movements JSONB)
+RETURNS JSONB
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    m RECORD;
+    item inventory;
+    change INTEGER;
+    touched UUID[] := '{}';
+    missing UUID[] := '{}';
+    shortages JSONB := '[]'::jsonb;
+BEGIN
+    BEGIN
+        -- Items are locked in id order so concurrent batches can't deadlock
+        FOR m IN
+            SELECT (e->>'item_id')::UUID AS item_id,
+                   (e->>'delta')::INTEGER AS delta,
+                   (e->>'count')::INTEGER AS counted,
+                   e->>'reason' AS reason,
+                   (e->>'booking_id')::UUID AS booking_id,
+                   e->>'note' AS note,
+                   (e->>'created_by')::UUID AS created_by
+            FROM jsonb_array_elements(p_movements) WITH ORDINALITY AS x(e, n)
+            ORDER BY 1, x.n
+        LOOP
+            SELECT * INTO item FROM inventory WHERE id = m.item_id FOR UPDATE;
+            IF NOT FOUND THEN
+                missing := missing || m.item_id;
+                CONTINUE;
+            END IF;
+            change := COALESCE(m.counted - item.available, m.delta);
+            IF item.available + change < 0 OR (m.counted IS NULL AND change < 0 AND item.available + change < item.reserved) THEN
+                shortages := shortages || jsonb_build_object(
+                    'item_id', item.id, 'available', item.available, 'reserved', item.reserved, 'delta', change
+                );
+                CONTINUE;
+            END IF;
+            UPDATE inventory
+            SET available = available + change,
+                last_restocked = CASE WHEN m.reason = 'restock' THEN NOW() ELSE last_restocked END
+            WHERE id = item.id
+            RETURNING * INTO item;
+            INSERT INTO stock_movements (item_id, delta, balance, reason, booking_id, note, created_by)
+            VALUES (item.id, change, item.available, m.reason, m.booking_id, m.note, m.created_by);
+            touched := touched || item.id;
+        END LOOP;
+        IF cardinality(missing) > 0 OR jsonb_array_length(shortages) > 0 THEN
+            RAISE EXCEPTION 'stock movements rejected';
+        END IF;
+    EXCEPTION WHEN raise_exception THEN
+        -- Rolls back the movements already applied; the variables keep the
+        -- problems found
+        RETURN jsonb_build_object('items', '[]'::jsonb, 'missing', to_jsonb(missing), 'shortages', shortages);
+    END;
+    RETURN jsonb_build_object(
+        'items', (SELECT COALESCE(jsonb_agg(i), '[]'::jsonb) FROM inventory i WHERE i.id = ANY(touched)),
+        'missing', '[]'::jsonb,
+        'shortages', '[]'::jsonb
+    );
+END;
+$$;
+
+-- Hold p_quantity of an item for a booking, replacing what it held
+-- before; 0 releases it
+CREATE OR REPLACE FUNCTION reserve_stock(p_item_id UUID, p_booking_id UUID, p_quantity INTEGER)
+RETURNS JSONB
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    item inventory;
+    held INTEGER;
+BEGIN
+    SELECT * INTO item FROM inventory WHERE id = p_item_id FOR UPDATE;
+    IF NOT FOUND THEN
+        RETURN jsonb_build_object('items', '[]'::jsonb, 'missing', jsonb_build_array(p_item_id), 'shortages', '[]'::jsonb);
+    END IF;
+    IF p_quantity > 0 AND NOT EXISTS (SELECT 1 FROM bookings WHERE id = p_booking_id) THEN
+        RETURN jsonb_build_object('items', '[]'::jsonb, 'missing', jsonb_build_array(p_booking_id), 'shortages', '[]'::jsonb);
+    END IF;
+    SELECT quantity INTO held FROM stock_reservations WHERE item_id = p_item_id AND booking_id = p_booking_id;
+    held := COALESCE(held, 0);
+    IF item.available - item.reserved - (p_quantity - held) < 0 THEN
+        RETURN jsonb_build_object('items', '[]'::jsonb, 'missing', '[]'::jsonb, 'shortages', jsonb_build_array(
+            jsonb_build_object('item_id', item.id, 'available', item.available, 'reserved', item.reserved, 'delta', held - p_quantity)
+        ));
+    END IF;
+    IF p_quantity > 0 THEN
+        INSERT INTO stock_reservations (item_id, booking_id, quantity)
+        VALUES (p_item_id, p_booking_id, p_quantity)
+        ON CONFLICT (item_id, booking_id) DO UPDATE SET quantity = EXCLUDED.quantity;
+    ELSE
+        DELETE FROM stock_reservations WHERE item_id = p_item_id AND booking_id = p_booking_id;
+    END IF;
+    UPDATE inventory SET reserved = reserved + p_quantity - held WHERE id = p_item_id RETURNING * INTO item;
+    RETURN jsonb_build_object('items', jsonb_build_array(to_jsonb(item)), 'missing', '[]'::jsonb, 'shortages', '[]'::jsonb);
+END;
+$$;
+
+-- Drop every reservation of a booking. With p_consume the held stock is
+-- used up (a consumption movement per item), otherwise it is freed.
+CREATE OR REPLACE FUNCTION settle_reservations(p_booking_id UUID, p_consume BOOLEAN, p_created_by UUID DEFAULT NULL)
+RETURNS JSONB
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    r RECORD;
+    item inventory;
+    used INTEGER;
+    touched UUID[] := '{}';
+BEGIN
+    FOR r IN
+        SELECT item_id, quantity FROM stock_reservations WHERE booking_id = p_booking_id ORDER BY item_id FOR UPDATE
+    LOOP
+        SELECT * INTO item FROM inventory WHERE id = r.item_id FOR UPDATE;
+        -- A stocktake may have left less than was held
+        used := CASE WHEN p_consume THEN LEAST(r.quantity, item.available) ELSE 0 END;
+        UPDATE inventory
+        SET reserved = GREATEST(reserved - r.quantity, 0),
+            available = available - used
+        WHERE id = r.item_id
+        RETURNING * INTO item;
+        IF used > 0 THEN
+            INSERT INTO stock_movements (item_id, delta, balance, reason, booking_id, created_by)
+            VALUES (item.id, -used, item.available, 'consumption', p_booking_id, p_created_by);
+        END IF;
+        touched := touched || item.id;
+    END LOOP;
+    DELETE FROM stock_reservations WHERE booking_id = p_booking_id;
+    RETURN jsonb_build_object(
+        'items', (SELECT COALESCE(jsonb_agg(i), '[]'::jsonb) FROM inventory i WHERE i.id = ANY(touched)),
+        'missing', '[]'::jsonb,
+        'shortages', '[]'::jsonb
+    );
+END;
+$$;
+
+GRANT EXECUTE ON FUNCTION apply_stock_movements(JSONB) TO authenticated, service_role;
+GRANT EXECUTE ON FUNCTION reserve_stock(UUID, UUID, INTEGER) TO authenticated, service_role;
+GRANT EXECUTE ON FUNCTION settle_reservations(UUID, BOOLEAN, UUID) TO authenticated, service_role;
+
+-- Opening balances, so the ledger sums to the current stock
+INSERT INTO stock_movements (item_id, delta, balance, reason, note)
+SELECT id, available, available, 'stocktake', 'Opening balance'
+FROM inventory
+WHERE NOT EXISTS (SELECT 1 FROM stock_movements s WHERE s.item_id = inventory.id);
+
+NOTIFY pgrst, 'reload schema';
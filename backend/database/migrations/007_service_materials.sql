@@ -0,0 +1,65 @@
+-- Bills of materials
+-- The stock each service uses up, consumed in one call when a booking of
+-- that service is completed.
+-- Run this in Supabase SQL Editor after 006.
+
+CREATE TABLE IF NOT EXISTS service_materials (
+    id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+    service VARCHAR(255) NOT NULL,
+    item_id UUID NOT NULL REFERENCES inventory(id) ON DELETE CASCADE,
+    quantity INTEGER NOT NULL CHECK (quantity > 0),
+    created_at TIMESTAMP DEFAULT NOW(),
+    UNIQUE (service, item_id)
+);
+
+-- Consume what a completed booking used: the stock it held and, for items
+-- it held none of, its service's bill of materials. The stock is already
+-- used, so this never fails for lack of it; consumption stops at zero.
+-- p_booking_id is NULL for series occurrences, which hold no stock.
+CREATE OR REPLACE FUNCTION consume_booking_stock(
+    p_booking_id UUID, p_service TEXT, p_created_by UUID DEFAULT NULL, p_note TEXT DEFAULT NULL
+)
+RETURNS JSONB
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    line RECORD;
+    item inventory;
+    used INTEGER;
+    touched UUID[] := '{}';
+BEGIN
+    -- Items are locked in id order, as in apply_stock_movements
+    FOR line IN
+        SELECT COALESCE(r.item_id, m.item_id) AS item_id,
+               COALESCE(r.quantity, 0) AS held,
+               COALESCE(r.quantity, m.quantity) AS quantity
+        FROM (SELECT item_id, quantity FROM stock_reservations WHERE booking_id = p_booking_id) r
+        FULL JOIN (SELECT item_id, quantity FROM service_materials WHERE service = p_service) m
+            ON m.item_id = r.item_id
+        ORDER BY 1
+    LOOP
+        SELECT * INTO item FROM inventory WHERE id = line.item_id FOR UPDATE;
+        used := LEAST(line.quantity, GREATEST(item.available, 0));
+        UPDATE inventory
+        SET available = available - used,
+            reserved = GREATEST(reserved - line.held, 0)
+        WHERE id = item.id
+        RETURNING * INTO item;
+        IF used > 0 THEN
+            INSERT INTO stock_movements (item_id, delta, balance, reason, booking_id, note, created_by)
+            VALUES (item.id, -used, item.available, 'consumption', p_booking_id, p_note, p_created_by);
+        END IF;
+        touched := touched || item.id;
+    END LOOP;
+    DELETE FROM stock_reservations WHERE booking_id = p_booking_id;
+    RETURN jsonb_build_object(
+        'items', (SELECT COALESCE(jsonb_agg(i), '[]'::jsonb) FROM inventory i WHERE i.id = ANY(touched)),
+        'missing', '[]'::jsonb,
+        'shortages', '[]'::jsonb
+    );
+END;
+$$;
+
+GRANT EXECUTE ON FUNCTION consume_booking_stock(UUID, TEXT, UUID, TEXT) TO authenticated, service_role;
+
+NOTIFY pgrst, 'reload schema';
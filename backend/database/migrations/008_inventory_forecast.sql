@@ -0,0 +1,39 @@
+-- Inventory forecast
+-- Per-item depletion forecasts and suggested thresholds, recomputed in one
+-- batch by the API's forecast job and served from this table.
+-- Run this in Supabase SQL Editor after 007.
+
+CREATE TABLE IF NOT EXISTS inventory_forecast (
+    id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+    item_id UUID NOT NULL UNIQUE REFERENCES inventory(id) ON DELETE CASCADE,
+    available INTEGER NOT NULL, -- stock the forecast started from
+    daily_usage NUMERIC(12, 3) NOT NULL,
+    days_left INTEGER NOT NULL, -- capped; depletion_date is NULL at the cap
+    depletion_date DATE,
+    suggested_threshold INTEGER NOT NULL,
+    computed_at TIMESTAMP NOT NULL DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_inventory_forecast_days_left ON inventory_forecast(days_left, id);
+
+-- Units consumed per item and day since p_from, so the job reads one row
+-- per (item, day) instead of every movement
+CREATE OR REPLACE FUNCTION stock_consumption(p_from DATE)
+RETURNS JSONB
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT COALESCE(jsonb_agg(jsonb_build_object(
+        'item_id', item_id, 'date', day, 'used', used
+    )), '[]'::jsonb)
+    FROM (
+        SELECT item_id, created_at::date AS day, -SUM(delta) AS used
+        FROM stock_movements
+        WHERE reason = 'consumption' AND created_at >= p_from
+        GROUP BY item_id, created_at::date
+    ) usage;
+$$;
+
+GRANT EXECUTE ON FUNCTION stock_consumption(DATE) TO authenticated, service_role;
+
+NOTIFY pgrst, 'reload schema';
@@ -0,0 +1,96 @@
+-- Revenue rollup triggers
+-- revenue_daily follows booking changes in the transaction that makes
+-- them, so a failed follow-up call can't lose an increment and two
+-- concurrent completions of one booking can't both count it: each
+-- trigger diffs the row as it was (OLD) against the row as written (NEW).
+-- Run this in Supabase SQL Editor after 008.
+
+-- A completed booking earns its price on its date
+CREATE OR REPLACE FUNCTION booking_revenue()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    IF TG_OP = 'UPDATE'
+        AND (OLD.status, OLD.date, OLD.service, OLD.price) IS NOT DISTINCT FROM (NEW.status, NEW.date, NEW.service, NEW.price)
+    THEN
+        RETURN NULL;
+    END IF;
+    -- Separate calls: record_revenue takes at most one delta per (day, service)
+    IF TG_OP <> 'INSERT' AND OLD.status = 'completed' THEN
+        PERFORM record_revenue(jsonb_build_array(jsonb_build_object(
+            'day', OLD.date, 'service', OLD.service, 'bookings', -1, 'revenue', -COALESCE(OLD.price, 0)
+        )));
+    END IF;
+    IF TG_OP <> 'DELETE' AND NEW.status = 'completed' THEN
+        PERFORM record_revenue(jsonb_build_array(jsonb_build_object(
+            'day', NEW.date, 'service', NEW.service, 'bookings', 1, 'revenue', COALESCE(NEW.price, 0)
+        )));
+    END IF;
+    RETURN NULL;
+END;
+$$;
+
+CREATE TRIGGER bookings_revenue AFTER INSERT OR UPDATE OR DELETE ON bookings
+    FOR EACH ROW EXECUTE FUNCTION booking_revenue();
+
+-- A series occurrence with an exception row is its series with the
+-- overrides applied; occurrences without one are not counted
+CREATE OR REPLACE FUNCTION occurrence_revenue()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    s booking_series;
+    old_overrides JSONB;
+    new_overrides JSONB;
+BEGIN
+    SELECT * INTO s FROM booking_series WHERE id = COALESCE(NEW.series_id, OLD.series_id);
+    IF NOT FOUND THEN
+        RETURN NULL;
+    END IF;
+    IF TG_OP <> 'INSERT' AND OLD.cancelled IS NOT TRUE THEN
+        old_overrides := COALESCE(OLD.overrides, '{}'::jsonb);
+    END IF;
+    IF TG_OP <> 'DELETE' AND NEW.cancelled IS NOT TRUE THEN
+        new_overrides := COALESCE(NEW.overrides, '{}'::jsonb);
+    END IF;
+    IF old_overrides IS NOT NULL AND COALESCE(old_overrides->>'status', s.status) = 'completed' THEN
+        PERFORM record_revenue(jsonb_build_array(jsonb_build_object(
+            'day', COALESCE((old_overrides->>'date')::DATE, OLD.occurrence_date),
+            'service', COALESCE(old_overrides->>'service', s.service),
+            'bookings', -1,
+            'revenue', -COALESCE((old_overrides->>'price')::DECIMAL, 0)
+        )));
+    END IF;
+    IF new_overrides IS NOT NULL AND COALESCE(new_overrides->>'status', s.status) = 'completed' THEN
+        PERFORM record_revenue(jsonb_build_array(jsonb_build_object(
+            'day', COALESCE((new_overrides->>'date')::DATE, NEW.occurrence_date),
+            'service', COALESCE(new_overrides->>'service', s.service),
+            'bookings', 1,
+            'revenue', COALESCE((new_overrides->>'price')::DECIMAL, 0)
+        )));
+    END IF;
+    RETURN NULL;
+END;
+$$;
+
+CREATE TRIGGER booking_series_exceptions_revenue AFTER INSERT OR UPDATE OR DELETE ON booking_series_exceptions
+    FOR EACH ROW EXECUTE FUNCTION occurrence_revenue();
+
+-- Exceptions are deleted before their series, rather than by the foreign
+-- key cascade, so occurrence_revenue still finds the series
+CREATE OR REPLACE FUNCTION delete_series_exceptions()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    DELETE FROM booking_series_exceptions WHERE series_id = OLD.id;
+    RETURN OLD;
+END;
+$$;
+
+CREATE TRIGGER booking_series_delete_exceptions BEFORE DELETE ON booking_series
+    FOR EACH ROW EXECUTE FUNCTION delete_series_exceptions();
+
+NOTIFY pgrst, 'reload schema';
@@ -0,0 +1,91 @@
+-- Booking stock triggers
+-- Stock follows booking status changes in the transaction that makes
+-- them: completing a booking consumes what it used, cancelling it or
+-- marking it no-show frees what it held, and deleting it frees the stock
+-- before the row goes. The change is read from OLD, so concurrent
+-- requests completing the same booking consume its stock once, and a
+-- booking that already has consumption movements isn't consumed again
+-- when it is reopened and completed a second time.
+-- Run this in Supabase SQL Editor after 009.
+
+-- Who last changed the booking; stock movements the triggers record are theirs
+ALTER TABLE bookings ADD COLUMN IF NOT EXISTS updated_by UUID REFERENCES users(id);
+
+CREATE INDEX IF NOT EXISTS idx_stock_movements_consumed_booking
+    ON stock_movements(booking_id) WHERE reason = 'consumption';
+
+CREATE OR REPLACE FUNCTION booking_stock()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    IF NEW.status IS NOT DISTINCT FROM OLD.status THEN
+        RETURN NULL;
+    END IF;
+    IF NEW.status = 'completed' THEN
+        IF NOT EXISTS (
+            SELECT 1 FROM stock_movements WHERE booking_id = NEW.id AND reason = 'consumption'
+        ) THEN
+            PERFORM consume_booking_stock(NEW.id, NEW.service, NEW.updated_by);
+        END IF;
+    ELSIF NEW.status IN ('cancelled', 'no-show') THEN
+        PERFORM settle_reservations(NEW.id, FALSE, NEW.updated_by);
+    END IF;
+    RETURN NULL;
+END;
+$$;
+
+CREATE TRIGGER bookings_stock AFTER UPDATE OF status ON bookings
+    FOR EACH ROW EXECUTE FUNCTION booking_stock();
+
+-- Reservations reference the booking, so they are freed before it is
+-- deleted; if the delete fails, so does this
+CREATE OR REPLACE FUNCTION release_booking_stock()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    PERFORM settle_reservations(OLD.id, FALSE, NULL);
+    RETURN OLD;
+END;
+$$;
+
+CREATE TRIGGER bookings_release_stock BEFORE DELETE ON bookings
+    FOR EACH ROW EXECUTE FUNCTION release_booking_stock();
+
+-- Series occurrences hold no stock; completing one consumes its service's
+-- bill of materials. Before its first exception an occurrence has the
+-- series' status.
+CREATE OR REPLACE FUNCTION occurrence_stock()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    s booking_series;
+    old_status TEXT;
+BEGIN
+    IF NEW.cancelled THEN
+        RETURN NULL;
+    END IF;
+    SELECT * INTO s FROM booking_series WHERE id = NEW.series_id;
+    IF TG_OP = 'INSERT' THEN
+        old_status := s.status;
+    ELSIF OLD.cancelled IS NOT TRUE THEN
+        old_status := COALESCE(OLD.overrides->>'status', s.status);
+    END IF;
+    IF COALESCE(NEW.overrides->>'status', s.status) = 'completed' AND old_status IS DISTINCT FROM 'completed' THEN
+        PERFORM consume_booking_stock(
+            NULL,
+            COALESCE(NEW.overrides->>'service', s.service),
+            NULL,
+            'Series occurrence ' || NEW.series_id || ':' || NEW.occurrence_date
+        );
+    END IF;
+    RETURN NULL;
+END;
+$$;
+
+CREATE TRIGGER booking_series_exceptions_stock AFTER INSERT OR UPDATE ON booking_series_exceptions
+    FOR EACH ROW EXECUTE FUNCTION occurrence_stock();
+
+NOTIFY pgrst, 'reload schema';
@@ -0,0 +1,14 @@
+-- Keyset pagination indexes
+-- List endpoints page by their sort columns plus id (see pagination.py).
+-- An index on exactly those columns lets each page start with an index
+-- range scan at the cursor instead of sorting the table. Descending orders
+-- scan the same indexes backwards.
+-- Run this in Supabase SQL Editor after 010.
+
+CREATE INDEX IF NOT EXISTS idx_contacts_created_id ON contacts(created_at, id);
+CREATE INDEX IF NOT EXISTS idx_forms_created_id ON forms(created_at, id);
+CREATE INDEX IF NOT EXISTS idx_inventory_name_id ON inventory(name, id);
+CREATE INDEX IF NOT EXISTS idx_users_username_id ON users(username, id);
+CREATE INDEX IF NOT EXISTS idx_conversations_updated_id ON conversations(updated_at, id);
+CREATE INDEX IF NOT EXISTS idx_bookings_date_time_id ON bookings(date, time, id);
+CREATE INDEX IF NOT EXISTS idx_booking_series_created_id ON booking_series(created_at, id);
@@ -0,0 +1,75 @@
+-- Message order assigned by the database
+-- Messages used to carry the API server's clock as created_at, one value
+-- per batch, and were listed and synced by it: a send that committed late
+-- could land behind a client's sync cursor, and a batch's order came down
+-- to its random ids. Messages now draw a seq from a sequence, in batch
+-- order, after send_messages has locked their conversations, so within a
+-- conversation seq order is commit order. Cursors use seq; created_at is
+-- the database clock and only for display.
+-- Run this in Supabase SQL Editor after 011.
+
+ALTER TABLE messages ADD COLUMN IF NOT EXISTS seq BIGINT;
+
+CREATE SEQUENCE IF NOT EXISTS messages_seq OWNED BY messages.seq;
+
+-- Existing messages keep the order they were listed in
+UPDATE messages m
+SET seq = numbered.seq
+FROM (SELECT id, ROW_NUMBER() OVER (ORDER BY created_at, id) AS seq FROM messages) numbered
+WHERE m.id = numbered.id AND m.seq IS NULL;
+
+SELECT setval('messages_seq', COALESCE((SELECT MAX(seq) FROM messages), 0) + 1, FALSE);
+ALTER TABLE messages ALTER COLUMN seq SET DEFAULT nextval('messages_seq');
+ALTER TABLE messages ALTER COLUMN seq SET NOT NULL;
+
+DROP INDEX IF EXISTS idx_messages_conversation_created;
+CREATE UNIQUE INDEX IF NOT EXISTS idx_messages_conversation_seq ON messages(conversation_id, seq);
+
+-- p_messages: JSON array of {id, conversation_id, text, is_me}, in the
+-- order they were written
+CREATE OR REPLACE FUNCTION send_messages(p_messages JSONB)
+RETURNS SETOF messages
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    -- Concurrent sends to a conversation queue here, so the later commit
+    -- draws the later seq
+    PERFORM 1 FROM conversations
+    WHERE id IN (SELECT (m->>'conversation_id')::UUID FROM jsonb_array_elements(p_messages) m)
+    ORDER BY id
+    FOR UPDATE;
+
+    RETURN QUERY
+    WITH inserted AS (
+        -- nextval runs after the sort, so seq follows the array
+        INSERT INTO messages (id, conversation_id, text, is_me, created_at, seq)
+        SELECT (e.m->>'id')::UUID,
+               (e.m->>'conversation_id')::UUID,
+               e.m->>'text',
+               COALESCE((e.m->>'is_me')::BOOLEAN, TRUE),
+               clock_timestamp(),
+               nextval('messages_seq')
+        FROM jsonb_array_elements(p_messages) WITH ORDINALITY AS e(m, ordinal)
+        ORDER BY e.ordinal
+        RETURNING *
+    ),
+    latest AS (
+        SELECT DISTINCT ON (i.conversation_id) i.conversation_id, i.text, i.created_at
+        FROM inserted i
+        ORDER BY i.conversation_id, i.seq DESC
+    ),
+    bumped AS (
+        UPDATE conversations c
+        SET last_message = latest.text,
+            last_message_time = latest.created_at,
+            updated_at = NOW()
+        FROM latest
+        WHERE c.id = latest.conversation_id
+    )
+    SELECT * FROM inserted ORDER BY seq;
+END;
+$$;
+
+GRANT EXECUTE ON FUNCTION send_messages(JSONB) TO authenticated, service_role;
+
+NOTIFY pgrst, 'reload schema';
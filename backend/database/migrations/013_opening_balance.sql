@@ -0,0 +1,26 @@
+-- Opening balance
+-- A new item's starting stock is recorded in stock_movements by a trigger,
+-- in the transaction that creates the item, so the ledger always sums to
+-- the stock on hand.
+-- Run this in Supabase SQL Editor after 012.
+
+-- Who created the item; the opening balance is attributed to them
+ALTER TABLE inventory ADD COLUMN IF NOT EXISTS created_by UUID REFERENCES users(id) ON DELETE SET NULL;
+
+CREATE OR REPLACE FUNCTION record_opening_balance()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    IF NEW.available <> 0 THEN
+        INSERT INTO stock_movements (item_id, delta, balance, reason, note, created_by)
+        VALUES (NEW.id, NEW.available, NEW.available, 'stocktake', 'Opening balance', NEW.created_by);
+    END IF;
+    RETURN NULL;
+END;
+$$;
+
+CREATE TRIGGER inventory_opening_balance AFTER INSERT ON inventory
+    FOR EACH ROW EXECUTE FUNCTION record_opening_balance();
+
+NOTIFY pgrst, 'reload schema';
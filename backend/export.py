@@ -0,0 +1,59 @@
+"""Streaming NDJSON/CSV exports.
+
+Rows are pulled from the database one keyset page at a time and written
+to the response as they arrive, so memory use is bounded by the page size
+rather than by the size of the export.
+"""
+import csv
+import io
+import json
+from enum import Enum
+from typing import AsyncIterator, List
+
+from fastapi.responses import StreamingResponse
+
+
+class ExportFormat(str, Enum):
+    NDJSON = "ndjson"
+    CSV = "csv"
+
+
+MEDIA_TYPES = {
+    ExportFormat.NDJSON: "application/x-ndjson",
+    ExportFormat.CSV: "text/csv",
+}
+
+
+def _csv_value(value):
+    if isinstance(value, (list, dict)):
+        return json.dumps(value)
+    return "" if value is None else value
+
+
+async def _ndjson(rows: AsyncIterator[dict], columns: List[str]):
+    async for row in rows:
+        yield json.dumps({c: row.get(c) for c in columns}, default=str) + "\n"
+
+
+async def _csv(rows: AsyncIterator[dict], columns: List[str]):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    async for row in rows:
+        writer.writerow([_csv_value(row.get(c)) for c in columns])
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    # Header only, when there were no rows
+    if buffer.getvalue():
+        yield buffer.getvalue()
+
+
+def export_response(rows: AsyncIterator[dict], fmt: ExportFormat, columns: List[str], filename: str) -> StreamingResponse:
+    """Stream ``rows`` as NDJSON or CSV with the given column order"""
+    body = _ndjson(rows, columns) if fmt == ExportFormat.NDJSON else _csv(rows, columns)
+    return StreamingResponse(
+        body,
+        media_type=MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{fmt.value}"'},
+    )
@@ -0,0 +1,882 @@
+"""In-memory stand-in for the Supabase client.
+
+Implements the part of the postgrest query builder the API uses (select
+with embeds and exact counts, eq/neq/gt/gte/lt/lte/in_/or_ filters,
+order, limit, insert/upsert/update/delete and rpc) over plain dicts, so
+the app, load tests and benchmarks run without a database. Enable it with
+``DATABASE_BACKEND=memory``; ``FAKE_DB_LATENCY_MS`` adds a per-round-trip
+delay to approximate a network hop.
+
+Tables, column defaults and ``updated_at`` triggers are read from the SQL
+migrations, so unknown columns fail like they would against PostgREST;
+other constraints are not enforced.
+"""
+import copy
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from collections import Counter, defaultdict
+from datetime import datetime
+from functools import lru_cache
+from itertools import islice
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+MIGRATIONS_DIR = Path(__file__).parent / "database" / "migrations"
+
+_CREATE_RE = re.compile(r"CREATE TABLE IF NOT EXISTS (\w+) \((.*?)\n\);", re.S)
+_ADD_COLUMN_RE = re.compile(r"ALTER TABLE (\w+) ADD COLUMN (?:IF NOT EXISTS )?(\w+) ([^;]*);")
+_TRIGGER_RE = re.compile(r"BEFORE UPDATE ON (\w+)")
+_DEFAULT_RE = re.compile(r"DEFAULT\s+('(?:[^']|'')*'(?:::\w+)?|\w+\(\)|[-\w.]+)", re.I)
+_CONSTRAINTS = {"PRIMARY", "UNIQUE", "CONSTRAINT", "CHECK", "FOREIGN"}
+
+_EMBED_RE = re.compile(r"^(?:(\w+):)?(\w+)(?:!(\w+))?\((.*)\)$", re.S)
+
+
+class FakeAPIError(Exception):
+    """Raised where PostgREST would answer with an error"""
+
+
+class FakeResponse:
+    def __init__(self, data, count: Optional[int] = None):
+        self.data = data
+        self.count = count
+
+
+def _now() -> str:
+    return datetime.utcnow().isoformat()
+
+
+def _default(definition: str) -> Callable[[], Any]:
+    """Python factory for a column's SQL DEFAULT (None without one)"""
+    match = _DEFAULT_RE.search(definition)
+    if match is None:
+        return lambda: None
+    value = match.group(1)
+    if value.lower() == "now()":
+        return _now
+    if value.lower() in ("uuid_generate_v4()", "gen_random_uuid()"):
+        return lambda: str(uuid.uuid4())
+    if value.startswith("'"):
+        literal, _, cast = value.rpartition("'")
+        literal = literal[1:].replace("''", "'")
+        if cast.lower() == "::jsonb":
+            return lambda: json.loads(literal)
+        return lambda: literal
+    if value.upper() in ("TRUE", "FALSE"):
+        return lambda: value.upper() == "TRUE"
+    number = float(value)
+    if re.match(r"(DECIMAL|NUMERIC|REAL|FLOAT|DOUBLE)", definition, re.I):
+        return lambda: number
+    return lambda: int(number)
+
+
+def load_schema(directory: Path = MIGRATIONS_DIR) -> Tuple[Dict[str, Dict[str, Callable]], Set[str]]:
+    """Column defaults per table and the tables with an updated_at trigger,
+    read from the SQL migrations in order"""
+    tables: Dict[str, Dict[str, Callable]] = {}
+    triggers: Set[str] = set()
+    for path in sorted(directory.glob("*.sql")):
+        sql = path.read_text()
+        for table, body in _CREATE_RE.findall(sql):
+            columns = tables.setdefault(table, {})
+            for line in body.splitlines():
+                line = line.split("--")[0].strip().rstrip(",")
+                if not line or line.split()[0].upper() in _CONSTRAINTS:
+                    continue
+                name, definition = line.split(None, 1)
+                columns[name] = _default(definition)
+        for table, name, definition in _ADD_COLUMN_RE.findall(sql):
+            tables.setdefault(table, {})[name] = _default(definition)
+        triggers.update(_TRIGGER_RE.findall(sql))
+    return tables, triggers
+
+
+def _split(text: str) -> List[str]:
+    # Split on commas outside parentheses and double quotes
+    parts, depth, quoted, escaped, current = [], 0, False, False, []
+    for char in text:
+        if escaped:
+            escaped = False
+        elif char == "\\":
+            escaped = True
+        elif char == '"':
+            quoted = not quoted
+        elif not quoted and char == "(":
+            depth += 1
+        elif not quoted and char == ")":
+            depth -= 1
+        elif not quoted and depth == 0 and char == ",":
+            parts.append("".join(current).strip())
+            current = []
+            continue
+        current.append(char)
+    if "".join(current).strip():
+        parts.append("".join(current).strip())
+    return parts
+
+
+@lru_cache(maxsize=256)
+def _select_columns(columns: str) -> Tuple[tuple, ...]:
+    """A select clause as ``("*",)``, ``(column,)`` and embed
+    ``(alias, target, hint, inner)`` entries, parsed once per clause"""
+    parsed = []
+    for column in _split(" ".join(columns.split())):
+        embed = _EMBED_RE.match(column)
+        parsed.append(embed.groups() if embed else (column,))
+    return tuple(parsed)
+
+
+def _unquote(value: str) -> str:
+    if len(value) >= 2 and value[0] == value[-1] == '"':
+        return re.sub(r"\\(.)", r"\1", value[1:-1])
+    return value
+
+
+def _coerce(value, like):
+    """Convert a filter value to the type of the stored value it is compared with"""
+    if isinstance(value, str) and like is not None and not isinstance(like, str):
+        if isinstance(like, bool):
+            return value.lower() in ("true", "t", "1")
+        try:
+            return type(like)(value)
+        except (TypeError, ValueError):
+            return value
+    return value
+
+
+def _compare(stored, op: str, value) -> bool:
+    if op == "is":
+        return stored is None if str(value).lower() == "null" else stored == _coerce(value, True)
+    if stored is None:
+        return False
+    if op == "in":
+        return stored in [_coerce(v, stored) for v in value]
+    value = _coerce(value, stored)
+    try:
+        if op == "eq":
+            return stored == value
+        if op == "neq":
+            return stored != value
+        if op == "gt":
+            return stored > value
+        if op == "gte":
+            return stored >= value
+        if op == "lt":
+            return stored < value
+        if op == "lte":
+            return stored <= value
+    except TypeError:
+        return str(stored) > str(value) if op in ("gt", "gte") else str(stored) < str(value)
+    raise FakeAPIError(f"Unsupported operator: {op}")
+
+
+def _parse_condition(text: str) -> tuple:
+    """Parse one PostgREST logic-tree term like ``a.lt."x"`` or ``and(...)``"""
+    for junction in ("and", "or"):
+        if text.startswith(f"{junction}(") and text.endswith(")"):
+            return (junction, [_parse_condition(t) for t in _split(text[len(junction) + 1:-1])])
+    column, op, value = text.split(".", 2)
+    if op == "in":
+        return ("leaf", column, op, [_unquote(v) for v in _split(value.strip("()"))])
+    return ("leaf", column, op, _unquote(value))
+
+
+def _matches(condition: tuple, row: dict) -> bool:
+    if condition[0] == "leaf":
+        _, column, op, value = condition
+        return _compare(row.get(column), op, value)
+    combine = all if condition[0] == "and" else any
+    return combine(_matches(c, row) for c in condition[1])
+
+
+def _bound(condition: tuple, column: str, desc: bool, like):
+    """A value of ``column`` that every row matching ``condition`` is at or
+    past in sort order, when one can be read off the filter"""
+    if condition[0] == "leaf":
+        _, name, op, value = condition
+        if name == column and op in (("eq", "lte", "lt") if desc else ("eq", "gte", "gt")):
+            return _coerce(value, like)
+        return None
+    bounds = [_bound(c, column, desc, like) for c in condition[1]]
+    try:
+        if condition[0] == "or":
+            if any(b is None for b in bounds):
+                return None
+            return max(bounds) if desc else min(bounds)
+        known = [b for b in bounds if b is not None]
+        if not known:
+            return None
+        return min(known) if desc else max(known)
+    except TypeError:
+        return None
+
+
+def _copy(value):
+    # Only JSON columns hold mutable values
+    return copy.deepcopy(value) if isinstance(value, (dict, list)) else value
+
+
+def _sort_key(value):
+    # NULLs sort last ascending and, with reverse=True, first descending
+    return value is None, value
+
+
+def _before(value, bound, desc: bool) -> bool:
+    # Whether a row sorted at ``value`` comes before every row that can match
+    if value is None:
+        return desc
+    return value > bound if desc else value < bound
+
+
+class FakeQuery:
+    def __init__(self, store: "FakeStore", table: str):
+        self._store = store
+        self._table = table
+        self._op = "select"
+        self._columns = "*"
+        self._count = None
+        self._head = False
+        self._payload = None
+        self._on_conflict = None
+        self._filters: List[tuple] = []
+        self._order: List[tuple] = []
+        self._limit: Optional[int] = None
+
+    # Operations
+    def select(self, columns: str = "*", count: Optional[str] = None, head: bool = False):
+        self._columns, self._count, self._head = columns, count, head
+        return self
+
+    def insert(self, rows, **kwargs):
+        self._op, self._payload = "insert", rows
+        return self
+
+    def upsert(self, rows, on_conflict: str = "id", **kwargs):
+        self._op, self._payload, self._on_conflict = "upsert", rows, on_conflict
+        return self
+
+    def update(self, values: dict, **kwargs):
+        self._op, self._payload = "update", values
+        return self
+
+    def delete(self, **kwargs):
+        self._op = "delete"
+        return self
+
+    # Filters
+    def _filter(self, column: str, op: str, value):
+        self._filters.append(("leaf", column, op, value))
+        return self
+
+    def eq(self, column, value):
+        return self._filter(column, "eq", value)
+
+    def neq(self, column, value):
+        return self._filter(column, "neq", value)
+
+    def gt(self, column, value):
+        return self._filter(column, "gt", value)
+
+    def gte(self, column, value):
+        return self._filter(column, "gte", value)
+
+    def lt(self, column, value):
+        return self._filter(column, "lt", value)
+
+    def lte(self, column, value):
+        return self._filter(column, "lte", value)
+
+    def in_(self, column, values):
+        return self._filter(column, "in", list(values))
+
+    def is_(self, column, value):
+        return self._filter(column, "is", value)
+
+    def or_(self, filters: str, **kwargs):
+        self._filters.append(_parse_condition(f"or({filters})"))
+        return self
+
+    # Modifiers
+    def order(self, column: str, desc: bool = False, **kwargs):
+        self._order.append((column, desc))
+        return self
+
+    def limit(self, size: int, **kwargs):
+        self._limit = size
+        return self
+
+    def execute(self) -> FakeResponse:
+        self._store.delay()
+        with self._store.lock:
+            return getattr(self, f"_{self._op}")()
+
+    # Execution, called with the store lock held
+    def _matches(self, row: dict) -> bool:
+        return all(_matches(condition, row) for condition in self._filters)
+
+    def _matching(self) -> List[dict]:
+        return [row for row in self._store.rows(self._table) if self._matches(row)]
+
+    def _seek(self, rows: List[dict]) -> int:
+        # Skip rows the filters rule out by bisecting on the leading sort
+        # column, as an index range scan would
+        column, desc = self._order[0]
+        like = next((row[column] for row in rows if row.get(column) is not None), None)
+        bound = _bound(("and", self._filters), column, desc, like)
+        if bound is None:
+            return 0
+        lo, hi = 0, len(rows)
+        try:
+            while lo < hi:
+                mid = (lo + hi) // 2
+                if _before(rows[mid].get(column), bound, desc):
+                    lo = mid + 1
+                else:
+                    hi = mid
+        except TypeError:
+            return 0
+        return lo
+
+    def _select(self) -> FakeResponse:
+        if self._order:
+            rows = self._store.sorted_view(self._table, self._order)
+            rows = islice(rows, self._seek(rows), None)
+        else:
+            rows = self._store.rows(self._table)
+        matched = (row for row in rows if self._matches(row))
+        count = None
+        if self._count:
+            matched = list(matched)
+            count = len(matched)
+        if self._limit is not None:
+            matched = islice(matched, self._limit)
+        if self._head:
+            return FakeResponse([], count)
+        return FakeResponse([self._store.project(self._table, row, self._columns) for row in matched], count)
+
+    def _insert(self) -> FakeResponse:
+        rows = self._payload if isinstance(self._payload, list) else [self._payload]
+        inserted = [self._store.insert(self._table, row) for row in rows]
+        return FakeResponse(copy.deepcopy(inserted))
+
+    def _upsert(self) -> FakeResponse:
+        keys = [k.strip() for k in self._on_conflict.split(",")]
+        rows = self._payload if isinstance(self._payload, list) else [self._payload]
+        written = []
+        # Indexed once per call so large upserts stay linear
+        by_key = {tuple(r.get(k) for k in keys): r for r in self._store.rows(self._table)}
+        for row in rows:
+            row = self._store.normalize(row)
+            key = tuple(row.get(k) for k in keys)
+            existing = by_key.get(key)
+            if existing is None:
+                by_key[key] = self._store.insert(self._table, row)
+                written.append(by_key[key])
+            else:
+                written.append(self._store.update(self._table, existing, row))
+        return FakeResponse(copy.deepcopy(written))
+
+    def _update(self) -> FakeResponse:
+        values = self._store.normalize(self._payload)
+        updated = [self._store.update(self._table, row, values) for row in self._matching()]
+        return FakeResponse(copy.deepcopy(updated))
+
+    def _delete(self) -> FakeResponse:
+        doomed = self._matching()
+        self._store.delete(self._table, doomed)
+        return FakeResponse(copy.deepcopy(doomed))
+
+
+class FakeRpc:
+    def __init__(self, store: "FakeStore", fn: str, params: dict):
+        self._store = store
+        self._fn = fn
+        self._params = params
+
+    def execute(self) -> FakeResponse:
+        function = FUNCTIONS.get(self._fn)
+        if function is None:
+            raise FakeAPIError(f"Function {self._fn} does not exist")
+        self._store.delay()
+        with self._store.lock:
+            result = function(self._store, **self._params)
+            return FakeResponse(result if function in FRESH_RESULTS else copy.deepcopy(result))
+
+
+class FakeStore:
+    """Tables shared by every fake client (anon and service role alike)"""
+
+    def __init__(self, latency_ms: float = 0.0, jitter_ms: float = 0.0):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.lock = threading.RLock()
+        self.tables: Dict[str, List[dict]] = {}
+        # Primary keys per table, so inserts don't scan for duplicates
+        self.ids: Dict[str, Set] = defaultdict(set)
+        # Last value drawn per sequence
+        self.sequences: Dict[str, int] = {}
+        self.columns, self.triggers = load_schema()
+        # Bumped on every write; sorted views are rebuilt when it moves
+        self.versions: Dict[str, int] = {}
+        self._views: Dict[tuple, Tuple[int, List[dict]]] = {}
+
+    def delay(self):
+        # Sleeps on the calling (pool) thread, like a network round-trip
+        if self.latency_ms or self.jitter_ms:
+            time.sleep(max(0.0, self.latency_ms + random.uniform(-self.jitter_ms, self.jitter_ms)) / 1000)
+
+    def rows(self, table: str) -> List[dict]:
+        return self.tables.setdefault(table, [])
+
+    def _touch(self, table: str):
+        self.versions[table] = self.versions.get(table, 0) + 1
+
+    def sorted_view(self, table: str, order: List[tuple]) -> List[dict]:
+        """The table's rows in ``order``, cached until the next write"""
+        key = (table, tuple(order))
+        version = self.versions.get(table, 0)
+        cached = self._views.get(key)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        rows = list(self.rows(table))
+        for column, desc in reversed(order):
+            rows.sort(key=lambda row: _sort_key(row.get(column)), reverse=desc)
+        self._views[key] = (version, rows)
+        return rows
+
+    @staticmethod
+    def normalize(values: dict) -> dict:
+        # What a JSON round-trip through PostgREST would store
+        values = json.loads(json.dumps(values, default=str))
+        return {k: (_now() if v == "now()" else v) for k, v in values.items()}
+
+    def _check_columns(self, table: str, values: dict):
+        columns = self.columns.get(table)
+        if columns is None:
+            raise FakeAPIError(f'relation "public.{table}" does not exist')
+        for name in values:
+            if name not in columns:
+                raise FakeAPIError(f"Could not find the '{name}' column of '{table}' in the schema cache")
+
+    def insert(self, table: str, row: dict) -> dict:
+        row = self.normalize(row)
+        self._check_columns(table, row)
+        stored = {name: row[name] if name in row else default() for name, default in self.columns[table].items()}
+        for trigger in ROW_TRIGGERS.get(table, ()):
+            trigger(stored)
+        if stored["id"] in self.ids[table]:
+            raise FakeAPIError(f'duplicate key value violates unique constraint "{table}_pkey"')
+        self.rows(table).append(stored)
+        self.ids[table].add(stored["id"])
+        self._touch(table)
+        for trigger in CHANGE_TRIGGERS.get(table, ()):
+            trigger(self, None, stored)
+        return stored
+
+    def update(self, table: str, row: dict, values: dict) -> dict:
+        self._check_columns(table, values)
+        old = dict(row) if table in CHANGE_TRIGGERS else None
+        if "id" in values and values["id"] != row.get("id"):
+            self.ids[table].discard(row.get("id"))
+            self.ids[table].add(values["id"])
+        row.update(values)
+        # The update_updated_at_column trigger
+        if table in self.triggers:
+            row["updated_at"] = _now()
+        for trigger in ROW_TRIGGERS.get(table, ()):
+            trigger(row)
+        self._touch(table)
+        for trigger in CHANGE_TRIGGERS.get(table, ()):
+            trigger(self, old, row)
+        return row
+
+    def delete(self, table: str, doomed: List[dict]):
+        for trigger in CHANGE_TRIGGERS.get(table, ()):
+            for row in doomed:
+                trigger(self, row, None)
+        ids = {id(row) for row in doomed}
+        self.tables[table] = [row for row in self.rows(table) if id(row) not in ids]
+        self.ids[table].difference_update(row.get("id") for row in doomed)
+        self._touch(table)
+
+    def seed(self, table: str, rows: List[dict]):
+        """Bulk-load complete rows as-is, bypassing defaults and copying.
+
+        The store takes ownership of ``rows``; this is what makes seeding
+        benchmark datasets of a million bookings practical.
+        """
+        with self.lock:
+            self.rows(table).extend(rows)
+            self.ids[table].update(row.get("id") for row in rows)
+            self._touch(table)
+
+    def project(self, table: str, row: dict, columns: str) -> dict:
+        """Apply a select clause, including embedded resources"""
+        result = {}
+        for column in _select_columns(columns):
+            if column == ("*",):
+                result.update((name, _copy(value)) for name, value in row.items())
+                continue
+            if len(column) == 1:
+                result[column[0]] = _copy(row.get(column[0]))
+                continue
+            alias, target, hint, inner = column
+            result[alias or target] = self._embed(table, row, target, hint, inner)
+        return result
+
+    def _embed(self, table: str, row: dict, target: str, hint: Optional[str], inner: str):
+        # Only to-one embeds via a foreign key on ``table`` are supported;
+        # the key column comes from a "<table>_<column>_fkey" hint or
+        # defaults to "<target minus trailing s>_id"
+        if hint and hint.startswith(f"{table}_") and hint.endswith("_fkey"):
+            key = hint[len(table) + 1:-len("_fkey")]
+        else:
+            key = f"{target.rstrip('s')}_id"
+        if row.get(key) is None:
+            return None
+        related = next((r for r in self.rows(target) if r.get("id") == row[key]), None)
+        return self.project(target, related, inner) if related else None
+
+
+class FakeClient:
+    """Drop-in for ``supabase.Client`` exposing ``table`` and ``rpc``"""
+
+    def __init__(self, store: FakeStore):
+        self.store = store
+
+    def table(self, name: str) -> FakeQuery:
+        return FakeQuery(self.store, name)
+
+    def rpc(self, fn: str, params: dict = None, **kwargs) -> FakeRpc:
+        return FakeRpc(self.store, fn, params or {})
+
+
+# Python versions of the SQL functions and triggers in database/migrations
+FUNCTIONS: Dict[str, Callable] = {}
+FRESH_RESULTS: Set[Callable] = set()
+ROW_TRIGGERS: Dict[str, List[Callable]] = {}
+CHANGE_TRIGGERS: Dict[str, List[Callable]] = {}
+
+
+def function(name: str, fresh: bool = False):
+    """Register a database function; ``fresh`` ones build their result
+    from scratch instead of returning stored rows, so it isn't copied"""
+    def register(fn):
+        FUNCTIONS[name] = fn
+        if fresh:
+            FRESH_RESULTS.add(fn)
+        return fn
+    return register
+
+
+def row_trigger(table: str):
+    """Register a function that edits ``table`` rows in place before they are stored"""
+    def register(fn):
+        ROW_TRIGGERS.setdefault(table, []).append(fn)
+        return fn
+    return register
+
+
+def change_trigger(table: str):
+    """Register a function called with ``(store, old, new)`` for each changed ``table`` row.
+
+    ``old`` is None for inserts and ``new`` for deletes. It runs after
+    inserts and updates and before deletes, so it can still see what the
+    deleted row refers to.
+    """
+    def register(fn):
+        CHANGE_TRIGGERS.setdefault(table, []).append(fn)
+        return fn
+    return register
+
+
+def _nextval(store: FakeStore, table: str, column: str) -> int:
+    # A sequence starting after whatever was seeded
+    key = f"{table}_{column}"
+    if key not in store.sequences:
+        store.sequences[key] = max((row.get(column) or 0 for row in store.rows(table)), default=0)
+    store.sequences[key] += 1
+    return store.sequences[key]
+
+
+@function("send_messages")
+def send_messages(store: FakeStore, p_messages: List[dict]) -> List[dict]:
+    inserted = [
+        store.insert("messages", {
+            **message,
+            "is_me": message.get("is_me", True),
+            "created_at": _now(),
+            "seq": _nextval(store, "messages", "seq"),
+        })
+        for message in p_messages
+    ]
+    # Later messages replace earlier ones
+    latest = {message["conversation_id"]: message for message in inserted}
+    for conversation in store.rows("conversations"):
+        message = latest.get(conversation["id"])
+        if message:
+            store.update("conversations", conversation, {
+                "last_message": message["text"],
+                "last_message_time": message["created_at"],
+            })
+    return inserted
+
+
+@function("record_revenue")
+def record_revenue(store: FakeStore, p_deltas: List[dict]) -> List[dict]:
+    written = []
+    for delta in p_deltas:
+        row = next(
+            (r for r in store.rows("revenue_daily") if r["day"] == delta["day"] and r["service"] == delta["service"]),
+            None,
+        )
+        if row is None:
+            written.append(store.insert("revenue_daily", delta))
+        else:
+            written.append(store.update("revenue_daily", row, {
+                "bookings": row["bookings"] + delta["bookings"],
+                "revenue": round(row["revenue"] + delta["revenue"], 2),
+                "updated_at": _now(),
+            }))
+    return written
+
+
+def _revenue(store: FakeStore, day, service: str, bookings: int, price):
+    record_revenue(store, [{
+        "day": str(day)[:10], "service": service, "bookings": bookings, "revenue": bookings * float(price or 0),
+    }])
+
+
+@change_trigger("bookings")
+def booking_revenue(store: FakeStore, old: Optional[dict], new: Optional[dict]):
+    fields = ("status", "date", "service", "price")
+    if old and new and all(old.get(f) == new.get(f) for f in fields):
+        return
+    if old and old.get("status") == "completed":
+        _revenue(store, old["date"], old["service"], -1, old.get("price"))
+    if new and new.get("status") == "completed":
+        _revenue(store, new["date"], new["service"], 1, new.get("price"))
+
+
+@change_trigger("booking_series_exceptions")
+def occurrence_revenue(store: FakeStore, old: Optional[dict], new: Optional[dict]):
+    series_id = (new or old)["series_id"]
+    series = next((row for row in store.rows("booking_series") if row["id"] == series_id), None)
+    if series is None:
+        return
+    for exception, sign in ((old, -1), (new, 1)):
+        if not exception or exception.get("cancelled"):
+            continue
+        overrides = exception.get("overrides") or {}
+        if overrides.get("status", series["status"]) == "completed":
+            _revenue(
+                store, overrides.get("date") or exception["occurrence_date"],
+                overrides.get("service", series["service"]), sign, overrides.get("price"),
+            )
+
+
+@change_trigger("booking_series")
+def delete_series_exceptions(store: FakeStore, old: Optional[dict], new: Optional[dict]):
+    if new is None:
+        store.delete("booking_series_exceptions", [
+            row for row in store.rows("booking_series_exceptions") if row["series_id"] == old["id"]
+        ])
+
+
+@function("booking_counts", fresh=True)
+def booking_counts(store: FakeStore, p_from: str, p_to: str, p_group: Optional[str] = None) -> List[dict]:
+    counts = Counter()
+    for row in store.rows("bookings"):
+        day = str(row["date"])[:10]
+        if p_from <= day <= p_to:
+            counts[day, row["status"], row.get(p_group) if p_group else None] += 1
+    return [
+        {"date": day, "status": status, "group": group, "bookings": bookings}
+        for (day, status, group), bookings in counts.items()
+    ]
+
+
+@row_trigger("inventory")
+def set_inventory_status(row: dict):
+    free = (row.get("available") or 0) - (row.get("reserved") or 0)
+    threshold = row.get("threshold") or 0
+    row["status"] = "critical" if free <= 0 else "low" if free <= threshold else "normal"
+
+
+def _stock_result(items: List[dict] = (), missing: List[str] = (), shortages: List[dict] = ()) -> dict:
+    return {"items": list(items), "missing": list(missing), "shortages": list(shortages)}
+
+
+def _shortage(item: dict, delta: int) -> dict:
+    return {"item_id": item["id"], "available": item["available"], "reserved": item["reserved"], "delta": delta}
+
+
+def _record_movement(store: FakeStore, item: dict, delta: int, reason: str, **fields):
+    store.insert("stock_movements", {
+        "item_id": item["id"], "delta": delta, "balance": item["available"], "reason": reason, **fields,
+    })
+
+
+@change_trigger("inventory")
+def record_opening_balance(store: FakeStore, old: Optional[dict], new: Optional[dict]):
+    if old is None and new.get("available"):
+        _record_movement(store, new, new["available"], "stocktake", note="Opening balance", created_by=new.get("created_by"))
+
+
+@function("apply_stock_movements")
+def apply_stock_movements(store: FakeStore, p_movements: List[dict]) -> dict:
+    items = {row["id"]: row for row in store.rows("inventory")}
+    ordered = sorted(enumerate(p_movements), key=lambda pair: (pair[1]["item_id"], pair[0]))
+    # Check every movement against running balances before applying any
+    balances, changes, missing, shortages = {}, [], [], []
+    for _, movement in ordered:
+        item = items.get(movement["item_id"])
+        if item is None:
+            missing.append(movement["item_id"])
+            continue
+        available = balances.get(item["id"], item["available"])
+        counted = movement.get("count")
+        change = counted - available if counted is not None else movement["delta"]
+        if available + change < 0 or (counted is None and change < 0 and available + change < item["reserved"]):
+            shortages.append({**_shortage(item, change), "available": available})
+            continue
+        balances[item["id"]] = available + change
+        changes.append((item, change, movement))
+    if missing or shortages:
+        return _stock_result(missing=missing, shortages=shortages)
+
+    for item, change, movement in changes:
+        values = {"available": item["available"] + change}
+        if movement.get("reason") == "restock":
+            values["last_restocked"] = _now()
+        store.update("inventory", item, values)
+        _record_movement(
+            store, item, change, movement["reason"],
+            **{key: movement.get(key) for key in ("booking_id", "note", "created_by")},
+        )
+    touched = {id(item): item for item, _, _ in changes}
+    return _stock_result(items=touched.values())
+
+
+@function("reserve_stock")
+def reserve_stock(store: FakeStore, p_item_id: str, p_booking_id: str, p_quantity: int) -> dict:
+    item = next((row for row in store.rows("inventory") if row["id"] == p_item_id), None)
+    if item is None:
+        return _stock_result(missing=[p_item_id])
+    if p_quantity > 0 and not any(row["id"] == p_booking_id for row in store.rows("bookings")):
+        return _stock_result(missing=[p_booking_id])
+    reservations = store.rows("stock_reservations")
+    existing = next(
+        (r for r in reservations if r["item_id"] == p_item_id and r["booking_id"] == p_booking_id), None
+    )
+    held = existing["quantity"] if existing else 0
+    if item["available"] - item["reserved"] - (p_quantity - held) < 0:
+        return _stock_result(shortages=[_shortage(item, held - p_quantity)])
+    if p_quantity > 0 and existing:
+        store.update("stock_reservations", existing, {"quantity": p_quantity})
+    elif p_quantity > 0:
+        store.insert("stock_reservations", {"item_id": p_item_id, "booking_id": p_booking_id, "quantity": p_quantity})
+    elif existing:
+        store.delete("stock_reservations", [existing])
+    store.update("inventory", item, {"reserved": item["reserved"] + p_quantity - held})
+    return _stock_result(items=[item])
+
+
+@function("settle_reservations")
+def settle_reservations(store: FakeStore, p_booking_id: str, p_consume: bool, p_created_by: Optional[str] = None) -> dict:
+    items = {row["id"]: row for row in store.rows("inventory")}
+    held = sorted(
+        (r for r in store.rows("stock_reservations") if r["booking_id"] == p_booking_id),
+        key=lambda r: r["item_id"],
+    )
+    touched = []
+    for reservation in held:
+        item = items[reservation["item_id"]]
+        used = min(reservation["quantity"], item["available"]) if p_consume else 0
+        store.update("inventory", item, {
+            "reserved": max(item["reserved"] - reservation["quantity"], 0),
+            "available": item["available"] - used,
+        })
+        if used > 0:
+            _record_movement(store, item, -used, "consumption", booking_id=p_booking_id, created_by=p_created_by)
+        touched.append(item)
+    store.delete("stock_reservations", held)
+    return _stock_result(items=touched)
+
+
+@function("consume_booking_stock")
+def consume_booking_stock(
+    store: FakeStore, p_booking_id: Optional[str], p_service: str,
+    p_created_by: Optional[str] = None, p_note: Optional[str] = None,
+) -> dict:
+    items = {row["id"]: row for row in store.rows("inventory")}
+    held = [r for r in store.rows("stock_reservations") if p_booking_id and r["booking_id"] == p_booking_id]
+    lines = {row["item_id"]: (0, row["quantity"]) for row in store.rows("service_materials") if row["service"] == p_service}
+    lines.update({r["item_id"]: (r["quantity"], r["quantity"]) for r in held})
+    touched = []
+    for item_id in sorted(lines):
+        reserved, quantity = lines[item_id]
+        item = items.get(item_id)
+        if item is None:  # deleted; the foreign key cascades in Postgres
+            continue
+        used = min(quantity, max(item["available"], 0))
+        store.update("inventory", item, {
+            "available": item["available"] - used,
+            "reserved": max(item["reserved"] - reserved, 0),
+        })
+        if used > 0:
+            _record_movement(
+                store, item, -used, "consumption", booking_id=p_booking_id, note=p_note, created_by=p_created_by
+            )
+        touched.append(item)
+    store.delete("stock_reservations", held)
+    return _stock_result(items=touched)
+
+
+@change_trigger("bookings")
+def booking_stock(store: FakeStore, old: Optional[dict], new: Optional[dict]):
+    if new is None:
+        settle_reservations(store, old["id"], False)
+    elif old is not None and new["status"] != old["status"]:
+        if new["status"] == "completed":
+            consumed = any(
+                row["booking_id"] == new["id"] and row["reason"] == "consumption"
+                for row in store.rows("stock_movements")
+            )
+            if not consumed:
+                consume_booking_stock(store, new["id"], new["service"], new.get("updated_by"))
+        elif new["status"] in ("cancelled", "no-show"):
+            settle_reservations(store, new["id"], False, new.get("updated_by"))
+
+
+@change_trigger("booking_series_exceptions")
+def occurrence_stock(store: FakeStore, old: Optional[dict], new: Optional[dict]):
+    if new is None or new.get("cancelled"):
+        return
+    series = next(row for row in store.rows("booking_series") if row["id"] == new["series_id"])
+    overrides = new.get("overrides") or {}
+    if old is None:
+        old_status = series["status"]
+    elif not old.get("cancelled"):
+        old_status = (old.get("overrides") or {}).get("status", series["status"])
+    else:
+        old_status = None
+    if overrides.get("status", series["status"]) == "completed" and old_status != "completed":
+        consume_booking_stock(
+            store, None, overrides.get("service", series["service"]),
+            p_note=f"Series occurrence {new['series_id']}:{new['occurrence_date']}",
+        )
+
+
+@function("stock_consumption", fresh=True)
+def stock_consumption(store: FakeStore, p_from: str) -> List[dict]:
+    used = Counter()
+    for row in store.rows("stock_movements"):
+        day = str(row["created_at"])[:10]
+        if row["reason"] == "consumption" and day >= p_from:
+            used[row["item_id"], day] -= row["delta"]
+    return [{"item_id": item_id, "date": day, "used": amount} for (item_id, day), amount in used.items()]
@@ -0,0 +1,238 @@
+"""Stock depletion forecasts and suggested thresholds.
+
+A periodic job forecasts every item's demand over the coming days and
+writes the result to ``inventory_forecast``, which ``/inventory/forecast``
+serves. Its inputs are the daily consumption the ``stock_consumption``
+database function sums from the ledger, the upcoming bookings per service
+and day, and the services' bills of materials. All of it goes into NumPy
+arrays indexed by item, so the forecast is a handful of whole-matrix
+operations whatever the number of items:
+
+- the usual daily usage is an exponentially weighted mean of the history,
+  recent days counting most, with its weighted deviation;
+- planned usage is the bills of materials times the bookings per day;
+- each day's demand is the larger of the two, and the stock runs out on
+  the first day cumulative demand reaches it (past the horizon, at the
+  usual rate);
+- the suggested threshold covers demand over the restocking lead time
+  plus a safety margin for its variability.
+"""
+import logging
+from datetime import date, datetime, timedelta
+from typing import List, Optional
+
+import numpy as np
+
+from config import settings
+from pagination import iter_keyset
+from projection import Projection
+from recurrence import series_index
+from repository import AsyncDatabase
+from response_cache import response_cache
+from schemas import BookingStatus
+from timeseries import Codes
+
+logger = logging.getLogger(__name__)
+
+# Days beyond which a depletion date isn't given
+MAX_DAYS_LEFT = 365
+# Bookings that will still consume stock
+PLANNED_STATUSES = {BookingStatus.PENDING.value, BookingStatus.CONFIRMED.value}
+
+
+class ForecastBuilder:
+    """Forecasts for every item in one batched pass"""
+
+    def __init__(
+        self,
+        today: date,
+        history_days: int,
+        horizon_days: int,
+        lead_time_days: int,
+        safety_factor: float,
+    ):
+        self.today = today
+        self.history_days = history_days
+        self.horizon_days = horizon_days
+        self.lead_time_days = min(lead_time_days, horizon_days)
+        self.safety_factor = safety_factor
+        self.items = Codes()
+        self.services = Codes()
+        self._available: List[int] = []
+        self._usage: List[tuple] = []
+        self._materials: List[tuple] = []
+        self._bookings: List[tuple] = []
+
+    @property
+    def history_start(self) -> date:
+        return self.today - timedelta(days=self.history_days)
+
+    @property
+    def horizon_end(self) -> date:
+        return self.today + timedelta(days=self.horizon_days - 1)
+
+    def add_items(self, rows: List[dict]):
+        """Items to forecast: ``{id, available}``"""
+        self.items.encode([row["id"] for row in rows])
+        self._available.extend(row["available"] or 0 for row in rows)
+
+    def add_usage(self, rows: List[dict]):
+        """Consumption per ``{item_id, date, used}``, dated before today"""
+        self._usage.extend((row["item_id"], str(row["date"])[:10], row["used"]) for row in rows)
+
+    def add_materials(self, rows: List[dict]):
+        """Bills of materials: ``{service, item_id, quantity}``"""
+        self._materials.extend((row["item_id"], row["service"], row["quantity"]) for row in rows)
+
+    def add_bookings(self, rows: List[dict], weight_key: Optional[str] = None):
+        """Upcoming bookings (or per-day counts in ``weight_key``) with their service and date"""
+        self._bookings.extend(
+            (row["service"], str(row["date"])[:10], row[weight_key] if weight_key else 1)
+            for row in rows
+            if row.get("status") in PLANNED_STATUSES
+        )
+
+    def _day_index(self, days: List[str], origin: date) -> np.ndarray:
+        return (np.array(days, dtype="datetime64[D]") - np.datetime64(origin, "D")).astype(np.int64)
+
+    def _matrix(self, rows: List[tuple], codes: Codes, origin: date, width: int) -> np.ndarray:
+        """Sum ``(key, day, amount)`` rows into a ``(len(codes), width)`` matrix of days from ``origin``"""
+        matrix = np.zeros((len(codes.labels), width))
+        if not rows:
+            return matrix
+        keys, days, amounts = zip(*rows)
+        known = np.fromiter((key in codes.index for key in keys), dtype=bool, count=len(keys))
+        rows_codes = np.fromiter((codes.index.get(key, 0) for key in keys), dtype=np.int64, count=len(keys))
+        columns = self._day_index(days, origin)
+        keep = known & (columns >= 0) & (columns < width)
+        flat = rows_codes[keep] * width + columns[keep]
+        matrix += np.bincount(
+            flat, weights=np.asarray(amounts, dtype=float)[keep], minlength=matrix.size
+        ).reshape(matrix.shape)
+        return matrix
+
+    def _bill_of_materials(self) -> np.ndarray:
+        """``(items, services)`` units one booking of each service uses"""
+        bom = np.zeros((len(self.items.labels), len(self.services.labels)))
+        for item_id, service, quantity in self._materials:
+            item = self.items.index.get(item_id)
+            service_code = self.services.index.get(service)
+            if item is not None and service_code is not None:
+                bom[item, service_code] = quantity
+        return bom
+
+    def compute(self) -> List[dict]:
+        """One forecast row per item"""
+        n = len(self.items.labels)
+        if not n:
+            return []
+        horizon = self.horizon_days
+
+        # Usual usage: exponentially weighted over the history
+        usage = self._matrix(self._usage, self.items, self.history_start, self.history_days)
+        age = np.arange(self.history_days - 1, -1, -1)
+        weights = 0.5 ** (age / max(self.history_days / 4, 1))
+        weights /= weights.sum()
+        rate = usage @ weights
+        deviation = np.sqrt(((usage - rate[:, None]) ** 2) @ weights)
+
+        # Planned usage: bills of materials times upcoming bookings
+        self.services.encode([service for _, service, _ in self._materials])
+        bookings = self._matrix(self._bookings, self.services, self.today, horizon)
+        planned = self._bill_of_materials() @ bookings
+
+        demand = np.maximum(planned, rate[:, None])
+        cumulative = np.cumsum(demand, axis=1)
+        stock = np.maximum(np.asarray(self._available, dtype=float), 0)
+
+        runs_out = cumulative >= stock[:, None]
+        within = runs_out.any(axis=1)
+        beyond = horizon - 1 + np.ceil(
+            np.divide(stock - cumulative[:, -1], rate, out=np.full(n, np.inf), where=rate > 0)
+        )
+        days_left = np.where(within, runs_out.argmax(axis=1), np.minimum(beyond, MAX_DAYS_LEFT)).astype(np.int64)
+
+        lead = self.lead_time_days
+        suggested = np.ceil(
+            cumulative[:, lead - 1] + self.safety_factor * deviation * np.sqrt(lead)
+        ).astype(np.int64)
+
+        computed_at = datetime.utcnow().isoformat()
+        return [
+            {
+                "item_id": item_id,
+                "available": available,
+                "daily_usage": round(float(daily), 3),
+                "days_left": int(days),
+                "depletion_date": (self.today + timedelta(days=int(days))).isoformat() if days < MAX_DAYS_LEFT else None,
+                "suggested_threshold": int(threshold),
+                "computed_at": computed_at,
+            }
+            for item_id, available, daily, days, threshold in zip(
+                self.items.labels, self._available, demand.mean(axis=1), days_left, suggested
+            )
+        ]
+
+
+async def build_forecast(supabase: AsyncDatabase, today: date) -> ForecastBuilder:
+    """Read everything a forecast needs"""
+    builder = ForecastBuilder(
+        today,
+        settings.FORECAST_HISTORY_DAYS,
+        settings.FORECAST_HORIZON_DAYS,
+        settings.FORECAST_LEAD_TIME_DAYS,
+        settings.FORECAST_SAFETY_FACTOR,
+    )
+    items = iter_keyset(lambda: supabase.table("inventory").select("id,available"), [("id", False)], page_size=1000)
+    builder.add_items([row async for row in items])
+
+    usage = await supabase.rpc("stock_consumption", {"p_from": builder.history_start.isoformat()}).execute()
+    builder.add_usage([row for row in usage.data or [] if str(row["date"])[:10] < today.isoformat()])
+
+    materials = iter_keyset(
+        lambda: supabase.table("service_materials").select("id,service,item_id,quantity"),
+        [("id", False)],
+        page_size=1000,
+    )
+    builder.add_materials([row async for row in materials])
+
+    counts = await supabase.rpc("booking_counts", {
+        "p_from": today.isoformat(),
+        "p_to": builder.horizon_end.isoformat(),
+        "p_group": "service",
+    }).execute()
+    builder.add_bookings([{**row, "service": row["group"]} for row in counts.data or []], weight_key="bookings")
+    await series_index.ensure_loaded(supabase)
+    builder.add_bookings(series_index.occurrences(today, builder.horizon_end))
+    return builder
+
+
+class InventoryForecast(Projection):
+    """Keeps ``inventory_forecast`` up to date.
+
+    Nothing is held in memory; a rebuild recomputes every item and
+    replaces the table's rows.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.computed_at: Optional[str] = None
+        self.items = 0
+
+    async def load(self, supabase: AsyncDatabase):
+        builder = await build_forecast(supabase, date.today())
+        rows = builder.compute()
+        for start in range(0, len(rows), settings.BULK_INSERT_CHUNK_SIZE):
+            await supabase.table("inventory_forecast").upsert(
+                rows[start:start + settings.BULK_INSERT_CHUNK_SIZE], on_conflict="item_id"
+            ).execute()
+        if rows:
+            # Rows of items deleted since the last run
+            await supabase.table("inventory_forecast").delete().lt("computed_at", rows[0]["computed_at"]).execute()
+            self.computed_at = rows[0]["computed_at"]
+        self.items = len(rows)
+        await response_cache.invalidate("inventory")
+        logger.info("Forecast %d inventory items", len(rows))
+
+
+inventory_forecast = InventoryForecast()
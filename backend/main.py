@@ -1,6 +1,21 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+import asyncio
+import logging
+from fastapi import FastAPI, Depends
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from config import settings
+from database import get_supabase
+from counters import booking_counters
+from availability import availability_index
+from recurrence import series_index
+from revenue import revenue_rollup, service_catalog
+from stock_alerts import stock_alerts
+from forecast import inventory_forecast
+from contact_search import contact_search
+from response_cache import response_cache
+from auth import hash_pool, principal_cache, require_staff_or_admin
+from metrics import MetricsMiddleware, registry
 from app.routes import (
     auth_routes,
     booking_routes,
@@ -12,13 +27,51 @@ from app.routes import (
     inbox_routes
 )
 
+logging.basicConfig(level=logging.INFO)
+# The Supabase client logs every PostgREST request at INFO
+logging.getLogger("httpx").setLevel(logging.WARNING)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start background maintenance jobs"""
+    tasks = [
+        asyncio.create_task(
+            booking_counters.reconcile_forever(get_supabase(), settings.BOOKING_COUNTERS_RECONCILE_SECONDS)
+        ),
+        asyncio.create_task(
+            availability_index.reconcile_forever(get_supabase(), settings.AVAILABILITY_RECONCILE_SECONDS)
+        ),
+        asyncio.create_task(
+            series_index.reconcile_forever(get_supabase(), settings.SERIES_RECONCILE_SECONDS)
+        ),
+        asyncio.create_task(
+            service_catalog.reconcile_forever(get_supabase(), settings.REVENUE_RECONCILE_SECONDS)
+        ),
+        asyncio.create_task(
+            revenue_rollup.reconcile_forever(get_supabase(), settings.REVENUE_RECONCILE_SECONDS)
+        ),
+        asyncio.create_task(
+            stock_alerts.reconcile_forever(get_supabase(), settings.STOCK_ALERTS_RECONCILE_SECONDS)
+        ),
+        asyncio.create_task(
+            inventory_forecast.reconcile_forever(get_supabase(), settings.FORECAST_REFRESH_SECONDS)
+        ),
+        asyncio.create_task(
+            contact_search.reconcile_forever(get_supabase(), settings.CONTACT_SEARCH_RECONCILE_SECONDS)
+        ),
+    ]
+    yield
+    for task in tasks:
+        task.cancel()
+
 # Create FastAPI app
 app = FastAPI(
     title=settings.APP_NAME,
     version=settings.APP_VERSION,
     description="Complete backend API for CareOps SaaS application",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    lifespan=lifespan
 )
 
 # CORS middleware
@@ -28,8 +81,12 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Cache"],
 )
 
+# Request timing; Server-Timing header only in debug
+app.add_middleware(MetricsMiddleware, server_timing=settings.DEBUG)
+
 # Include routers
 app.include_router(auth_routes.router)
 app.include_router(booking_routes.router)
@@ -55,6 +112,20 @@ async def health_check():
     """Health check endpoint"""
     return {"status": "healthy"}
 
+@app.get("/cache/stats")
+async def cache_stats(current_user: dict = Depends(require_staff_or_admin)):
+    """Cache sizes and hit ratios"""
+    return {
+        "responses": response_cache.stats(),
+        "principals": principal_cache.stats(),
+        "password_hashing": hash_pool.stats(),
+    }
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus metrics"""
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000, reload=True)
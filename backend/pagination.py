@@ -0,0 +1,192 @@
+"""Keyset (cursor) pagination and field projection for list endpoints.
+
+Each list endpoint declares its sort order as ``[(column, desc), ...]``;
+``id`` is appended as a tie-breaker so the order is total. A cursor is the
+sort key of the last row on a page, and the next page is fetched with a
+PostgREST ``or=`` filter selecting rows strictly after that key. With
+the ``(sort columns, id)`` indexes of migration 011 that stays an index
+range scan however deep the client pages.
+"""
+import base64
+import binascii
+import json
+from typing import Callable, Dict, List, Optional, Tuple, Type
+
+from fastapi import HTTPException, Query, status
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+from config import settings
+
+Order = List[Tuple[str, bool]]
+
+
+def with_tiebreak(order: Order) -> Order:
+    """Append ``id`` (in the direction of the last column) to an order"""
+    if any(column == "id" for column, _ in order):
+        return order
+    return order + [("id", order[-1][1] if order else False)]
+
+
+def encode_cursor(row: dict, order: Order) -> str:
+    key = [row.get(column) for column, _ in order]
+    return base64.urlsafe_b64encode(json.dumps(key).encode()).decode()
+
+
+def decode_cursor(cursor: str, order: Order) -> list:
+    try:
+        key = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (binascii.Error, ValueError):
+        key = None
+    if not isinstance(key, list) or len(key) != len(order):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+    return key
+
+
+def _quote(value) -> str:
+    text = str(value).replace("\\", "\\\\").replace('"', '\\"')
+    return f'"{text}"'
+
+
+def keyset_filter(order: Order, key: list) -> str:
+    """Build an ``or=`` expression matching rows after ``key`` in ``order``.
+
+    For ``(a desc, b desc)`` this is ``a < ka OR (a = ka AND b < kb)``.
+    """
+    clauses = []
+    for i, (column, desc) in enumerate(order):
+        equal = [f"{c}.eq.{_quote(v)}" for (c, _), v in zip(order[:i], key[:i])]
+        after = f"{column}.{'lt' if desc else 'gt'}.{_quote(key[i])}"
+        clauses.append(f"and({','.join(equal + [after])})" if equal else after)
+    return ",".join(clauses)
+
+
+def sort_rows(rows: List[dict], order: Order) -> List[dict]:
+    """Sort rows in memory the way the database orders them"""
+    for column, desc in reversed(order):
+        rows = sorted(rows, key=lambda row: row.get(column), reverse=desc)
+    return rows
+
+
+def is_after(row: dict, order: Order, key: list) -> bool:
+    """Whether ``row`` sorts strictly after the cursor ``key``"""
+    for (column, desc), k in zip(order, key):
+        value = row.get(column)
+        if value != k:
+            return value < k if desc else value > k
+    return False
+
+
+class PageParams:
+    """Shared ``limit``/``cursor``/``fields`` query parameters"""
+
+    def __init__(
+        self,
+        limit: int = Query(settings.DEFAULT_PAGE_SIZE, ge=1, le=settings.MAX_PAGE_SIZE),
+        cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+        fields: Optional[str] = Query(None, description="Comma-separated fields to return"),
+    ):
+        self.limit = limit
+        self.cursor = cursor
+        self.fields = [f.strip() for f in fields.split(",") if f.strip()] if fields else None
+
+    def select(
+        self,
+        model: Type[BaseModel],
+        order: Order,
+        computed: Optional[Dict[str, str]] = None,
+        virtual: Tuple[str, ...] = (),
+    ) -> str:
+        """Build the select clause, validating ``fields`` against ``model``.
+
+        ``computed`` maps response fields that are not table columns to the
+        select fragment (e.g. an embedded resource) that produces them;
+        ``virtual`` fields are filled in by the handler and never selected.
+        """
+        computed = computed or {}
+        if self.fields is None:
+            return ",".join(["*", *computed.values()])
+
+        unknown = [f for f in self.fields if f not in model.model_fields]
+        if unknown:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Unknown fields: {', '.join(unknown)}"
+            )
+        columns = [f for f in self.fields if f not in computed and f not in virtual]
+        # Sort-key columns are always needed to build the next cursor
+        for column, _ in with_tiebreak(order):
+            if column not in columns:
+                columns.append(column)
+        columns += [computed[f] for f in self.fields if f in computed]
+        return ",".join(columns)
+
+    def apply(self, query, order: Order, db_key: Optional[Callable[[list], list]] = None):
+        """Add ordering, the cursor filter and the page limit to ``query``.
+
+        Pages that ``merge`` generated rows can end on one whose key the
+        database can't compare; ``db_key`` maps such a cursor key to
+        values it can, matching the same stored rows.
+        """
+        order = with_tiebreak(order)
+        for column, desc in order:
+            query = query.order(column, desc=desc)
+        if self.cursor:
+            key = decode_cursor(self.cursor, order)
+            if db_key is not None:
+                key = db_key(key)
+            query = query.or_(keyset_filter(order, key))
+        # One extra row tells us whether another page exists
+        return query.limit(self.limit + 1)
+
+    def merge(self, rows: list, extra: list, order: Order) -> list:
+        """Merge rows generated in memory into a fetched page.
+
+        ``extra`` rows before the cursor are dropped and projected to
+        ``fields``. The result keeps the one-row lookahead of ``apply``.
+        """
+        order = with_tiebreak(order)
+        if self.cursor:
+            key = decode_cursor(self.cursor, order)
+            extra = [row for row in extra if is_after(row, order, key)]
+        if self.fields is not None:
+            keep = set(self.fields) | {column for column, _ in order}
+            extra = [{k: v for k, v in row.items() if k in keep} for row in extra]
+        return sort_rows(rows + extra, order)[:self.limit + 1]
+
+    def respond(self, rows: list, order: Order):
+        """Wrap a fetched page in the ``{items, next_cursor}`` envelope.
+
+        Projected pages skip response-model validation since they
+        intentionally omit required fields.
+        """
+        next_cursor = None
+        if len(rows) > self.limit:
+            rows = rows[:self.limit]
+            next_cursor = encode_cursor(rows[-1], with_tiebreak(order))
+        page = {"items": rows, "next_cursor": next_cursor}
+        if self.fields is not None:
+            return JSONResponse(content=page)
+        return page
+
+
+async def iter_keyset(make_query, order: Order, page_size: int):
+    """Yield every row matched by ``make_query()`` in ``order``, page by page.
+
+    ``make_query`` must return a fresh filtered query on each call; the
+    ordering, keyset filter and limit are added here.
+    """
+    order = with_tiebreak(order)
+    key = None
+    while True:
+        query = make_query()
+        for column, desc in order:
+            query = query.order(column, desc=desc)
+        if key is not None:
+            query = query.or_(keyset_filter(order, key))
+        rows = (await query.limit(page_size).execute()).data
+        for row in rows:
+            yield row
+        if len(rows) < page_size:
+            return
+        key = [rows[-1].get(column) for column, _ in order]
@@ -0,0 +1,40 @@
+"""Base class for in-memory read models kept in sync with the database.
+
+Route handlers apply their own writes incrementally; a background job
+periodically rebuilds the model from the source tables, which bounds drift
+from writes made by other workers or outside the API.
+"""
+import asyncio
+import logging
+
+from repository import AsyncDatabase
+
+logger = logging.getLogger(__name__)
+
+
+class Projection:
+    def __init__(self):
+        self.loaded = False
+        self._rebuild_lock = asyncio.Lock()
+
+    async def load(self, supabase: AsyncDatabase):
+        """Recompute the model from the database and swap it in"""
+        raise NotImplementedError
+
+    async def rebuild(self, supabase: AsyncDatabase):
+        async with self._rebuild_lock:
+            await self.load(supabase)
+            self.loaded = True
+
+    async def ensure_loaded(self, supabase: AsyncDatabase):
+        if not self.loaded:
+            await self.rebuild(supabase)
+
+    async def reconcile_forever(self, supabase: AsyncDatabase, interval: float):
+        """Rebuild every ``interval`` seconds"""
+        while True:
+            try:
+                await self.rebuild(supabase)
+            except Exception:
+                logger.exception("Rebuilding %s failed", type(self).__name__)
+            await asyncio.sleep(interval)
@@ -0,0 +1,92 @@
+"""In-process publish/subscribe for pushing events to streaming clients.
+
+Each subscriber owns a bounded queue. When a slow consumer's queue is full
+the oldest event is dropped and the subscription is flagged as lagging, so
+a stalled client can never grow memory or delay publishers; the stream
+tells it to resync instead. Events only reach subscribers connected to the
+same worker process.
+"""
+import asyncio
+import json
+from collections import defaultdict
+from typing import Dict, Iterable, Set
+
+from fastapi import Request
+from fastapi.responses import StreamingResponse
+
+
+class Subscription:
+    def __init__(self, topics: Iterable[str], maxsize: int):
+        self.topics = set(topics)
+        self.queue = asyncio.Queue(maxsize=maxsize)
+        self.lagged = False
+
+    async def get(self):
+        return await self.queue.get()
+
+
+class PubSub:
+    def __init__(self):
+        self._subscribers: Dict[str, Set[Subscription]] = defaultdict(set)
+
+    def subscribe(self, topics: Iterable[str], maxsize: int = 100) -> Subscription:
+        subscription = Subscription(topics, maxsize)
+        for topic in subscription.topics:
+            self._subscribers[topic].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        for topic in subscription.topics:
+            subscribers = self._subscribers.get(topic)
+            if subscribers is None:
+                continue
+            subscribers.discard(subscription)
+            if not subscribers:
+                del self._subscribers[topic]
+
+    def publish(self, topics: Iterable[str], event: dict) -> int:
+        """Deliver ``event`` once to every subscriber of any of ``topics``"""
+        targets = set()
+        for topic in topics:
+            targets |= self._subscribers.get(topic, set())
+        for subscription in targets:
+            if subscription.queue.full():
+                subscription.queue.get_nowait()
+                subscription.lagged = True
+            subscription.queue.put_nowait(event)
+        return len(targets)
+
+    def subscriber_count(self) -> int:
+        return len({s for subs in self._subscribers.values() for s in subs})
+
+
+def sse_response(request: Request, broker: PubSub, subscription: Subscription, event: str, keepalive: float) -> StreamingResponse:
+    """Stream a subscription to the client as Server-Sent Events.
+
+    Sends a comment line every ``keepalive`` seconds so proxies keep the
+    connection open, and a ``resync`` event after events were dropped.
+    """
+    async def events():
+        try:
+            yield "retry: 3000\n\n"
+            while not await request.is_disconnected():
+                try:
+                    payload = await asyncio.wait_for(subscription.get(), timeout=keepalive)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                if subscription.lagged:
+                    subscription.lagged = False
+                    yield "event: resync\ndata: {}\n\n"
+                yield f"event: {event}\ndata: {json.dumps(payload, default=str)}\n\n"
+        finally:
+            broker.unsubscribe(subscription)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+pubsub = PubSub()
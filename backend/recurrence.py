@@ -0,0 +1,183 @@
+"""Recurring booking series.
+
+A series stores one booking template and a recurrence rule; its
+occurrences are never written to the bookings table. They are generated
+on demand for the window being read, and changes to single occurrences
+are kept as sparse exceptions keyed by the date the occurrence was
+originally due. Series are few compared to bookings, so all of them are
+held in memory and expansion needs no database round-trip.
+"""
+from calendar import monthrange
+from datetime import date, timedelta
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from pagination import iter_keyset
+from projection import Projection
+from repository import AsyncDatabase
+
+# Series columns copied onto every occurrence
+TEMPLATE_FIELDS = (
+    "customer_name", "customer_email", "customer_phone", "service", "time",
+    "duration", "location", "status", "assigned_staff_id", "notes",
+    "created_by", "created_at", "updated_at",
+)
+
+
+def occurrence_id(series_id: str, day: date) -> str:
+    return f"{series_id}:{day.isoformat()}"
+
+
+def parse_occurrence_id(value: str) -> Optional[Tuple[str, date]]:
+    """Split an occurrence id into ``(series_id, original date)``"""
+    series_id, sep, day = value.rpartition(":")
+    if not sep:
+        return None
+    try:
+        return series_id, date.fromisoformat(day)
+    except ValueError:
+        return None
+
+
+def _as_date(value) -> Optional[date]:
+    if value is None or isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value)[:10])
+
+
+def _candidates(rule: dict, starts_on: date, since: date) -> Iterator[date]:
+    # Every date the rule produces on or after max(starts_on, since), in order
+    interval = rule.get("interval") or 1
+    since = max(since, starts_on)
+    freq = rule["freq"]
+    if freq == "daily":
+        k = -(-(since - starts_on).days // interval)
+        while True:
+            yield starts_on + timedelta(days=k * interval)
+            k += 1
+    elif freq == "weekly":
+        weekdays = sorted(set(rule.get("weekdays") or [starts_on.weekday()]))
+        first_monday = starts_on - timedelta(days=starts_on.weekday())
+        k = (since - first_monday).days // 7 // interval
+        while True:
+            monday = first_monday + timedelta(weeks=k * interval)
+            for weekday in weekdays:
+                day = monday + timedelta(days=weekday)
+                if day >= since:
+                    yield day
+            k += 1
+    elif freq == "monthly":
+        # Months without the start's day of month (e.g. the 31st) are skipped
+        k = ((since.year - starts_on.year) * 12 + since.month - starts_on.month) // interval
+        while True:
+            months = starts_on.month - 1 + k * interval
+            year, month = starts_on.year + months // 12, months % 12 + 1
+            if starts_on.day <= monthrange(year, month)[1]:
+                day = date(year, month, starts_on.day)
+                if day >= since:
+                    yield day
+            k += 1
+    else:
+        raise ValueError(f"Unknown recurrence frequency: {freq}")
+
+
+def rule_dates(rule: dict, starts_on: date, start: date, end: date) -> Iterator[date]:
+    """Dates in ``[start, end]`` produced by ``rule`` for a series starting ``starts_on``"""
+    until = _as_date(rule.get("until"))
+    if until is not None:
+        end = min(end, until)
+    count = rule.get("count")
+    # Without a count the rule can jump straight to the window
+    produced = 0
+    for day in _candidates(rule, starts_on, starts_on if count else start):
+        if day > end:
+            return
+        if count:
+            produced += 1
+            if produced > count:
+                return
+        if day >= start:
+            yield day
+
+
+class SeriesIndex(Projection):
+    """All booking series and their exceptions"""
+
+    def __init__(self):
+        super().__init__()
+        self.series: Dict[str, dict] = {}
+        self.exceptions: Dict[str, Dict[date, dict]] = {}
+
+    def add_series(self, series: dict):
+        self.series[series["id"]] = series
+
+    def remove_series(self, series_id: str):
+        self.series.pop(series_id, None)
+        self.exceptions.pop(series_id, None)
+
+    def set_exception(self, exception: dict):
+        day = _as_date(exception["occurrence_date"])
+        self.exceptions.setdefault(exception["series_id"], {})[day] = exception
+
+    def remove_exception(self, series_id: str, day: date):
+        self.exceptions.get(series_id, {}).pop(day, None)
+
+    def _build(self, series: dict, day: date) -> Optional[dict]:
+        exception = self.exceptions.get(series["id"], {}).get(day)
+        if exception and exception.get("cancelled"):
+            return None
+        occurrence = {field: series.get(field) for field in TEMPLATE_FIELDS}
+        occurrence.update(
+            id=occurrence_id(series["id"], day),
+            series_id=series["id"],
+            occurrence_date=day.isoformat(),
+            date=day.isoformat(),
+        )
+        if exception:
+            occurrence.update(exception.get("overrides") or {})
+            occurrence["updated_at"] = exception.get("updated_at")
+        return occurrence
+
+    def occurrence(self, series_id: str, day: date) -> Optional[dict]:
+        """The occurrence originally due on ``day``, if the series has one"""
+        series = self.series.get(series_id)
+        if series is None:
+            return None
+        if not any(rule_dates(series["rule"], _as_date(series["starts_on"]), day, day)):
+            return None
+        return self._build(series, day)
+
+    def occurrences(self, start: date, end: date) -> List[dict]:
+        """Occurrences whose (possibly moved) date falls in ``[start, end]``"""
+        found = []
+        for series_id, series in self.series.items():
+            exceptions = self.exceptions.get(series_id, {})
+            days = set(rule_dates(series["rule"], _as_date(series["starts_on"]), start, end))
+            # Occurrences moved into the window from outside it
+            days.update(day for day, e in exceptions.items() if "date" in (e.get("overrides") or {}))
+            for day in days:
+                occurrence = self._build(series, day)
+                if occurrence and start <= _as_date(occurrence["date"]) <= end:
+                    found.append(occurrence)
+        return found
+
+    def occurrences_on(self, day) -> List[dict]:
+        day = _as_date(day)
+        return self.occurrences(day, day)
+
+    async def load(self, supabase: AsyncDatabase):
+        fresh = SeriesIndex()
+        series_rows = iter_keyset(
+            lambda: supabase.table("booking_series").select("*"), [("id", False)], page_size=1000
+        )
+        async for series in series_rows:
+            fresh.add_series(series)
+        exception_rows = iter_keyset(
+            lambda: supabase.table("booking_series_exceptions").select("*"), [("id", False)], page_size=1000
+        )
+        async for exception in exception_rows:
+            fresh.set_exception(exception)
+        self.series = fresh.series
+        self.exceptions = fresh.exceptions
+
+
+series_index = SeriesIndex()
@@ -0,0 +1,66 @@
+"""Async data access layer over the synchronous Supabase client.
+
+Query builders are assembled exactly as before; only ``execute()`` is
+awaited. The blocking PostgREST round-trip runs on a bounded thread pool
+so a slow query never stalls the event loop for other requests.
+"""
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from metrics import record_db_call
+
+
+def create_executor(max_workers: int) -> ThreadPoolExecutor:
+    """Create the bounded pool used for database round-trips"""
+    return ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="db")
+
+
+class AsyncQuery:
+    """Wraps a postgrest request builder so ``execute()`` can be awaited"""
+
+    def __init__(self, builder, executor: ThreadPoolExecutor, name: str = ""):
+        self._builder = builder
+        self._executor = executor
+        self._name = name
+
+    def __getattr__(self, name):
+        attr = getattr(self._builder, name)
+        if not callable(attr):
+            return attr
+
+        def chain(*args, **kwargs):
+            result = attr(*args, **kwargs)
+            # Filters/modifiers return builders; keep them wrapped
+            if hasattr(result, "execute"):
+                return AsyncQuery(result, self._executor, self._name)
+            return result
+
+        return chain
+
+    async def execute(self):
+        """Run the query on the database pool, recording its duration"""
+        loop = asyncio.get_running_loop()
+        start = time.perf_counter()
+        try:
+            result = await loop.run_in_executor(self._executor, self._builder.execute)
+        except Exception:
+            record_db_call(self._name, time.perf_counter() - start, failed=True)
+            raise
+        record_db_call(self._name, time.perf_counter() - start)
+        return result
+
+
+class AsyncDatabase:
+    """Async facade exposing the ``table``/``rpc`` entry points of a client"""
+
+    def __init__(self, client, executor: ThreadPoolExecutor):
+        self.client = client
+        self._executor = executor
+
+    def table(self, name: str) -> AsyncQuery:
+        return AsyncQuery(self.client.table(name), self._executor, name)
+
+    def rpc(self, fn: str, params: dict = None, **kwargs) -> AsyncQuery:
+        return AsyncQuery(self.client.rpc(fn, params or {}, **kwargs), self._executor, f"rpc:{fn}")
+
@@ -0,0 +1,216 @@
+"""Response cache for read-heavy GET routes.
+
+Cached routes declare the tables they read as tags, and write handlers
+invalidate those tags. Invalidation bumps a version number per tag that
+is part of every cache key, so it is O(1) however many responses a tag
+covers, and a response computed while a write was in flight is stored
+under the old version and never served.
+
+Storage is pluggable: ``MemoryBackend`` (the default) is a per-process
+LRU, ``RedisBackend`` shares entries and invalidations between workers.
+"""
+import functools
+import hashlib
+import inspect
+import json
+import logging
+from collections import Counter
+from typing import List, Optional
+
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+
+from cache import TTLCache
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class CacheBackend:
+    """Storage for cached responses and tag versions"""
+
+    async def get(self, key: str) -> Optional[bytes]:
+        raise NotImplementedError
+
+    async def set(self, key: str, value: bytes, ttl: int):
+        raise NotImplementedError
+
+    async def versions(self, tags: List[str]) -> List[int]:
+        """Current version of each tag (0 if never invalidated)"""
+        raise NotImplementedError
+
+    async def bump(self, tags: List[str]):
+        """Invalidate every entry stored under the current tag versions"""
+        raise NotImplementedError
+
+    def size(self) -> Optional[int]:
+        return None
+
+
+class MemoryBackend(CacheBackend):
+    def __init__(self, maxsize: int, ttl: int):
+        self._entries = TTLCache(maxsize, ttl)
+        self._versions = Counter()
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return self._entries.get(key)
+
+    async def set(self, key: str, value: bytes, ttl: int):
+        self._entries.set(key, value)
+
+    async def versions(self, tags: List[str]) -> List[int]:
+        return [self._versions[tag] for tag in tags]
+
+    async def bump(self, tags: List[str]):
+        for tag in tags:
+            self._versions[tag] += 1
+
+    def size(self) -> Optional[int]:
+        return self._entries.stats()["size"]
+
+
+class RedisBackend(CacheBackend):
+    """Backend for any client with the ``redis.asyncio`` interface"""
+
+    def __init__(self, client, prefix: str = "careops:cache:"):
+        self._client = client
+        self._prefix = prefix
+
+    @classmethod
+    def from_url(cls, url: str) -> "RedisBackend":
+        import redis.asyncio as redis
+        return cls(redis.from_url(url))
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return await self._client.get(self._prefix + key)
+
+    async def set(self, key: str, value: bytes, ttl: int):
+        await self._client.set(self._prefix + key, value, ex=ttl)
+
+    async def versions(self, tags: List[str]) -> List[int]:
+        values = await self._client.mget([f"{self._prefix}tag:{tag}" for tag in tags])
+        return [int(value or 0) for value in values]
+
+    async def bump(self, tags: List[str]):
+        async with self._client.pipeline(transaction=False) as pipe:
+            for tag in tags:
+                pipe.incr(f"{self._prefix}tag:{tag}")
+            await pipe.execute()
+
+
+@functools.lru_cache(maxsize=None)
+def _adapter(model) -> TypeAdapter:
+    return TypeAdapter(model)
+
+
+def _render(result, route) -> Optional[bytes]:
+    # Serialize the way FastAPI would, honouring the route's response_model
+    if isinstance(result, Response):
+        if result.status_code != 200 or result.media_type != "application/json":
+            return None
+        return bytes(result.body)
+    model = getattr(route, "response_model", None)
+    if model is None:
+        return json.dumps(jsonable_encoder(result), separators=(",", ":")).encode()
+    adapter = _adapter(model)
+    return adapter.dump_json(adapter.validate_python(result, from_attributes=True))
+
+
+class ResponseCache:
+    def __init__(self, backend: CacheBackend, ttl: int):
+        self.backend = backend
+        self.ttl = ttl
+        self.hits = Counter()
+        self.misses = Counter()
+
+    async def _key(self, request: Request, role: str, tags: List[str]) -> str:
+        query = sorted(request.query_params.multi_items())
+        versions = await self.backend.versions(tags)
+        raw = json.dumps([request.url.path, query, role, versions])
+        return hashlib.sha1(raw.encode()).hexdigest()
+
+    def cached(self, *tags: str):
+        """Cache a GET endpoint's JSON response per path, query and role.
+
+        ``tags`` name the tables the response is built from. The endpoint
+        must take ``current_user``; a ``request`` parameter is added to its
+        signature if it doesn't have one.
+        """
+        tags = sorted(tags)
+
+        def decorator(endpoint):
+            signature = inspect.signature(endpoint)
+            wants_request = "request" in signature.parameters
+
+            @functools.wraps(endpoint)
+            async def wrapper(*args, **kwargs):
+                request = kwargs["request"] if wants_request else kwargs.pop("request")
+                route = request.scope.get("route")
+                name = getattr(route, "path", request.url.path)
+                try:
+                    key = await self._key(request, kwargs["current_user"]["role"], tags)
+                    body = await self.backend.get(key)
+                except Exception:
+                    logger.exception("Response cache lookup failed")
+                    key, body = None, None
+
+                if body is not None:
+                    self.hits[name] += 1
+                    return Response(body, media_type="application/json", headers={"X-Cache": "HIT"})
+
+                self.misses[name] += 1
+                result = await endpoint(*args, **kwargs)
+                body = _render(result, route)
+                if body is None:
+                    return result
+                if key is not None:
+                    try:
+                        await self.backend.set(key, body, self.ttl)
+                    except Exception:
+                        logger.exception("Response cache store failed")
+                return Response(body, media_type="application/json", headers={"X-Cache": "MISS"})
+
+            if not wants_request:
+                request_param = inspect.Parameter("request", inspect.Parameter.KEYWORD_ONLY, annotation=Request)
+                wrapper.__signature__ = signature.replace(
+                    parameters=[*signature.parameters.values(), request_param]
+                )
+            return wrapper
+
+        return decorator
+
+    async def invalidate(self, *tags: str):
+        """Drop every cached response built from any of ``tags``"""
+        try:
+            await self.backend.bump(list(tags))
+        except Exception:
+            logger.exception("Response cache invalidation failed")
+
+    def stats(self) -> dict:
+        hits, misses = sum(self.hits.values()), sum(self.misses.values())
+        routes = {}
+        for name in sorted(set(self.hits) | set(self.misses)):
+            total = self.hits[name] + self.misses[name]
+            routes[name] = {
+                "hits": self.hits[name],
+                "misses": self.misses[name],
+                "hit_ratio": self.hits[name] / total,
+            }
+        return {
+            "backend": type(self.backend).__name__,
+            "size": self.backend.size(),
+            "hits": hits,
+            "misses": misses,
+            "hit_ratio": hits / (hits + misses) if hits + misses else 0.0,
+            "routes": routes,
+        }
+
+
+def create_backend() -> CacheBackend:
+    if settings.RESPONSE_CACHE_BACKEND == "redis":
+        return RedisBackend.from_url(settings.RESPONSE_CACHE_REDIS_URL)
+    return MemoryBackend(settings.RESPONSE_CACHE_SIZE, settings.RESPONSE_CACHE_TTL_SECONDS)
+
+
+response_cache = ResponseCache(create_backend(), settings.RESPONSE_CACHE_TTL_SECONDS)
@@ -0,0 +1,198 @@
+"""Revenue rollup by day and service.
+
+A booking earns its ``price`` on its ``date`` while it is completed. The
+price comes from the service catalog and is stored on the booking when it
+is completed, so changing a price later does not rewrite past revenue.
+Triggers on ``bookings`` and ``booking_series_exceptions`` (migration 009)
+apply each change to ``revenue_daily`` in the transaction that makes it.
+The in-memory rollup mirrors that table, re-reading the days a request
+touched, and keeps prefix sums over days, so any period's total costs two
+binary searches.
+"""
+import logging
+from bisect import bisect_left, bisect_right
+from calendar import monthrange
+from collections import defaultdict
+from datetime import date, timedelta
+from typing import Dict, List, Optional, Set, Tuple
+
+from pagination import iter_keyset
+from projection import Projection
+from repository import AsyncDatabase
+from schemas import BookingStatus
+
+logger = logging.getLogger(__name__)
+
+# A day of revenue_daily in memory: [bookings, revenue]
+Cell = List[float]
+
+# Longest series one request may ask for (ten years of days)
+MAX_BUCKETS = 3660
+
+
+class ServiceCatalog(Projection):
+    """Service prices, small enough to keep in memory"""
+
+    def __init__(self):
+        super().__init__()
+        self.prices: Dict[str, float] = {}
+
+    def price(self, service: Optional[str]) -> float:
+        """Current price of ``service`` (0 if it isn't in the catalog)"""
+        return self.prices.get(service, 0.0)
+
+    def set_price(self, service: str, price: float):
+        self.prices[service] = price
+
+    async def load(self, supabase: AsyncDatabase):
+        rows = iter_keyset(lambda: supabase.table("services").select("id,name,price"), [("name", False)], page_size=1000)
+        self.prices = {row["name"]: float(row["price"]) async for row in rows}
+
+
+def completion_price(existing: dict, merged: dict) -> dict:
+    """The ``price`` to write with an update turning ``existing`` into ``merged``.
+
+    Empty unless the update completes the booking or changes the service
+    of a completed one; otherwise the stored price stands.
+    """
+    if merged.get("status") != BookingStatus.COMPLETED.value:
+        return {}
+    if (
+        existing.get("status") == BookingStatus.COMPLETED.value
+        and existing.get("service") == merged.get("service")
+        and existing.get("price") is not None
+    ):
+        return {}
+    return {"price": service_catalog.price(merged.get("service"))}
+
+
+def _earned(booking: Optional[dict]) -> Optional[Tuple[Tuple[str, str], float]]:
+    if not booking or booking.get("status") != BookingStatus.COMPLETED.value:
+        return None
+    return (str(booking["date"])[:10], booking["service"]), float(booking.get("price") or 0)
+
+
+class RevenueRollup(Projection):
+    """Revenue per day, with prefix sums for range totals"""
+
+    def __init__(self):
+        super().__init__()
+        self.daily: Dict[str, Cell] = defaultdict(lambda: [0, 0.0])
+        self._days: Optional[List[str]] = None
+        self._bookings: List[int] = []
+        self._revenue: List[float] = []
+
+    async def refresh(self, supabase: AsyncDatabase, days: Set[str]):
+        """Re-read ``days`` from revenue_daily after the triggers changed them"""
+        if not self.loaded or not days:
+            return
+        result = await supabase.table("revenue_daily").select("day,bookings,revenue").in_("day", sorted(days)).execute()
+        fresh: Dict[str, Cell] = {}
+        for row in result.data:
+            cell = fresh.setdefault(str(row["day"])[:10], [0, 0.0])
+            cell[0] += row["bookings"]
+            cell[1] += float(row["revenue"])
+        for day in days:
+            if day in fresh:
+                self.daily[day] = fresh[day]
+            else:
+                self.daily.pop(day, None)
+        self._days = None
+
+    def _prefix_sums(self):
+        # Rebuilt lazily after writes; reads between writes share it
+        if self._days is None:
+            days = sorted(self.daily)
+            bookings, revenue = [0], [0.0]
+            for day in days:
+                cell = self.daily[day]
+                bookings.append(bookings[-1] + cell[0])
+                revenue.append(revenue[-1] + cell[1])
+            self._bookings, self._revenue, self._days = bookings, revenue, days
+
+    def totals(self, start: Optional[date] = None, end: Optional[date] = None) -> Tuple[int, float]:
+        """Completed bookings and revenue dated within ``[start, end]``"""
+        self._prefix_sums()
+        lo = bisect_left(self._days, start.isoformat()) if start else 0
+        hi = bisect_right(self._days, end.isoformat()) if end else len(self._days)
+        if hi <= lo:
+            return 0, 0.0
+        return self._bookings[hi] - self._bookings[lo], round(self._revenue[hi] - self._revenue[lo], 2)
+
+    def series(self, start: date, end: date, granularity: str) -> List[dict]:
+        """One point per day, week (from Monday) or month overlapping ``[start, end]``"""
+        points = []
+        for bucket_start, bucket_end in buckets(start, end, granularity):
+            bookings, revenue = self.totals(max(bucket_start, start), min(bucket_end, end))
+            points.append({
+                "period_start": bucket_start,
+                "period_end": bucket_end,
+                "bookings": bookings,
+                "revenue": revenue,
+            })
+        return points
+
+    async def load(self, supabase: AsyncDatabase):
+        daily: Dict[str, Cell] = defaultdict(lambda: [0, 0.0])
+        rows = iter_keyset(
+            lambda: supabase.table("revenue_daily").select("id,day,bookings,revenue"), [("day", False)], page_size=1000
+        )
+        async for row in rows:
+            cell = daily[str(row["day"])[:10]]
+            cell[0] += row["bookings"]
+            cell[1] += float(row["revenue"])
+        self.daily = daily
+        self._days = None
+
+
+def bucket_start(day: date, granularity: str) -> date:
+    if granularity == "week":
+        return day - timedelta(days=day.weekday())
+    if granularity == "month":
+        return day.replace(day=1)
+    return day
+
+
+def bucket_end(start: date, granularity: str) -> date:
+    if granularity == "week":
+        return start + timedelta(days=6)
+    if granularity == "month":
+        return start.replace(day=monthrange(start.year, start.month)[1])
+    return start
+
+
+def buckets(start: date, end: date, granularity: str) -> List[Tuple[date, date]]:
+    """``(first day, last day)`` of every bucket overlapping ``[start, end]``"""
+    found = []
+    current = bucket_start(start, granularity)
+    while current <= end:
+        last = bucket_end(current, granularity)
+        found.append((current, last))
+        current = last + timedelta(days=1)
+    return found
+
+
+def bucket_count(start: date, end: date, granularity: str) -> int:
+    if granularity == "month":
+        return (end.year - start.year) * 12 + end.month - start.month + 1
+    days = (end - bucket_start(start, granularity)).days + 1
+    return -(-days // 7) if granularity == "week" else days
+
+
+async def refresh_revenue(supabase: AsyncDatabase, *bookings: Optional[dict]):
+    """Bring the in-memory rollup up to date with a booking change.
+
+    ``bookings`` are the versions before and after the change; the days
+    either was earning on are re-read. Runs after the booking write has
+    succeeded and only touches memory, so a failure is logged rather than
+    failing the request and the periodic reconcile repairs it.
+    """
+    days = {earned[0][0] for earned in map(_earned, bookings) if earned}
+    try:
+        await revenue_rollup.refresh(supabase, days)
+    except Exception:
+        logger.exception("Refreshing revenue failed for %s", sorted(days))
+
+
+service_catalog = ServiceCatalog()
+revenue_rollup = RevenueRollup()
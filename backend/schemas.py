@@ -1,6 +1,7 @@
 from pydantic import BaseModel, EmailStr, Field, validator
-from typing import Optional, List
+from typing import Annotated, Dict, Optional, List, Generic, TypeVar
 from datetime import datetime, date
+from datetime import date as date_type
 from enum import Enum
 
 # Enums
@@ -34,6 +35,25 @@ class StaffStatus(str, Enum):
     ACTIVE = "active"
     INACTIVE = "inactive"
 
+T = TypeVar("T")
+
+# Pagination
+class Page(BaseModel, Generic[T]):
+    items: List[T]
+    next_cursor: Optional[str] = None
+
+# Bulk import
+class BulkRowResult(BaseModel):
+    index: int
+    status: str  # "created" or "error"
+    id: Optional[str] = None
+    errors: Optional[List[str]] = None
+
+class BulkResult(BaseModel):
+    created: int
+    failed: int
+    results: List[BulkRowResult]
+
 # Auth Schemas
 class UserCreate(BaseModel):
     email: EmailStr
@@ -75,12 +95,48 @@ class BookingCreate(BaseModel):
     location: str
     notes: Optional[str] = None
 
+class RecurrenceFrequency(str, Enum):
+    DAILY = "daily"
+    WEEKLY = "weekly"
+    MONTHLY = "monthly"
+
+class RecurrenceRule(BaseModel):
+    freq: RecurrenceFrequency
+    interval: int = Field(1, ge=1, le=52)
+    weekdays: Optional[List[Annotated[int, Field(ge=0, le=6)]]] = None  # weekly only; 0 = Monday
+    until: Optional[date] = None
+    count: Optional[int] = Field(None, ge=1)
+
+class BookingSeriesCreate(BookingCreate):
+    """The first occurrence is on ``date``"""
+    assigned_staff_id: Optional[str] = None
+    recurrence: RecurrenceRule
+
+class BookingSeriesResponse(BaseModel):
+    id: str
+    customer_name: str
+    customer_email: Optional[str] = None
+    customer_phone: Optional[str] = None
+    service: str
+    starts_on: str
+    time: str
+    duration: Optional[str] = None
+    location: Optional[str] = None
+    status: str
+    assigned_staff_id: Optional[str] = None
+    notes: Optional[str] = None
+    rule: dict
+    created_by: Optional[str] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
 class BookingUpdate(BaseModel):
     customer_name: Optional[str] = None
     customer_email: Optional[EmailStr] = None
     customer_phone: Optional[str] = None
     service: Optional[str] = None
-    date: Optional[date] = None
+    # ``date`` as the annotation would resolve to this field's None default
+    date: Optional[date_type] = None
     time: Optional[str] = None
     duration: Optional[str] = None
     location: Optional[str] = None
@@ -103,6 +159,13 @@ class BookingResponse(BaseModel):
     assigned_staff_id: Optional[str] = None
     assigned_staff_name: Optional[str] = None   # ✅ FIX
 
+    # Set on occurrences of a recurring series
+    series_id: Optional[str] = None
+    occurrence_date: Optional[str] = None
+
+    # Price charged, set when the booking is completed
+    price: Optional[float] = None
+
     notes: Optional[str] = None
     created_by: Optional[str] = None
     created_at: Optional[datetime] = None
@@ -142,6 +205,10 @@ class ContactResponse(BaseModel):
     created_at: str
     updated_at: Optional[str]
 
+class ContactSearchResult(ContactResponse):
+    # Higher is a better match; comparable within one search only
+    score: float
+
 # Form Schemas
 class FormCreate(BaseModel):
     name: str
@@ -192,6 +259,8 @@ class InventoryItemResponse(BaseModel):
     name: str
     category: str
     available: int
+    # Held for upcoming bookings; status is computed from available - reserved
+    reserved: int = 0
     threshold: int
     status: str
     usage_per_booking: float
@@ -201,6 +270,65 @@ class InventoryItemResponse(BaseModel):
     created_at: str
     updated_at: Optional[str]
 
+class MovementReason(str, Enum):
+    ADJUSTMENT = "adjustment"
+    RESTOCK = "restock"
+    CONSUMPTION = "consumption"
+    STOCKTAKE = "stocktake"
+
+class StockAdjustment(BaseModel):
+    """Exactly one of ``delta`` (added to the stock) or ``count`` (a stocktake)"""
+    delta: Optional[int] = None
+    count: Optional[int] = Field(None, ge=0)
+    reason: Optional[MovementReason] = None
+    booking_id: Optional[str] = None
+    note: Optional[str] = None
+
+    @validator("count", always=True)
+    def one_of_delta_or_count(cls, count, values):
+        if (count is None) == (values.get("delta") is None):
+            raise ValueError("Give exactly one of delta or count")
+        return count
+
+
+class StockMovementResponse(BaseModel):
+    id: str
+    item_id: str
+    delta: int
+    balance: int
+    reason: str
+    booking_id: Optional[str] = None
+    note: Optional[str] = None
+    created_by: Optional[str] = None
+    created_at: Optional[datetime] = None
+
+class StockReservation(BaseModel):
+    quantity: int = Field(..., ge=0)
+
+class StockAdjustmentItem(StockAdjustment):
+    item_id: str
+
+class StockAdjustmentBatch(BaseModel):
+    adjustments: List[StockAdjustmentItem] = Field(..., min_length=1, max_length=1000)
+
+class ServiceMaterial(BaseModel):
+    """Stock one booking of a service uses up"""
+    item_id: str
+    quantity: int = Field(..., ge=1)
+
+class InventoryForecastResponse(BaseModel):
+    item_id: str
+    item_name: Optional[str] = None
+    # Stock the forecast started from
+    available: int
+    # Forecast average over the horizon
+    daily_usage: float
+    days_left: int
+    # None when the stock lasts longer than a year
+    depletion_date: Optional[date] = None
+    suggested_threshold: int
+    computed_at: datetime
+
 # Staff Schemas
 class StaffCreate(BaseModel):
     email: EmailStr
@@ -263,11 +391,55 @@ class DashboardStats(BaseModel):
     low_stock_items: int
     overdue_forms: int
 
+class Granularity(str, Enum):
+    DAY = "day"
+    WEEK = "week"
+    MONTH = "month"
+
+class RevenuePoint(BaseModel):
+    period_start: date
+    period_end: date
+    bookings: int
+    revenue: float
+
 class RevenueStats(BaseModel):
     total: float
     this_month: float
     last_month: float
     growth_percentage: float
+    # Only when a range or granularity is requested
+    granularity: Optional[Granularity] = None
+    series: Optional[List[RevenuePoint]] = None
+
+class ServicePrice(BaseModel):
+    name: str
+    price: float
+
+class ServicePriceUpdate(BaseModel):
+    price: float = Field(..., ge=0)
+
+class TimeSeriesGroupBy(str, Enum):
+    STAFF = "staff"
+    LOCATION = "location"
+    SERVICE = "service"
+
+class TimeSeriesGroup(BaseModel):
+    # Staff id, location or service; None for the ungrouped series and
+    # for bookings without a value
+    group: Optional[str] = None
+    label: Optional[str] = None
+    # One value per bucket
+    total: List[int]
+    by_status: Dict[str, List[int]]
+    cancellation_rate: List[Optional[float]]
+
+class TimeSeries(BaseModel):
+    granularity: Granularity
+    group_by: Optional[TimeSeriesGroupBy] = None
+    start: date
+    end: date
+    buckets: List[date]
+    series: List[TimeSeriesGroup]
 # ---------------- CONVERSATION ---------------- #
 
 class ConversationResponse(BaseModel):
@@ -299,6 +471,11 @@ class MessageResponse(BaseModel):
         from_attributes = True
 
 
+class MessageWindow(Page[MessageResponse]):
+    prev_cursor: Optional[str] = None   # pass as `before` to load older messages
+    sync_cursor: Optional[str] = None   # pass as `since` to fetch only newer messages
+
+
 class MessageCreate(BaseModel):
     conversation_id: str
     text: str
\ No newline at end of file
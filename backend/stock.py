@@ -0,0 +1,95 @@
+"""Stock ledger, booking reservations and consumption.
+
+On-hand stock only changes through the database functions of migrations
+006 and 007: ``apply_stock_movements`` adds deltas (or counted values)
+under row locks and appends them to ``stock_movements``,
+``reserve_stock`` holds stock for a booking, ``settle_reservations`` frees
+what a booking held and ``consume_booking_stock`` uses up what a completed
+booking held plus its service's bill of materials. Each is one round-trip
+and either applies completely or reports what stopped it; the ``status``
+column is recomputed by a trigger from the stock that is left unreserved,
+and the rows each function returns are passed to ``stock_alerts``.
+
+The last two are not called from the API: triggers on booking status
+changes and deletes (migration 010) run them in the booking's own
+transaction, and ``refresh_items`` re-reads what they touched.
+"""
+import logging
+from typing import List, Optional
+
+from fastapi import HTTPException, status
+
+from repository import AsyncDatabase
+from response_cache import response_cache
+from stock_alerts import stock_alerts
+
+logger = logging.getLogger(__name__)
+
+
+def checked(outcome: dict) -> List[dict]:
+    """The updated items of a stock function's result, or the error it reports"""
+    if outcome.get("missing"):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Not found: {', '.join(outcome['missing'])}"
+        )
+    if outcome.get("shortages"):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Insufficient stock: " + "; ".join(
+                f"item {s['item_id']} has {s['available']} available, {s['reserved']} reserved, change {s['delta']:+d}"
+                for s in outcome["shortages"]
+            )
+        )
+    return outcome.get("items") or []
+
+
+async def apply_movements(supabase: AsyncDatabase, movements: List[dict]) -> List[dict]:
+    """Apply ``{item_id, delta | count, reason, ...}`` movements all at once"""
+    result = await supabase.rpc("apply_stock_movements", {"p_movements": movements}).execute()
+    items = checked(result.data)
+    stock_alerts.observe(items)
+    await response_cache.invalidate("inventory")
+    return items
+
+
+async def reserve(supabase: AsyncDatabase, item_id: str, booking_id: str, quantity: int) -> dict:
+    """Hold ``quantity`` of an item for a booking (0 releases it)"""
+    result = await supabase.rpc("reserve_stock", {
+        "p_item_id": item_id,
+        "p_booking_id": booking_id,
+        "p_quantity": quantity,
+    }).execute()
+    items = checked(result.data)
+    stock_alerts.observe(items)
+    await response_cache.invalidate("inventory")
+    return items[0]
+
+
+async def held_items(supabase: AsyncDatabase, booking_id: str) -> List[str]:
+    """Ids of the items a booking holds stock of"""
+    result = await supabase.table("stock_reservations").select("item_id").eq("booking_id", booking_id).execute()
+    return [row["item_id"] for row in result.data]
+
+
+async def refresh_items(supabase: AsyncDatabase, item_ids: List[str], service: Optional[str] = None):
+    """Pass items the booking triggers changed to ``stock_alerts``.
+
+    ``item_ids`` are what the booking held before the write and
+    ``service`` adds its bill of materials. Runs after the booking write
+    has succeeded and only touches memory, so a failure is logged rather
+    than failing the request.
+    """
+    try:
+        ids = set(item_ids)
+        if service:
+            materials = await supabase.table("service_materials").select("item_id").eq("service", service).execute()
+            ids.update(row["item_id"] for row in materials.data)
+        if not ids:
+            return
+        result = await supabase.table("inventory").select("*").in_("id", sorted(ids)).execute()
+    except Exception:
+        logger.exception("Refreshing stock failed for items %s", sorted(item_ids))
+        return
+    stock_alerts.observe(result.data)
+    await response_cache.invalidate("inventory")
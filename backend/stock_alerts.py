@@ -0,0 +1,155 @@
+"""Low-stock alerts pushed on status transitions.
+
+Keeps the inventory items that are currently low or critical in memory.
+Every write that returns inventory rows passes them to ``observe``, which
+recomputes their status with ``calculate_status`` and, only when it
+changed, updates the set and publishes an ``alert`` event: to SSE
+subscribers through ``pubsub`` and to the configured notifier, a webhook
+or (when no URL is set) a stand-in that logs. Reading the alerts therefore
+costs O(alerting items) and clients can subscribe instead of polling.
+
+The periodic rebuild reads the alerting items back from the database and
+publishes the transitions it finds, which covers writes made by other
+workers or outside the API.
+"""
+import asyncio
+import logging
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+import httpx
+
+from config import settings
+from pagination import iter_keyset
+from projection import Projection
+from pubsub import pubsub
+from repository import AsyncDatabase
+from schemas import InventoryStatus
+
+logger = logging.getLogger(__name__)
+
+ALERT_TOPIC = "inventory:alerts"
+ALERTING_STATUSES = {InventoryStatus.LOW.value, InventoryStatus.CRITICAL.value}
+
+
+def calculate_status(available: int, threshold: int) -> str:
+    """Calculate inventory status from the unreserved stock.
+
+    The database applies the same rule in the ``set_inventory_status``
+    trigger whenever a row is written.
+    """
+    if available <= 0:
+        return InventoryStatus.CRITICAL.value
+    elif available <= threshold:
+        return InventoryStatus.LOW.value
+    return InventoryStatus.NORMAL.value
+
+
+def item_status(item: dict) -> str:
+    return calculate_status(item["available"] - (item.get("reserved") or 0), item["threshold"])
+
+
+class LogNotifier:
+    """Stand-in for the webhook when ``STOCK_ALERT_WEBHOOK_URL`` is unset"""
+
+    async def send(self, event: dict):
+        logger.info(
+            "Stock alert: %s %s -> %s", event["name"] or event["item_id"], event["previous_status"], event["status"]
+        )
+
+
+class WebhookNotifier:
+    """POSTs each event as JSON to a URL"""
+
+    def __init__(self, url: str, timeout: float):
+        self.url = url
+        self.timeout = timeout
+
+    async def send(self, event: dict):
+        async with httpx.AsyncClient(timeout=self.timeout) as client:
+            response = await client.post(self.url, json=event)
+            response.raise_for_status()
+
+
+class StockAlerts(Projection):
+    """Items whose unreserved stock is at or below their threshold"""
+
+    def __init__(self, notifier=None):
+        super().__init__()
+        self.alerting: Dict[str, dict] = {}
+        self.notifier = notifier or (
+            WebhookNotifier(settings.STOCK_ALERT_WEBHOOK_URL, settings.STOCK_ALERT_WEBHOOK_TIMEOUT_SECONDS)
+            if settings.STOCK_ALERT_WEBHOOK_URL else LogNotifier()
+        )
+        # Deliveries in flight, so they aren't garbage collected
+        self._deliveries = set()
+
+    def items(self) -> List[dict]:
+        return sorted(self.alerting.values(), key=lambda item: item["name"] or "")
+
+    def count(self) -> int:
+        return len(self.alerting)
+
+    def observe(self, items: Iterable[dict]):
+        """Take in rows just written to ``inventory``"""
+        if not self.loaded:
+            return
+        for item in items:
+            self._transition(item["id"], item, item_status(item))
+
+    def discard(self, item_id: str):
+        """Forget a deleted item"""
+        if self.loaded:
+            self._transition(item_id, None, None)
+
+    def _transition(self, item_id: str, item: Optional[dict], status: Optional[str]):
+        previous = self.alerting.get(item_id)
+        previous_status = previous["status"] if previous else InventoryStatus.NORMAL.value
+        if status in ALERTING_STATUSES:
+            self.alerting[item_id] = {**item, "status": status}
+        elif previous:
+            del self.alerting[item_id]
+        elif status is None:
+            return
+        if status != previous_status:
+            self._publish(item_id, item or previous, previous_status, status)
+
+    def _publish(self, item_id: str, item: dict, previous_status: str, status: Optional[str]):
+        event = {
+            "item_id": item_id,
+            "name": item.get("name"),
+            "previous_status": previous_status,
+            "status": status,
+            "available": item.get("available"),
+            "reserved": item.get("reserved") or 0,
+            "threshold": item.get("threshold"),
+            "at": datetime.utcnow().isoformat(),
+        }
+        pubsub.publish([ALERT_TOPIC], event)
+        delivery = asyncio.get_running_loop().create_task(self._deliver(event))
+        self._deliveries.add(delivery)
+        delivery.add_done_callback(self._deliveries.discard)
+
+    async def _deliver(self, event: dict):
+        try:
+            await self.notifier.send(event)
+        except Exception:
+            logger.exception("Delivering stock alert for item %s failed", event["item_id"])
+
+    async def load(self, supabase: AsyncDatabase):
+        rows = iter_keyset(
+            lambda: supabase.table("inventory").select("*").in_("status", list(ALERTING_STATUSES)),
+            [("id", False)],
+            page_size=1000,
+        )
+        fresh = {row["id"]: {**row, "status": item_status(row)} async for row in rows}
+        if self.loaded:
+            for item_id in self.alerting.keys() - fresh.keys():
+                self._transition(item_id, self.alerting[item_id], InventoryStatus.NORMAL.value)
+            for item_id, item in fresh.items():
+                self._transition(item_id, item, item["status"])
+        else:
+            self.alerting = fresh
+
+
+stock_alerts = StockAlerts()
@@ -0,0 +1,8 @@
+"""Tests run against the in-memory backend; nothing needs Supabase."""
+import os
+import sys
+
+os.environ.setdefault("DATABASE_BACKEND", "memory")
+os.environ.setdefault("SECRET_KEY", "test-secret-key")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
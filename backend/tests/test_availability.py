@@ -0,0 +1,71 @@
+"""Overlap and conflict checks of the availability index."""
+import pytest
+
+from availability import AvailabilityIndex, _overlap
+
+DAY = "2033-05-02"
+
+
+def booking(id, time, duration="60 min", staff="s1", location="Studio", status="confirmed"):
+    return {
+        "id": id, "date": DAY, "time": time, "duration": duration,
+        "assigned_staff_id": staff, "location": location, "status": status, "service": "Cut",
+    }
+
+
+@pytest.fixture
+def index():
+    index = AvailabilityIndex()
+    index.add(booking("long", "9:00 AM", "3 hours"))
+    index.add(booking("short", "9:30 AM", "15 min", staff="s2", location="Annex"))
+    return index
+
+
+@pytest.mark.parametrize("start, end, expected", [
+    (0, 540, None),
+    (540, 600, "a"),
+    (700, 710, "a"),
+    (719, 721, "a"),
+    (720, 730, None),
+    (739, 800, "c"),
+])
+def test_overlap(start, end, expected):
+    intervals = [(540, 720, "a"), (560, 575, "b"), (740, 800, "c")]
+    found = _overlap(intervals, start, end, "b", longest=180)
+    assert (found[2] if found else None) == expected
+
+
+def test_long_booking_blocks_its_whole_span(index):
+    assert index.conflict(booking("new", "11:30 AM", location="Hall")) == \
+        "Assigned staff member is already booked at this time"
+    assert index.conflict(booking("new", "12:00 PM", location="Hall")) is None
+
+
+def test_location_conflict(index):
+    assert index.conflict(booking("new", "9:00 AM", staff="s3", location="Annex")) == \
+        "Location is already booked at this time"
+    assert index.conflict(booking("new", "9:45 AM", staff="s3", location="Annex")) is None
+
+
+def test_booking_does_not_conflict_with_itself(index):
+    assert index.conflict(booking("long", "10:00 AM"), ignore_id="long") is None
+
+
+def test_cancelled_bookings_free_their_slot(index):
+    index.remove(booking("long", "9:00 AM", "3 hours"))
+    index.add(booking("long", "9:00 AM", "3 hours", status="cancelled"))
+    assert index.conflict(booking("new", "10:00 AM")) is None
+
+
+def test_reserve_claims_the_slot(index):
+    assert index.reserve(booking("first", "2:00 PM", staff="s3", location="Hall")) is None
+    assert index.reserve(booking("second", "2:30 PM", staff="s3", location="Hall")) is not None
+
+
+def test_free_slots(index):
+    slots = index.free_slots(DAY, 60, ["s1", "s2"], 9 * 60, 13 * 60, 60)
+    assert [(slot["time"], slot["staff_ids"]) for slot in slots] == [
+        ("10:00 AM", ["s2"]),
+        ("11:00 AM", ["s2"]),
+        ("12:00 PM", ["s1", "s2"]),
+    ]
@@ -0,0 +1,74 @@
+"""Conditional GET and PATCH on bookings."""
+import uuid
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from app.routes import booking_routes
+from database import fake_store
+
+
+@pytest.fixture(scope="module")
+def client():
+    with TestClient(main.app) as client:
+        user = {"email": "etags@example.com", "password": "secret123", "username": "etags", "role": "admin"}
+        client.post("/auth/register", json=user)
+        token = client.post("/auth/login", json=user).json()["access_token"]
+        client.headers["Authorization"] = f"Bearer {token}"
+        yield client
+
+
+@pytest.fixture
+def booking(client):
+    response = client.post("/bookings", json={
+        "customer_name": "Ada", "service": "Cut", "date": "2032-06-01", "time": "9:00 AM",
+        "location": f"Room {uuid.uuid4()}",
+    })
+    response.raise_for_status()
+    return response.json()
+
+
+def test_matching_etag_is_not_modified(client, booking):
+    etag = client.get(f"/bookings/{booking['id']}").headers["etag"]
+    cached = client.get(f"/bookings/{booking['id']}", headers={"If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.content == b""
+
+
+def test_stale_if_match_is_rejected(client, booking):
+    etag = client.get(f"/bookings/{booking['id']}").headers["etag"]
+    client.patch(f"/bookings/{booking['id']}", json={"notes": "first"}).raise_for_status()
+    stale = client.patch(f"/bookings/{booking['id']}", json={"notes": "second"}, headers={"If-Match": etag})
+    assert stale.status_code == 412
+    assert client.get(f"/bookings/{booking['id']}").json()["notes"] == "first"
+
+
+def test_conditional_edit_skips_the_schedule(client, booking, monkeypatch):
+    etag = client.get(f"/bookings/{booking['id']}").headers["etag"]
+
+    def unexpected(*args, **kwargs):
+        raise AssertionError("notes-only edits don't touch the availability index")
+
+    monkeypatch.setattr(booking_routes.availability_index, "reserve", unexpected)
+    updated = client.patch(f"/bookings/{booking['id']}", json={"notes": "window seat"}, headers={"If-Match": etag})
+    assert updated.status_code == 200
+    assert updated.json()["notes"] == "window seat"
+    assert updated.headers["etag"] != etag
+    again = client.patch(f"/bookings/{booking['id']}", json={"notes": "aisle"}, headers={"If-Match": updated.headers["etag"]})
+    assert again.status_code == 200
+
+
+def test_etag_follows_the_staff_name(client, booking):
+    staff = fake_store.insert("users", {
+        "email": "stylist@example.com", "username": "stylist", "role": "staff", "status": "active",
+    })
+    client.patch(f"/bookings/{booking['id']}", json={"assigned_staff_id": staff["id"]}).raise_for_status()
+    etag = client.get(f"/bookings/{booking['id']}").headers["etag"]
+    fake_store.update("users", staff, {"username": "senior stylist"})
+    fresh = client.get(f"/bookings/{booking['id']}", headers={"If-None-Match": etag})
+    assert fresh.status_code == 200
+    assert fresh.json()["assigned_staff_name"] == "senior stylist"
+    # If-Match still only guards the booking row
+    updated = client.patch(f"/bookings/{booking['id']}", json={"notes": "renamed"}, headers={"If-Match": etag})
+    assert updated.status_code == 200
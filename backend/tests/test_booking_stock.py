@@ -0,0 +1,64 @@
+"""Stock follows booking status changes through the migration 010 triggers."""
+import pytest
+
+from fake_supabase import FakeClient, FakeStore
+
+
+@pytest.fixture
+def supabase():
+    return FakeClient(FakeStore())
+
+
+@pytest.fixture
+def booking(supabase):
+    gloves = supabase.table("inventory").insert({"name": "Gloves", "category": "Supplies", "available": 10}).execute().data[0]
+    booking = supabase.table("bookings").insert({
+        "customer_name": "Ada", "service": "Cut", "date": "2026-10-01", "time": "9:00 AM", "location": "Studio",
+    }).execute().data[0]
+    supabase.rpc("reserve_stock", {"p_item_id": gloves["id"], "p_booking_id": booking["id"], "p_quantity": 4}).execute()
+    return booking
+
+
+def gloves(supabase):
+    item = supabase.table("inventory").select("available,reserved").execute().data[0]
+    return item["available"], item["reserved"]
+
+
+def gloves_id(supabase):
+    return supabase.table("inventory").select("id").execute().data[0]["id"]
+
+
+def set_status(supabase, booking, status):
+    supabase.table("bookings").update({"status": status}).eq("id", booking["id"]).execute()
+
+
+def test_completing_twice_consumes_once(supabase, booking):
+    set_status(supabase, booking, "completed")
+    set_status(supabase, booking, "completed")
+    assert gloves(supabase) == (6, 0)
+    movements = supabase.table("stock_movements").select("delta").eq("reason", "consumption").execute().data
+    assert movements == [{"delta": -4}]
+
+
+def test_reopening_and_completing_again_consumes_once(supabase, booking):
+    supabase.table("service_materials").insert({
+        "service": "Cut", "item_id": gloves_id(supabase), "quantity": 1,
+    }).execute()
+    set_status(supabase, booking, "completed")
+    set_status(supabase, booking, "confirmed")
+    set_status(supabase, booking, "completed")
+    assert gloves(supabase) == (6, 0)
+    movements = supabase.table("stock_movements").select("delta").eq("reason", "consumption").execute().data
+    assert movements == [{"delta": -4}]
+
+
+def test_cancelling_frees_what_was_held(supabase, booking):
+    set_status(supabase, booking, "cancelled")
+    set_status(supabase, booking, "completed")
+    assert gloves(supabase) == (10, 0)
+
+
+def test_deleting_frees_what_was_held(supabase, booking):
+    supabase.table("bookings").delete().eq("id", booking["id"]).execute()
+    assert gloves(supabase) == (10, 0)
+    assert supabase.table("stock_reservations").select("*").execute().data == []
@@ -0,0 +1,62 @@
+"""Contact search matching, on an index over many similar phone numbers."""
+import pytest
+
+from contact_search import ContactSearchIndex, query_terms
+
+
+@pytest.fixture(scope="module")
+def index():
+    # 500 contacts whose local numbers all start with 555, so a "555" prefix
+    # matches hundreds of distinct terms
+    contacts = [
+        {
+            "id": f"contact-{i:03d}",
+            "name": f"Customer {i}",
+            "email": f"customer{i}@example.com",
+            "phone": f"555-{i:04d}",
+        }
+        for i in range(500)
+    ]
+    index = ContactSearchIndex()
+    index.build(contacts)
+    return index
+
+
+def ids(results):
+    return [result["id"] for result in results]
+
+
+def test_phone_punctuation_joins_digits():
+    assert query_terms("555-0070") == ["5550070"]
+    assert query_terms("(555) 007-0") == ["5550070"]
+    assert query_terms("Customer 555-0070") == ["customer", "5550070"]
+
+
+@pytest.mark.parametrize("query", ["555-0070", "555 0070", "555.0070", "5550070", "0070"])
+def test_search_phone_as_written(index, query):
+    assert ids(index.search(query))[0] == "contact-070"
+
+
+def test_search_partial_phone(index):
+    assert ids(index.search("(555) 007-0")) == ["contact-070"]
+    assert "contact-099" in ids(index.search("555-0099"))
+
+
+def test_search_name_and_number(index):
+    assert ids(index.search("customer 555-0070")) == ["contact-070"]
+    assert ids(index.search("cust 555-0099")) == ["contact-099"]
+
+
+def test_short_digit_prefix_keeps_every_match(index):
+    # Every contact's number starts with 555; none may be cut before the AND
+    assert len(index.search("555", limit=50)) == 50
+    assert ids(index.search("555 customer 499")) == ["contact-499"]
+
+
+def test_overlay_phone(index):
+    index.loaded = True
+    index.add({"id": "contact-new", "name": "Ada Lovelace", "email": "ada@example.com", "phone": "(555) 123-4567"})
+    assert ids(index.search("555-123-4567")) == ["contact-new"]
+    assert ids(index.search("ada 123-45")) == ["contact-new"]
+    index.remove("contact-new")
+    assert index.search("ada") == []
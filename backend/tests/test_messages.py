@@ -0,0 +1,55 @@
+"""Message order and sync cursors come from the database's seq."""
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from database import fake_store
+
+
+@pytest.fixture(scope="module")
+def client():
+    with TestClient(main.app) as client:
+        user = {"email": "inbox@example.com", "password": "secret123", "username": "inbox", "role": "admin"}
+        client.post("/auth/register", json=user)
+        token = client.post("/auth/login", json=user).json()["access_token"]
+        client.headers["Authorization"] = f"Bearer {token}"
+        yield client
+
+
+@pytest.fixture
+def conversation_id():
+    return fake_store.insert("conversations", {"name": "Ada"})["id"]
+
+
+def texts(window):
+    return [message["text"] for message in window["items"]]
+
+
+def test_batch_keeps_its_order(client, conversation_id):
+    batch = [{"conversation_id": conversation_id, "text": str(i)} for i in range(10)]
+    sent = client.post("/inbox/messages/batch", json=batch).json()
+    assert [message["text"] for message in sent] == [str(i) for i in range(10)]
+    window = client.get(f"/inbox/messages/{conversation_id}").json()
+    assert texts(window) == [str(i) for i in range(10)]
+
+
+def test_since_returns_only_newer_messages(client, conversation_id):
+    client.post("/inbox/messages", json={"conversation_id": conversation_id, "text": "first"})
+    sync = client.get(f"/inbox/messages/{conversation_id}").json()["sync_cursor"]
+    client.post("/inbox/messages/batch", json=[
+        {"conversation_id": conversation_id, "text": "second"},
+        {"conversation_id": conversation_id, "text": "third"},
+    ])
+    window = client.get(f"/inbox/messages/{conversation_id}", params={"since": sync}).json()
+    assert texts(window) == ["second", "third"]
+
+
+def test_etag_changes_with_a_new_message(client, conversation_id):
+    client.post("/inbox/messages", json={"conversation_id": conversation_id, "text": "first"})
+    etag = client.get(f"/inbox/messages/{conversation_id}").headers["etag"]
+    cached = client.get(f"/inbox/messages/{conversation_id}", headers={"If-None-Match": etag})
+    assert cached.status_code == 304
+    client.post("/inbox/messages", json={"conversation_id": conversation_id, "text": "second"})
+    fresh = client.get(f"/inbox/messages/{conversation_id}", headers={"If-None-Match": etag})
+    assert fresh.status_code == 200
+    assert texts(fresh.json()) == ["first", "second"]
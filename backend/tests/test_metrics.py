@@ -0,0 +1,31 @@
+"""Password hashing load is exported with the other metrics."""
+import asyncio
+import threading
+
+from auth import hash_pool
+from metrics import registry
+
+
+def metric(name: str) -> float:
+    for line in registry.render().splitlines():
+        if line.startswith(f"{name} "):
+            return float(line.split()[1])
+    raise AssertionError(f"{name} not exported")
+
+
+def test_hash_queue_depth_is_exported():
+    assert metric("password_hash_in_flight") == 0
+    assert metric("password_hash_queue_depth") == 0
+
+    release = threading.Event()
+
+    async def burst():
+        jobs = [asyncio.create_task(hash_pool.run(release.wait)) for _ in range(hash_pool.workers + 2)]
+        await asyncio.sleep(0)
+        seen = metric("password_hash_in_flight"), metric("password_hash_queue_depth")
+        release.set()
+        await asyncio.gather(*jobs)
+        return seen
+
+    assert asyncio.run(burst()) == (hash_pool.workers + 2, 2)
+    assert metric("password_hash_in_flight") == 0
@@ -0,0 +1,87 @@
+"""Keyset filters and page walking in pagination.py."""
+import pytest
+from fastapi import HTTPException
+
+from fake_supabase import FakeClient, FakeStore
+from pagination import PageParams, encode_cursor, keyset_filter, with_tiebreak
+
+NAMES = ['O"Brien, Ada', "Ada", "Ada", 'O"Brien, Ada', "Lovelace (Ada)", "Ada"]
+
+
+@pytest.fixture
+def supabase():
+    supabase = FakeClient(FakeStore())
+    for i, name in enumerate(NAMES):
+        supabase.table("inventory").insert({"name": name, "category": "Supplies", "available": i % 2}).execute()
+    return supabase
+
+
+def params(limit=2, cursor=None, fields=None):
+    return PageParams(limit=limit, cursor=cursor, fields=fields)
+
+
+def walk(supabase, order, limit=2):
+    """Every row, fetched page by page through next_cursor"""
+    rows, cursor = [], None
+    while True:
+        page = params(limit, cursor)
+        fetched = page.apply(supabase.table("inventory").select("*"), order).execute().data
+        window = page.respond(fetched, order)
+        rows += window["items"]
+        cursor = window["next_cursor"]
+        if not cursor:
+            return rows
+
+
+def test_filter_for_mixed_directions():
+    order = [("available", True), ("name", False), ("id", False)]
+    assert keyset_filter(order, [1, "Ada", "x"]) == (
+        'available.lt."1",'
+        'and(available.eq."1",name.gt."Ada"),'
+        'and(available.eq."1",name.eq."Ada",id.gt."x")'
+    )
+
+
+def test_filter_quotes_values():
+    assert keyset_filter([("name", False)], ['O"Brien, Ada\\']) == r'name.gt."O\"Brien, Ada\\"'
+
+
+@pytest.mark.parametrize("order", [
+    [("name", False)],
+    [("name", True)],
+    [("available", True), ("name", False)],
+    [("available", False), ("name", True)],
+])
+def test_walk_matches_one_sorted_read(supabase, order):
+    everything = supabase.table("inventory").select("*")
+    for column, desc in with_tiebreak(order):
+        everything = everything.order(column, desc=desc)
+    expected = [row["id"] for row in everything.execute().data]
+    assert [row["id"] for row in walk(supabase, order)] == expected
+    assert len(expected) == len(NAMES)
+
+
+def test_merge_drops_rows_before_the_cursor():
+    order = [("name", False)]
+    cursor = encode_cursor({"name": "b", "id": "2"}, with_tiebreak(order))
+    page = params(limit=2, cursor=cursor, fields="name")
+    stored = [{"id": "5", "name": "d", "available": 1}]
+    extra = [
+        {"id": "1", "name": "b", "available": 0},
+        {"id": "3", "name": "b", "available": 0},
+        {"id": "4", "name": "a", "available": 0},
+        {"id": "6", "name": "c", "available": 0},
+    ]
+    merged = page.merge(stored, extra, order)
+    assert merged == [{"id": "3", "name": "b"}, {"id": "6", "name": "c"}, stored[0]]
+
+
+@pytest.mark.parametrize("cursor", [
+    "not base64!",
+    encode_cursor({"name": "a"}, [("name", False)]),
+    "eyJuYW1lIjogImEifQ==",
+])
+def test_invalid_cursor_is_a_bad_request(supabase, cursor):
+    with pytest.raises(HTTPException) as error:
+        params(cursor=cursor).apply(supabase.table("inventory").select("*"), [("name", False)])
+    assert error.value.status_code == 400
@@ -0,0 +1,108 @@
+"""Tag-versioned invalidation in response_cache.py."""
+import asyncio
+from collections import Counter
+
+import pytest
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+
+from response_cache import MemoryBackend, RedisBackend, ResponseCache
+
+
+class FakeRedis:
+    """The slice of ``redis.asyncio`` that RedisBackend uses"""
+
+    def __init__(self):
+        self.data = {}
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def set(self, key, value, ex=None):
+        self.data[key] = value
+
+    async def mget(self, keys):
+        return [self.data.get(key) for key in keys]
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+
+class FakePipeline:
+    def __init__(self, client):
+        self.client = client
+        self.commands = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def incr(self, key):
+        self.commands.append(key)
+
+    async def execute(self):
+        for key in self.commands:
+            self.client.data[key] = str(int(self.client.data.get(key) or 0) + 1).encode()
+        self.commands = []
+
+
+@pytest.fixture(params=["memory", "redis"])
+def cache(request):
+    if request.param == "redis":
+        return ResponseCache(RedisBackend(FakeRedis()), ttl=60)
+    return ResponseCache(MemoryBackend(maxsize=100, ttl=60), ttl=60)
+
+
+@pytest.fixture
+def calls():
+    return Counter()
+
+
+@pytest.fixture
+def client(cache, calls):
+    app = FastAPI()
+
+    def current_user():
+        return {"role": "admin"}
+
+    @app.get("/forms")
+    @cache.cached("forms")
+    async def forms(current_user: dict = Depends(current_user)):
+        calls["forms"] += 1
+        return {"calls": calls["forms"]}
+
+    @app.get("/summary")
+    @cache.cached("bookings", "contacts")
+    async def summary(current_user: dict = Depends(current_user)):
+        calls["summary"] += 1
+        return {"calls": calls["summary"]}
+
+    return TestClient(app)
+
+
+def fetch(client, path):
+    response = client.get(path)
+    return response.headers["x-cache"], response.json()["calls"]
+
+
+def test_repeat_reads_hit(client):
+    assert fetch(client, "/forms") == ("MISS", 1)
+    assert fetch(client, "/forms") == ("HIT", 1)
+
+
+def test_write_invalidates_its_tag_only(client, cache):
+    fetch(client, "/forms")
+    fetch(client, "/summary")
+    asyncio.run(cache.invalidate("contacts"))
+    assert fetch(client, "/summary") == ("MISS", 2)
+    assert fetch(client, "/summary") == ("HIT", 2)
+    assert fetch(client, "/forms") == ("HIT", 1)
+
+
+def test_any_tag_of_a_route_invalidates_it(client, cache):
+    fetch(client, "/summary")
+    asyncio.run(cache.invalidate("bookings", "forms"))
+    assert fetch(client, "/summary") == ("MISS", 2)
+    assert fetch(client, "/forms") == ("MISS", 1)
@@ -0,0 +1,59 @@
+"""Revenue follows booking writes through the migration 009 triggers."""
+import pytest
+
+from fake_supabase import FakeClient, FakeStore
+
+
+@pytest.fixture
+def supabase():
+    return FakeClient(FakeStore())
+
+
+def revenue(supabase):
+    rows = supabase.table("revenue_daily").select("*").execute().data
+    return sorted((row["day"], row["service"], row["bookings"], row["revenue"]) for row in rows if row["bookings"])
+
+
+def book(supabase, **fields):
+    booking = {
+        "customer_name": "Ada", "service": "Cut", "date": "2026-10-01",
+        "time": "9:00 AM", "location": "Studio", "status": "pending", **fields,
+    }
+    return supabase.table("bookings").insert(booking).execute().data[0]
+
+
+def test_completing_twice_counts_once(supabase):
+    booking = book(supabase)
+    for _ in range(2):
+        supabase.table("bookings").update({"status": "completed", "price": 50}).eq("id", booking["id"]).execute()
+    assert revenue(supabase) == [("2026-10-01", "Cut", 1, 50.0)]
+
+
+def test_moving_and_deleting_completed_booking(supabase):
+    booking = book(supabase, status="completed", price=50)
+    supabase.table("bookings").update({"date": "2026-10-03"}).eq("id", booking["id"]).execute()
+    assert revenue(supabase) == [("2026-10-03", "Cut", 1, 50.0)]
+    supabase.table("bookings").delete().eq("id", booking["id"]).execute()
+    assert revenue(supabase) == []
+
+
+def test_series_occurrences(supabase):
+    series = supabase.table("booking_series").insert({
+        "customer_name": "Ada", "service": "Color", "starts_on": "2026-10-01",
+        "time": "9:00 AM", "location": "Studio", "rule": {"freq": "daily"},
+    }).execute().data[0]
+
+    def save(cancelled, overrides):
+        supabase.table("booking_series_exceptions").upsert({
+            "series_id": series["id"], "occurrence_date": "2026-10-02",
+            "cancelled": cancelled, "overrides": overrides,
+        }, on_conflict="series_id,occurrence_date").execute()
+
+    save(False, {"status": "completed", "price": 80})
+    assert revenue(supabase) == [("2026-10-02", "Color", 1, 80.0)]
+    save(True, {})
+    assert revenue(supabase) == []
+    save(False, {"status": "completed", "price": 80})
+    supabase.table("booking_series").delete().eq("id", series["id"]).execute()
+    assert revenue(supabase) == []
+    assert supabase.table("booking_series_exceptions").select("*").execute().data == []
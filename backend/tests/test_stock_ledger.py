@@ -0,0 +1,13 @@
+"""The ledger sums to the stock on hand, starting from the opening balance."""
+from fake_supabase import FakeClient, FakeStore
+
+
+def test_opening_balance_is_recorded_with_the_item():
+    supabase = FakeClient(FakeStore())
+    item = supabase.table("inventory").insert({"name": "Gloves", "category": "Supplies", "available": 12}).execute().data[0]
+    supabase.table("inventory").insert({"name": "Wax", "category": "Supplies", "available": 0}).execute()
+    supabase.rpc("apply_stock_movements", {"p_movements": [{"item_id": item["id"], "delta": -5, "reason": "adjustment"}]}).execute()
+
+    movements = supabase.table("stock_movements").select("item_id,delta,note").execute().data
+    assert movements[0] == {"item_id": item["id"], "delta": 12, "note": "Opening balance"}
+    assert sum(m["delta"] for m in movements) == 7
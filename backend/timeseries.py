@@ -0,0 +1,144 @@
+"""Booking trends bucketed by day, week or month.
+
+The database counts bookings per day and status (and staff member,
+location or service) with the ``booking_counts`` function, so only those
+counts cross the wire. They are turned into NumPy arrays of integer codes
+(group, bucket, status) and summed into a ``(groups, buckets, statuses)``
+matrix with one weighted ``bincount``; totals and cancellation rates are
+then whole-matrix operations. Series occurrences, which only exist in
+memory, go through the same path with a weight of one each.
+"""
+from datetime import date
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from recurrence import series_index
+from repository import AsyncDatabase
+from revenue import bucket_count, bucket_start
+from schemas import BookingStatus
+
+GROUP_COLUMNS = {"staff": "assigned_staff_id", "location": "location", "service": "service"}
+
+
+class Codes:
+    """Dense integer codes for the distinct values seen so far"""
+
+    def __init__(self, known: List = ()):
+        self.labels = list(known)
+        self.index = {value: code for code, value in enumerate(self.labels)}
+
+    def _code(self, value) -> int:
+        code = self.index.get(value)
+        if code is None:
+            code = self.index[value] = len(self.labels)
+            self.labels.append(value)
+        return code
+
+    def encode(self, values: List) -> np.ndarray:
+        return np.fromiter(map(self._code, values), dtype=np.int64, count=len(values))
+
+
+class TimeSeriesBuilder:
+    """Counts bookings per (group, bucket, status)"""
+
+    def __init__(self, start: date, end: date, granularity: str, group_by: Optional[str] = None):
+        self.start = start
+        self.end = end
+        self.granularity = granularity
+        self.bucket_count = bucket_count(start, end, granularity)
+        self.group_column = GROUP_COLUMNS.get(group_by)
+        self.groups = Codes()
+        self.statuses = Codes([status.value for status in BookingStatus])
+        # Few distinct days, so dates are coded like any other value and
+        # only the distinct ones are parsed and bucketed
+        self.days = Codes()
+        self._chunks: List[np.ndarray] = []
+
+    def _day_buckets(self) -> np.ndarray:
+        days = np.array([str(day)[:10] for day in self.days.labels], dtype="datetime64[D]")
+        origin = bucket_start(self.start, self.granularity)
+        if self.granularity == "month":
+            buckets = (days.astype("datetime64[M]") - np.datetime64(origin, "M")).astype(np.int64)
+        else:
+            buckets = (days - np.datetime64(origin, "D")).astype(np.int64)
+            if self.granularity == "week":
+                buckets //= 7
+        # Days outside [start, end] are dropped
+        outside = (days < np.datetime64(self.start, "D")) | (days > np.datetime64(self.end, "D"))
+        buckets[outside] = -1
+        return buckets
+
+    def add(self, rows: List[dict], group_key: Optional[str] = None, weight_key: Optional[str] = None):
+        """Count ``rows`` (bookings, unless ``weight_key`` names a count column)"""
+        if not rows:
+            return
+        group_key = group_key or self.group_column
+        weights = (
+            np.fromiter((row[weight_key] for row in rows), dtype=np.int64, count=len(rows))
+            if weight_key else np.ones(len(rows), dtype=np.int64)
+        )
+        self._chunks.append(np.stack([
+            self.groups.encode([row.get(group_key) for row in rows]) if group_key else np.zeros(len(rows), np.int64),
+            self.days.encode([row["date"] for row in rows]),
+            self.statuses.encode([row.get("status") for row in rows]),
+            weights,
+        ]))
+
+    def add_counts(self, counts: List[dict]):
+        """Add rows returned by the ``booking_counts`` database function"""
+        self.add(counts, group_key="group" if self.group_column else None, weight_key="bookings")
+
+    def counts(self) -> np.ndarray:
+        """Booking counts shaped ``(groups, buckets, statuses)``"""
+        shape = (max(len(self.groups.labels), 1), self.bucket_count, len(self.statuses.labels))
+        if not self._chunks:
+            return np.zeros(shape, dtype=np.int64)
+        groups, days, statuses, weights = np.concatenate(self._chunks, axis=1)
+        buckets = self._day_buckets()[days]
+        inside = buckets >= 0
+        flat = np.ravel_multi_index((groups[inside], buckets[inside], statuses[inside]), shape)
+        counts = np.bincount(flat, weights=weights[inside], minlength=int(np.prod(shape)))
+        return counts.astype(np.int64).reshape(shape)
+
+    def result(self) -> Dict:
+        counts = self.counts()
+        totals = counts.sum(axis=2)
+        cancelled = counts[:, :, self.statuses.index[BookingStatus.CANCELLED.value]]
+        rates = np.round(np.divide(cancelled, totals, out=np.zeros(totals.shape), where=totals > 0), 4)
+
+        labels = self.groups.labels if self.group_column else [None]
+        series = []
+        # Largest groups first
+        for g in np.argsort(-totals.sum(axis=1), kind="stable")[:len(labels)]:
+            group_totals = totals[g].tolist()
+            series.append({
+                "group": labels[g],
+                "total": group_totals,
+                "by_status": {
+                    status: counts[g, :, s].tolist()
+                    for s, status in enumerate(self.statuses.labels)
+                    if status is not None
+                },
+                "cancellation_rate": [
+                    rate if total else None for rate, total in zip(rates[g].tolist(), group_totals)
+                ],
+            })
+        return {"series": series}
+
+
+async def booking_timeseries(
+    supabase: AsyncDatabase, start: date, end: date, granularity: str, group_by: Optional[str] = None
+) -> TimeSeriesBuilder:
+    """Aggregate stored bookings and series occurrences dated in ``[start, end]``"""
+    builder = TimeSeriesBuilder(start, end, granularity, group_by)
+    result = await supabase.rpc("booking_counts", {
+        "p_from": start.isoformat(),
+        "p_to": end.isoformat(),
+        "p_group": builder.group_column,
+    }).execute()
+    builder.add_counts(result.data or [])
+
+    await series_index.ensure_loaded(supabase)
+    builder.add(series_index.occurrences(start, end))
+    return builder
@@ -0,0 +1,17 @@
+import { Button } from "./Button";
+
+interface LoadMoreProps {
+  cursor: string | null | undefined;
+  onLoad: () => void;
+  label?: string;
+}
+
+// Shown under a paged list while the API has more to give
+export function LoadMore({ cursor, onLoad, label = "Load more" }: LoadMoreProps) {
+  if (!cursor) return null;
+  return (
+    <div className="flex justify-center py-4">
+      <Button variant="secondary" onClick={onLoad}>{label}</Button>
+    </div>
+  );
+}
@@ -13,6 +13,33 @@ const authHeaders = () => ({
   Authorization: `Bearer ${getAuthToken()}`,
 });
 
+// List endpoints return { items, next_cursor }; screens load one page and
+// pass next_cursor back when the user asks for more
+export const PAGE_SIZE = 50;
+
+export interface Page<T = any> {
+  items: T[];
+  next_cursor: string | null;
+  prev_cursor?: string | null;
+}
+
+const fetchPage = async (
+  path: string,
+  errorMessage: string,
+  params: Record<string, string | null | undefined> = {}
+): Promise<Page> => {
+  const url = new URL(`${API_URL}${path}`);
+  url.searchParams.set("limit", String(PAGE_SIZE));
+  for (const [key, value] of Object.entries(params)) {
+    if (value) url.searchParams.set(key, value);
+  }
+  const res = await fetch(url.toString(), {
+    headers: authHeaders(),
+  });
+  if (!res.ok) throw new Error(errorMessage);
+  return res.json();
+};
+
 // Main API object
 export const api = {
   // ========== AUTHENTICATION ==========
@@ -53,13 +80,8 @@ export const api = {
   },
 
   // ========== BOOKINGS ==========
-  getBookings: async () => {
-    const res = await fetch(`${API_URL}/bookings`, {
-      headers: authHeaders(),
-    });
-    if (!res.ok) throw new Error("Failed to fetch bookings");
-    return res.json();
-  },
+  getBookings: async (cursor?: string | null) =>
+    fetchPage("/bookings", "Failed to fetch bookings", { cursor }),
 
   createBooking: async (bookingData: any) => {
     const res = await fetch(`${API_URL}/bookings`, {
@@ -91,11 +113,16 @@ export const api = {
   },
 
   // ========== CONTACTS ==========
-  getContacts: async () => {
-    const res = await fetch(`${API_URL}/contacts`, {
+  getContacts: async (cursor?: string | null) =>
+    fetchPage("/contacts", "Failed to fetch contacts", { cursor }),
+
+  searchContacts: async (q: string) => {
+    const url = new URL(`${API_URL}/contacts/search`);
+    url.searchParams.set("q", q);
+    const res = await fetch(url.toString(), {
       headers: authHeaders(),
     });
-    if (!res.ok) throw new Error("Failed to fetch contacts");
+    if (!res.ok) throw new Error("Failed to search contacts");
     return res.json();
   },
 
@@ -129,13 +156,8 @@ export const api = {
   },
 
   // ========== INVENTORY ==========
-  getInventory: async () => {
-    const res = await fetch(`${API_URL}/inventory`, {
-      headers: authHeaders(),
-    });
-    if (!res.ok) throw new Error("Failed to fetch inventory");
-    return res.json();
-  },
+  getInventory: async (cursor?: string | null) =>
+    fetchPage("/inventory", "Failed to fetch inventory", { cursor }),
 
   getInventoryAlerts: async () => {
     const res = await fetch(`${API_URL}/inventory/alerts`, {
@@ -180,13 +202,8 @@ export const api = {
   },
 
   // ========== STAFF ==========
-  getStaff: async () => {
-    const res = await fetch(`${API_URL}/staff`, {
-      headers: authHeaders(),
-    });
-    if (!res.ok) throw new Error("Failed to fetch staff");
-    return res.json();
-  },
+  getStaff: async (cursor?: string | null) =>
+    fetchPage("/staff", "Failed to fetch staff", { cursor }),
 
   createStaff: async (staffData: any) => {
     const res = await fetch(`${API_URL}/staff`, {
@@ -209,13 +226,8 @@ export const api = {
   },
 
   // ========== FORMS ==========
-  getForms: async () => {
-    const res = await fetch(`${API_URL}/forms`, {
-      headers: authHeaders(),
-    });
-    if (!res.ok) throw new Error("Failed to fetch forms");
-    return res.json();
-  },
+  getForms: async (cursor?: string | null) =>
+    fetchPage("/forms", "Failed to fetch forms", { cursor }),
 
   // async getForms() {
   //   const res = await fetch("/api/forms");
@@ -271,24 +283,16 @@ export const api = {
   },
   // ========== INBOX / MESSAGES ==========
 
-  getConversations: async () => {
-    const res = await fetch(`${API_URL}/inbox/conversations`, {
-      headers: authHeaders(),
-    });
-    if (!res.ok) throw new Error("Failed to fetch conversations");
-    return res.json();
-  },
+  getConversations: async (cursor?: string | null) =>
+    fetchPage("/inbox/conversations", "Failed to fetch conversations", { cursor }),
 
-  getMessages: async (conversationId: string) => {
-    const res = await fetch(
-      `${API_URL}/inbox/messages/${conversationId}`,
-      {
-        headers: authHeaders(),
-      }
-    );
-    if (!res.ok) throw new Error("Failed to fetch messages");
-    return res.json();
-  },
+  // The latest messages, or the ones before a prev_cursor
+  getMessages: async (conversationId: string, before?: string | null) =>
+    fetchPage(
+      `/inbox/messages/${conversationId}`,
+      "Failed to fetch messages",
+      before ? { before } : { tail: "true" }
+    ),
 
   sendMessage: async (data: {
     conversationId: string;
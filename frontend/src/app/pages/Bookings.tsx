@@ -9,6 +9,7 @@ import {
   MapPin,
 } from "lucide-react";
 import { Button } from "../components/Button";
+import { LoadMore } from "../components/LoadMore";
 import { StatusBadge } from "../components/StatusBadge";
 import * as Dialog from "@radix-ui/react-dialog";
 import { Input } from "../components/Input";
@@ -31,6 +32,7 @@ type Booking = {
 
 export function Bookings() {
   const [bookings, setBookings] = useState<Booking[]>([]);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
   const [loading, setLoading] = useState(true);
 
   const [view, setView] = useState<"list" | "calendar">("list");
@@ -96,8 +98,9 @@ const handleCreateBooking = async () => {
   const loadBookings = async () => {
     try {
       setLoading(true);
-      const data = await api.getBookings();
-      setBookings(data || []);
+      const page = await api.getBookings();
+      setBookings(page.items);
+      setNextCursor(page.next_cursor);
     } catch (err) {
       console.error("Failed to load bookings:", err);
     } finally {
@@ -105,6 +108,16 @@ const handleCreateBooking = async () => {
     }
   };
 
+  const loadMoreBookings = async () => {
+    try {
+      const page = await api.getBookings(nextCursor);
+      setBookings((current) => [...current, ...page.items]);
+      setNextCursor(page.next_cursor);
+    } catch (err) {
+      console.error("Failed to load bookings:", err);
+    }
+  };
+
   /* ---------------- DELETE ---------------- */
 
   const handleDelete = async (id: string) => {
@@ -251,6 +264,8 @@ const handleCreateBooking = async () => {
               </div>
             </div>
           ))}
+
+          <LoadMore cursor={nextCursor} onLoad={loadMoreBookings} />
         </div>
       )}
 
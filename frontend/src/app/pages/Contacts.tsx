@@ -10,6 +10,7 @@ import {
 } from "lucide-react";
 import * as Dialog from "@radix-ui/react-dialog";
 import { Button } from "../components/Button";
+import { LoadMore } from "../components/LoadMore";
 import { StatusBadge } from "../components/StatusBadge";
 import { api } from "../lib/api";
 
@@ -32,10 +33,15 @@ export function Contacts() {
   const [contacts, setContacts] = useState<Contact[]>(
     []
   );
+  const [nextCursor, setNextCursor] = useState<
+    string | null
+  >(null);
   const [loading, setLoading] = useState(true);
 
   const [searchQuery, setSearchQuery] =
     useState("");
+  const [searchResults, setSearchResults] =
+    useState<Contact[] | null>(null);
   const [selectedContact, setSelectedContact] =
     useState<Contact | null>(null);
   const [showCreateDialog, setShowCreateDialog] =
@@ -83,8 +89,9 @@ export function Contacts() {
   const loadContacts = async () => {
     try {
       setLoading(true);
-      const data = await api.getContacts();
-      setContacts(data || []);
+      const page = await api.getContacts();
+      setContacts(page.items);
+      setNextCursor(page.next_cursor);
     } catch (err) {
       console.error(
         "Failed to load contacts:",
@@ -95,6 +102,46 @@ export function Contacts() {
     }
   };
 
+  const loadMoreContacts = async () => {
+    try {
+      const page = await api.getContacts(nextCursor);
+      setContacts((current) => [
+        ...current,
+        ...page.items,
+      ]);
+      setNextCursor(page.next_cursor);
+    } catch (err) {
+      console.error(
+        "Failed to load contacts:",
+        err
+      );
+    }
+  };
+
+  /* ---------------- SEARCH ---------------- */
+
+  // Only the first page is loaded, so searches go to the server
+  useEffect(() => {
+    const query = searchQuery.trim();
+    if (!query) {
+      setSearchResults(null);
+      return;
+    }
+    let stale = false;
+    const timer = setTimeout(async () => {
+      try {
+        const results = await api.searchContacts(query);
+        if (!stale) setSearchResults(results);
+      } catch (err) {
+        console.error("Search failed:", err);
+      }
+    }, 200);
+    return () => {
+      stale = true;
+      clearTimeout(timer);
+    };
+  }, [searchQuery]);
+
   if (loading) {
     return (
       <div className="p-8">
@@ -103,17 +150,7 @@ export function Contacts() {
     );
   }
 
-  /* ---------------- SEARCH FILTER ---------------- */
-
-  const filteredContacts = contacts.filter(
-    (c) =>
-      c.name
-        ?.toLowerCase()
-        .includes(searchQuery.toLowerCase()) ||
-      c.email
-        ?.toLowerCase()
-        .includes(searchQuery.toLowerCase())
-  );
+  const filteredContacts = searchResults ?? contacts;
 
   /* ---------------- UI ---------------- */
 
@@ -253,6 +290,13 @@ export function Contacts() {
               )}
             </tbody>
           </table>
+
+          {!searchResults && (
+            <LoadMore
+              cursor={nextCursor}
+              onLoad={loadMoreContacts}
+            />
+          )}
         </div>
 
         {/* Details Panel */}
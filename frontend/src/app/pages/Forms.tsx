@@ -6,6 +6,7 @@ import {
   Download,
 } from "lucide-react";
 import { Button } from "../components/Button";
+import { LoadMore } from "../components/LoadMore";
 import { StatusBadge } from "../components/StatusBadge";
 import * as Progress from "@radix-ui/react-progress";
 import { api } from "../lib/api";
@@ -36,6 +37,9 @@ export function Forms() {
   const [forms, setForms] = useState<
     FormItem[]
   >([]);
+  const [nextCursor, setNextCursor] = useState<
+    string | null
+  >(null);
 
   const [templates, setTemplates] =
     useState<FormTemplate[]>([]);
@@ -79,14 +83,15 @@ export function Forms() {
     try {
       setLoading(true);
 
-      const [formsData, templateData] =
+      const [formsPage, templateData] =
         await Promise.all([
           api.getForms(),
           api.getFormTemplates?.() ??
           [],
         ]);
 
-      setForms(formsData || []);
+      setForms(formsPage.items);
+      setNextCursor(formsPage.next_cursor);
       setTemplates(templateData || []);
     } catch (err) {
       console.error(
@@ -98,6 +103,22 @@ export function Forms() {
     }
   };
 
+  const loadMoreForms = async () => {
+    try {
+      const page = await api.getForms(nextCursor);
+      setForms((current) => [
+        ...current,
+        ...page.items,
+      ]);
+      setNextCursor(page.next_cursor);
+    } catch (err) {
+      console.error(
+        "Failed to load forms:",
+        err
+      );
+    }
+  };
+
   if (loading) {
     return (
       <div className="p-8">
@@ -250,6 +271,8 @@ export function Forms() {
               </div>
             );
           })}
+
+          <LoadMore cursor={nextCursor} onLoad={loadMoreForms} />
         </div>
 
         {/* Templates Sidebar */}
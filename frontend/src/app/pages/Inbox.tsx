@@ -6,6 +6,7 @@ import {
 } from "lucide-react";
 
 import { Button } from "../components/Button";
+import { LoadMore } from "../components/LoadMore";
 import { StatusBadge } from "../components/StatusBadge";
 import { cn } from "../lib/utils";
 import { api } from "../lib/api";
@@ -28,14 +29,35 @@ type Message = {
   isMe: boolean;
 };
 
+const toConversation = (c: any): Conversation => ({
+  id: c.id,
+  name: c.name,
+  lastMessage: c.last_message,
+  time: c.updated_at,
+  status: c.status,
+});
+
+const toMessage = (m: any): Message => ({
+  id: m.id,
+  text: m.text,
+  isMe: m.is_me,
+  time: m.created_at,
+});
+
 /* ---------------- COMPONENT ---------------- */
 
 export function Inbox() {
   const [conversations, setConversations] =
     useState<Conversation[]>([]);
+  const [nextCursor, setNextCursor] = useState<
+    string | null
+  >(null);
 
   const [messages, setMessages] =
     useState<Message[]>([]);
+  const [prevCursor, setPrevCursor] = useState<
+    string | null
+  >(null);
 
   const [selectedConversation, setSelectedConversation] =
     useState<Conversation | null>(null);
@@ -59,18 +81,13 @@ export function Inbox() {
     try {
       setLoading(true);
 
-      const data =
+      const page =
         await api.getConversations();
 
-      const formatted = data.map((c: any) => ({
-        id: c.id,
-        name: c.name,
-        lastMessage: c.last_message,
-        time: c.updated_at,
-        status: c.status,
-      }));
+      const formatted = page.items.map(toConversation);
 
       setConversations(formatted);
+      setNextCursor(page.next_cursor);
 
       if (formatted.length) {
         setSelectedConversation(formatted[0]);
@@ -86,27 +103,57 @@ export function Inbox() {
     }
   };
 
+  const loadMoreConversations = async () => {
+    try {
+      const page =
+        await api.getConversations(nextCursor);
+      setConversations((current) => [
+        ...current,
+        ...page.items.map(toConversation),
+      ]);
+      setNextCursor(page.next_cursor);
+    } catch (err) {
+      console.error(
+        "Failed to load conversations:",
+        err
+      );
+    }
+  };
+
   /* ---------------- LOAD MESSAGES ---------------- */
 
+  // The latest page; older messages load on request
   const loadMessages = async (
     conversationId: string
   ) => {
     try {
-      const data =
+      const page =
         await api.getMessages(
           conversationId
         );
 
-      const formatted = data.map(
-        (m: any) => ({
-          id: m.id,
-          text: m.text,
-          isMe: m.is_me,
-          time: m.created_at,
-        })
+      setMessages(page.items.map(toMessage));
+      setPrevCursor(page.prev_cursor ?? null);
+    } catch (err) {
+      console.error(
+        "Failed to load messages:",
+        err
       );
+    }
+  };
 
-      setMessages(formatted);
+  const loadEarlierMessages = async () => {
+    if (!selectedConversation) return;
+    try {
+      const page = await api.getMessages(
+        selectedConversation.id,
+        prevCursor
+      );
+      setMessages((current) => [
+        ...page.items.map(toMessage),
+        ...current,
+      ]);
+      setPrevCursor(page.prev_cursor ?? null);
     } catch (err) {
       console.error(
         "Failed to load messages:",
@@ -225,6 +272,11 @@ export function Inbox() {
                 </div>
               )
             )}
+
+            <LoadMore
+              cursor={nextCursor}
+              onLoad={loadMoreConversations}
+            />
           </div>
         </div>
 
@@ -258,6 +310,12 @@ export function Inbox() {
 
               {/* Messages */}
               <div className="flex-1 overflow-y-auto p-4 space-y-4">
+                <LoadMore
+                  cursor={prevCursor}
+                  onLoad={loadEarlierMessages}
+                  label="Load earlier messages"
+                />
+
                 {messages.map((m) => (
                   <div
                     key={m.id}
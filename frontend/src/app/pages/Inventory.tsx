@@ -9,6 +9,7 @@ import {
 import { Button } from "../components/Button";
 import { StatusBadge } from "../components/StatusBadge";
 import { cn } from "../lib/utils";
+import { LoadMore } from "../components/LoadMore";
 import { api } from "../lib/api";
 
 /* ---------------- TYPES ---------------- */
@@ -30,6 +31,9 @@ export function Inventory() {
   const [items, setItems] = useState<
     InventoryItem[]
   >([]);
+  const [nextCursor, setNextCursor] = useState<
+    string | null
+  >(null);
   const [alerts, setAlerts] = useState<any>(
     null
   );
@@ -77,13 +81,14 @@ export function Inventory() {
     try {
       setLoading(true);
 
-      const [itemsData, alertsData] =
+      const [itemsPage, alertsData] =
         await Promise.all([
           api.getInventory(),
           api.getInventoryAlerts(),
         ]);
 
-      setItems(itemsData || []);
+      setItems(itemsPage.items);
+      setNextCursor(itemsPage.next_cursor);
       setAlerts(alertsData || null);
     } catch (err) {
       console.error(
@@ -95,6 +100,22 @@ export function Inventory() {
     }
   };
 
+  const loadMoreItems = async () => {
+    try {
+      const page = await api.getInventory(nextCursor);
+      setItems((current) => [
+        ...current,
+        ...page.items,
+      ]);
+      setNextCursor(page.next_cursor);
+    } catch (err) {
+      console.error(
+        "Failed to load inventory:",
+        err
+      );
+    }
+  };
+
   if (loading) {
     return (
       <div className="p-8">
@@ -301,6 +322,8 @@ export function Inventory() {
             )}
           </tbody>
         </table>
+
+        <LoadMore cursor={nextCursor} onLoad={loadMoreItems} />
       </div>
       {showCreate && (
         <div className="fixed inset-0 bg-black/40 flex items-center justify-center z-50">
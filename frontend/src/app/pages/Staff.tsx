@@ -8,6 +8,7 @@ import {
   UserX,
 } from "lucide-react";
 import { Button } from "../components/Button";
+import { LoadMore } from "../components/LoadMore";
 import { StatusBadge } from "../components/StatusBadge";
 import * as Dialog from "@radix-ui/react-dialog";
 import { Input } from "../components/Input";
@@ -32,6 +33,9 @@ export function Staff() {
   const [staff, setStaff] = useState<
     StaffMember[]
   >([]);
+  const [nextCursor, setNextCursor] = useState<
+    string | null
+  >(null);
   const [loading, setLoading] =
     useState(true);
 
@@ -50,8 +54,9 @@ export function Staff() {
   const loadStaff = async () => {
     try {
       setLoading(true);
-      const data = await api.getStaff();
-      setStaff(data || []);
+      const page = await api.getStaff();
+      setStaff(page.items);
+      setNextCursor(page.next_cursor);
     } catch (err) {
       console.error(
         "Failed to load staff:",
@@ -62,6 +67,22 @@ export function Staff() {
     }
   };
 
+  const loadMoreStaff = async () => {
+    try {
+      const page = await api.getStaff(nextCursor);
+      setStaff((current) => [
+        ...current,
+        ...page.items,
+      ]);
+      setNextCursor(page.next_cursor);
+    } catch (err) {
+      console.error(
+        "Failed to load staff:",
+        err
+      );
+    }
+  };
+
   if (loading) {
     return (
       <div className="p-8">
@@ -245,6 +266,8 @@ export function Staff() {
         ))}
       </div>
 
+      <LoadMore cursor={nextCursor} onLoad={loadMoreStaff} />
+
       {/* Invite Dialog */}
       <Dialog.Root
         open={showInviteDialog}